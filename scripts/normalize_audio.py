@@ -0,0 +1,285 @@
+"""
+Script pour normaliser les audios d'un dataset STT (mono, 16 kHz, WAV).
+
+Les fichiers sont convertis en parallèle dans `data/processed/audio_wav16k`.
+Un manifest (mtime, taille, empreinte du fichier source) permet de ne
+reconvertir que les fichiers nouveaux ou modifiés. Le dataset JSONL est
+réécrit pour pointer vers les fichiers normalisés : les modèles n'ont plus
+à rééchantillonner au moment de l'inférence.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from tqdm import tqdm
+from src.common.audio import resample_audio
+from src.common.io import read_jsonl, write_jsonl, file_hash
+from src.common.logging import setup_logging
+from src.common.parallel import get_mp_context, limit_cpu_threads
+
+logger = setup_logging(module="scripts.normalize_audio")
+
+DEFAULT_OUTPUT_DIR = Path("data/processed/audio_wav16k")
+MANIFEST_FILENAME = "manifest.json"
+
+
+def load_manifest(manifest_path: str | Path) -> Dict[str, Dict[str, Any]]:
+    """
+    Charge le manifest des fichiers déjà normalisés.
+    
+    Args:
+        manifest_path: Chemin vers le manifest JSON
+    
+    Returns:
+        Dictionnaire chemin source → entrée (vide si le manifest n'existe pas)
+    """
+    manifest_path = Path(manifest_path)
+    if not manifest_path.exists():
+        return {}
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f).get("files", {})
+
+
+def save_manifest(manifest_path: str | Path, files: Dict[str, Dict[str, Any]], sample_rate: int):
+    """
+    Écrit le manifest de façon atomique.
+    
+    Args:
+        manifest_path: Chemin vers le manifest JSON
+        files: Entrées par chemin source
+        sample_rate: Fréquence d'échantillonnage des fichiers normalisés (Hz)
+    """
+    manifest_path = Path(manifest_path)
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=".json", dir=manifest_path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"sample_rate": sample_rate, "files": files}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def output_path_for(source: str, output_dir: Path, taken: Dict[Path, str]) -> Path:
+    """
+    Chemin du fichier normalisé d'une source (`<nom>.wav`, suffixé en cas de collision de noms).
+    
+    Args:
+        source: Chemin du fichier source
+        output_dir: Dossier des fichiers normalisés
+        taken: Chemins de sortie déjà attribués (sortie → source), mis à jour
+    
+    Returns:
+        Chemin du fichier de sortie
+    """
+    output = output_dir / f"{Path(source).stem}.wav"
+    if taken.get(output, source) != source:
+        suffix = hashlib.sha1(source.encode("utf-8")).hexdigest()[:8]
+        output = output_dir / f"{Path(source).stem}_{suffix}.wav"
+    taken[output] = source
+    return output
+
+
+def is_up_to_date(source: str, output: Path, entry: Optional[Dict[str, Any]], sample_rate: int) -> bool:
+    """
+    Indique si le fichier normalisé d'une source est à jour.
+    
+    Compare d'abord taille et mtime (sans lire le fichier) ; si seul le mtime
+    a changé, l'empreinte du contenu tranche (et l'entrée est mise à jour).
+    
+    Args:
+        source: Chemin du fichier source
+        output: Chemin du fichier normalisé attendu
+        entry: Entrée du manifest pour cette source (None si absente)
+        sample_rate: Fréquence d'échantillonnage cible (Hz)
+    
+    Returns:
+        True si la conversion peut être sautée
+    """
+    if not entry or entry.get("output") != str(output) or entry.get("sample_rate") != sample_rate:
+        return False
+    if not output.exists():
+        return False
+    stat = os.stat(source)
+    if stat.st_size != entry.get("size"):
+        return False
+    if stat.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+    if file_hash(source) != entry.get("hash"):
+        return False
+    entry["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def _init_worker():
+    """Un thread de calcul par processus : le parallélisme vient du pool."""
+    limit_cpu_threads(1)
+
+
+def _normalize_file(source: str, output: str, sample_rate: int) -> Dict[str, Any]:
+    """
+    Convertit un fichier et retourne son entrée de manifest.
+    
+    Le fichier est écrit sous un nom temporaire puis renommé : une
+    interruption ne laisse jamais de fichier normalisé tronqué.
+    """
+    stat = os.stat(source)
+    digest = file_hash(source)
+    output = Path(output)
+    tmp_output = output.with_name(f".{output.stem}.tmp.wav")
+    try:
+        info = resample_audio(source, tmp_output, target_sr=sample_rate, mono=True)
+        os.replace(tmp_output, output)
+    except BaseException:
+        tmp_output.unlink(missing_ok=True)
+        raise
+    return {
+        "output": str(output),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": digest,
+        "sample_rate": sample_rate,
+        "duration": info["duration"],
+    }
+
+
+def normalize_datasets(
+    dataset_paths: List[str | Path],
+    output_dir: str | Path = DEFAULT_OUTPUT_DIR,
+    sample_rate: int = 16000,
+    workers: Optional[int] = None,
+    suffix: str = "_wav16k",
+    in_place: bool = False,
+    force: bool = False
+) -> Dict[str, Any]:
+    """
+    Normalise les audios de datasets JSONL et réécrit ces datasets.
+    
+    Args:
+        dataset_paths: Fichiers JSONL (champ audio_path)
+        output_dir: Dossier des fichiers normalisés (contient aussi le manifest)
+        sample_rate: Fréquence d'échantillonnage cible (Hz)
+        workers: Nombre de processus (défaut: nombre de cœurs)
+        suffix: Suffixe des datasets réécrits (`test.jsonl` → `test_wav16k.jsonl`)
+        in_place: Réécrire les datasets sur place plutôt qu'à côté
+        force: Reconvertir tous les fichiers, même à jour
+    
+    Returns:
+        Dictionnaire avec les compteurs (converted, skipped, failed) et les datasets écrits
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST_FILENAME
+    manifest = load_manifest(manifest_path)
+    
+    # Sources uniques, dans l'ordre d'apparition
+    datasets = {Path(path): list(read_jsonl(path)) for path in dataset_paths}
+    taken: Dict[Path, str] = {}
+    outputs: Dict[str, Path] = {}
+    for items in datasets.values():
+        for item in items:
+            source = item.get("source_audio_path", item["audio_path"])
+            if source not in outputs:
+                outputs[source] = output_path_for(source, output_dir, taken)
+    
+    pending = []
+    for source, output in outputs.items():
+        if not os.path.exists(source):
+            logger.warning(f"Audio file not found: {source}")
+            continue
+        if not force and is_up_to_date(source, output, manifest.get(source), sample_rate):
+            continue
+        pending.append(source)
+    
+    skipped = len(outputs) - len(pending)
+    logger.info(f"{len(outputs)} audio files: {len(pending)} to normalize, {skipped} up to date or missing")
+    
+    failed = set()
+    workers = workers or os.cpu_count() or 1
+    try:
+        if pending and workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_mp_context(),
+                initializer=_init_worker
+            ) as executor:
+                futures = {
+                    executor.submit(_normalize_file, source, str(outputs[source]), sample_rate): source
+                    for source in pending
+                }
+                for future in tqdm(as_completed(futures), total=len(futures), desc="Normalizing"):
+                    source = futures[future]
+                    try:
+                        manifest[source] = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to normalize {source}: {e}")
+                        failed.add(source)
+        else:
+            for source in tqdm(pending, desc="Normalizing", disable=not pending):
+                try:
+                    manifest[source] = _normalize_file(source, str(outputs[source]), sample_rate)
+                except Exception as e:
+                    logger.error(f"Failed to normalize {source}: {e}")
+                    failed.add(source)
+    finally:
+        # Sauvegardé même en cas d'interruption : les fichiers déjà convertis ne seront pas refaits
+        save_manifest(manifest_path, manifest, sample_rate)
+    
+    written = []
+    for dataset_path, items in datasets.items():
+        rewritten = []
+        for item in items:
+            source = item.get("source_audio_path", item["audio_path"])
+            entry = manifest.get(source)
+            if source in failed or not entry or entry.get("output") != str(outputs[source]):
+                # Fichier non converti : le dataset garde le chemin d'origine
+                rewritten.append(item)
+                continue
+            rewritten.append({**item, "audio_path": entry["output"], "source_audio_path": source})
+        target = dataset_path if in_place else dataset_path.with_name(f"{dataset_path.stem}{suffix}.jsonl")
+        write_jsonl(target, rewritten)
+        written.append(str(target))
+        logger.info(f"Dataset written to {target}")
+    
+    return {
+        "converted": len(pending) - len(failed),
+        "skipped": skipped,
+        "failed": len(failed),
+        "datasets": written,
+    }
+
+
+def main():
+    """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(description="Normalize dataset audio to mono 16 kHz WAV")
+    parser.add_argument("--dataset", required=True, nargs="+", help="Dataset JSONL file(s) (audio_path field)")
+    parser.add_argument("--output-dir", default=str(DEFAULT_OUTPUT_DIR), help=f"Output directory (default: {DEFAULT_OUTPUT_DIR})")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Target sample rate (default: 16000)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: CPU count)")
+    parser.add_argument("--suffix", default="_wav16k", help="Suffix of the rewritten datasets (default: _wav16k)")
+    parser.add_argument("--in-place", action="store_true", help="Rewrite the datasets in place")
+    parser.add_argument("--force", action="store_true", help="Re-normalize every file, even if up to date")
+    
+    args = parser.parse_args()
+    
+    summary = normalize_datasets(
+        args.dataset,
+        output_dir=args.output_dir,
+        sample_rate=args.sample_rate,
+        workers=args.workers,
+        suffix=args.suffix,
+        in_place=args.in_place,
+        force=args.force
+    )
+    logger.info(
+        f"Done: {summary['converted']} converted, {summary['skipped']} skipped, {summary['failed']} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
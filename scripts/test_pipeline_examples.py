@@ -166,13 +166,14 @@ def main():
     
     # Test avec dataset
     if args.dataset:
-        from src.common.io import read_jsonl
+        from src.common.dataset_cache import load_dataset
         import random
         
-        dataset = list(read_jsonl(args.dataset))
-        random.shuffle(dataset)
-        sample_texts = [item.get("sentence", item.get("transcript", "")) 
-                        for item in dataset[:args.num_samples] if item.get("sentence")]
+        # Cache colonnaire : seules les phrases tirées au sort sont décodées
+        dataset = load_dataset(args.dataset)
+        indices = random.sample(range(len(dataset)), min(args.num_samples, len(dataset)))
+        sentences = dataset.get("sentence")
+        sample_texts = [sentences[i] for i in indices if sentences[i]] if sentences is not None else []
         
         logger.info(f"Testing {len(sample_texts)} samples from dataset")
         text_results = test_text_examples(sample_texts, args.config)
@@ -190,6 +191,14 @@ def main():
     print(f"\n{'='*60}")
     print(f"📊 Résumé: {len(results)} exemples testés")
     print(f"{'='*60}")
+    
+    # Latences par étape (uniquement si des audios ont été traités)
+    from src.pipeline.latency import get_latency_aggregator
+    latency = get_latency_aggregator().summary()
+    if latency["requests"]:
+        print("\n⏱️ Latences par étape (p50 / p95 / p99, ms):")
+        for stage, stats in latency["stages"].items():
+            print(f"  {stage}: {stats['p50'] * 1000:.1f} / {stats['p95'] * 1000:.1f} / {stats['p99'] * 1000:.1f}")
 
 
 if __name__ == "__main__":
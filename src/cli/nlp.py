@@ -8,6 +8,8 @@ from src.common.logging import setup_logging
 from src.nlp.models.dummy import DummyNLPModel
 from src.nlp.eval.evaluate import evaluate_model
 from src.nlp.eval.benchmark import benchmark_models
+from src.nlp.eval.prediction_cache import DEFAULT_PREDICTION_CACHE
+from src.common.dataset_cache import DEFAULT_DATASET_CACHE_DIR
 
 logger = setup_logging(module="cli.nlp")
 
@@ -62,7 +64,15 @@ def evaluate_command(args):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Evaluating {args.model} on {args.dataset}")
-    metrics = evaluate_model(model, args.dataset, output_dir)
+    metrics = evaluate_model(
+        model,
+        args.dataset,
+        output_dir,
+        resume=args.resume,
+        batch_size=args.batch_size,
+        prediction_cache=args.prediction_cache,
+        dataset_cache_dir=args.dataset_cache
+    )
     
     print("\n=== Metrics ===")
     for key, value in metrics.items():
@@ -86,6 +96,10 @@ def train_command(args):
         model.config["n_iter"] = args.n_iter
     if args.dropout:
         model.config["dropout"] = args.dropout
+    if args.eval_frequency is not None:
+        model.config["eval_frequency"] = args.eval_frequency
+    if args.patience is not None:
+        model.config["patience"] = args.patience
     
     model_path = model.train(
         train_dataset=args.train_dataset,
@@ -173,7 +187,11 @@ def benchmark_command(args):
         models=models_to_benchmark,
         dataset_path=args.dataset,
         output_dir=output_dir,
-        save_individual_results=args.save_individual
+        save_individual_results=args.save_individual,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        prediction_cache=args.prediction_cache,
+        dataset_cache_dir=args.dataset_cache
     )
     
     print(f"\n✅ Benchmark complete!")
@@ -208,6 +226,11 @@ def main():
     eval_parser.add_argument("--model", default="dummy", help="NLP model to use")
     eval_parser.add_argument("--config", help="Path to config file")
     eval_parser.add_argument("--output-dir", default="results/nlp", help="Output directory")
+    eval_parser.add_argument("--resume", action="store_true", help="Resume an interrupted evaluation from its journal")
+    eval_parser.add_argument("--batch-size", type=int, help="Number of texts per model call (default: model config or 32)")
+    eval_parser.add_argument("--prediction-cache", nargs="?", const=str(DEFAULT_PREDICTION_CACHE), help=f"Reuse cached predictions of an unchanged model (default file: {DEFAULT_PREDICTION_CACHE})")
+    eval_parser.add_argument("--dataset-cache", default=str(DEFAULT_DATASET_CACHE_DIR), help=f"Columnar dataset cache directory (default: {DEFAULT_DATASET_CACHE_DIR})")
+    eval_parser.add_argument("--no-dataset-cache", dest="dataset_cache", action="store_const", const=None, help="Read the JSONL dataset without writing a cache")
     
     # Commande train
     train_parser = subparsers.add_parser("train", help="Train (fine-tune) a model")
@@ -218,6 +241,8 @@ def main():
     train_parser.add_argument("--output-dir", help="Output directory for trained model")
     train_parser.add_argument("--n-iter", type=int, default=20, help="Number of training iterations")
     train_parser.add_argument("--dropout", type=float, default=0.1, help="Dropout rate")
+    train_parser.add_argument("--eval-frequency", type=int, default=5, help="Evaluate on the validation set every N iterations (default: 5)")
+    train_parser.add_argument("--patience", type=int, help="Stop after N evaluations without NER F-score improvement (default: no early stopping)")
     
     # Commande benchmark
     benchmark_parser = subparsers.add_parser("benchmark", help="Benchmark multiple NLP models")
@@ -226,6 +251,12 @@ def main():
     benchmark_parser.add_argument("--output-dir", default="results/nlp/benchmark", help="Output directory")
     benchmark_parser.add_argument("--save-individual", action="store_true", default=True, help="Save individual model results (default: True)")
     benchmark_parser.add_argument("--no-save-individual", dest="save_individual", action="store_false", help="Don't save individual model results")
+    benchmark_parser.add_argument("--batch-size", type=int, help="Number of texts per model call (default: model config or 32)")
+    benchmark_parser.add_argument("--workers", type=int, help="Models evaluated concurrently, one process each (default: number of models)")
+    benchmark_parser.add_argument("--prediction-cache", default=str(DEFAULT_PREDICTION_CACHE), help=f"Prediction cache file (default: {DEFAULT_PREDICTION_CACHE})")
+    benchmark_parser.add_argument("--no-prediction-cache", dest="prediction_cache", action="store_const", const=None, help="Re-evaluate every sentence")
+    benchmark_parser.add_argument("--dataset-cache", default=str(DEFAULT_DATASET_CACHE_DIR), help=f"Columnar dataset cache directory (default: {DEFAULT_DATASET_CACHE_DIR})")
+    benchmark_parser.add_argument("--no-dataset-cache", dest="dataset_cache", action="store_const", const=None, help="Read the JSONL dataset without writing a cache")
     
     args = parser.parse_args()
     
@@ -7,9 +7,8 @@ from pathlib import Path
 from src.common.config import Config
 from src.common.logging import setup_logging
 from src.pipeline.orchestrator import Pipeline
-from src.stt.models.whisper import WhisperModel
-from src.stt.models.vosk import VoskModel
-from src.nlp.models.spacy_fr import SpacyFRModel
+from src.pipeline.client import PipelineClient
+from src.pipeline.server import DEFAULT_HOST, DEFAULT_PORT
 
 logger = setup_logging(module="cli.pipeline")
 
@@ -17,6 +16,7 @@ logger = setup_logging(module="cli.pipeline")
 def load_stt_model(model_name: str, config: Config) -> "STTModel":
     """Charge un modèle STT."""
     if model_name == "whisper":
+        from src.stt.models.whisper import WhisperModel
         stt_config = config.get("stt", {})
         return WhisperModel({
             "model_size": stt_config.get("model_size", "small"),
@@ -37,6 +37,7 @@ def load_stt_model(model_name: str, config: Config) -> "STTModel":
 def load_nlp_model(model_name: str, config: Config) -> "NLPModel":
     """Charge un modèle NLP."""
     if model_name == "spacy":
+        from src.nlp.models.spacy_fr import SpacyFRModel
         nlp_config = config.get("nlp", {})
         return SpacyFRModel({
             "model_name": nlp_config.get("model_name", "fr_core_news_md")
@@ -45,24 +46,120 @@ def load_nlp_model(model_name: str, config: Config) -> "NLPModel":
         raise ValueError(f"Unknown NLP model: {model_name}")
 
 
+def stream_audio(pipeline: Pipeline, audio_path: str, chunk_duration: float) -> dict:
+    """Simule un flux audio en découpant le fichier en blocs et affiche les événements."""
+    from src.common.audio import load_audio
+    
+    sample_rate = 16000
+    audio = load_audio(audio_path, target_sr=sample_rate)
+    chunk_size = max(1, int(chunk_duration * sample_rate))
+    chunks = (audio[i:i + chunk_size] for i in range(0, len(audio), chunk_size))
+    
+    print("\n=== Streaming ===")
+    result = {}
+    for event in pipeline.process_stream(chunks, sample_rate=sample_rate):
+        if event["type"] == "partial":
+            print(f"[partiel] {event['transcript']}")
+        elif event["type"] == "early":
+            print(f"[anticipé] {event['origin']} → {event['destination']} "
+                  f"({event['elapsed'] * 1000:.0f} ms)")
+        else:
+            result = event
+    
+    result["audio_path"] = str(audio_path)
+    return result
+
+
+def build_pipeline(args, config: Config) -> Pipeline:
+    """Charge les modèles et crée un pipeline."""
+    stt_model = load_stt_model(args.stt_model, config)
+    nlp_model = load_nlp_model(args.nlp_model, config)
+    
+    route_finder = None
+    if args.route:
+        from src.pathFinding.routing import RouteFinder
+        route_finder = RouteFinder()
+    
+    return Pipeline(stt_model, nlp_model, config=config.get("pipeline", {}), route_finder=route_finder)
+
+
+def get_client(args, config: Config) -> PipelineClient:
+    """Crée un client vers le serveur de pipeline (arguments CLI prioritaires sur la config)."""
+    server_config = config.get("pipeline.server", {}) or {}
+    return PipelineClient(
+        host=args.host or server_config.get("host", DEFAULT_HOST),
+        port=args.port or server_config.get("port", DEFAULT_PORT),
+        socket_path=args.socket or server_config.get("socket")
+    )
+
+
+def requested_models(args) -> dict:
+    """Configuration de pipeline demandée en ligne de commande (comparée à celle d'un serveur)."""
+    return {"stt_model": args.stt_model, "nlp_model": args.nlp_model, "route": bool(args.route)}
+
+
+def serve_command(args):
+    """Commande pour démarrer le serveur de pipeline (modèles gardés en mémoire)."""
+    from src.pipeline.server import PipelineServer, serve
+    from src.pipeline.latency import dump_on_signal
+    
+    config = Config(args.config) if args.config else Config()
+    server_config = config.get("pipeline.server", {}) or {}
+    workers = args.workers or server_config.get("workers", 1)
+    
+    logger.info(f"Starting pipeline server with {workers} pipeline(s): {args.stt_model} + {args.nlp_model}")
+    pipelines = [build_pipeline(args, config) for _ in range(workers)]
+    
+    pipeline_server = PipelineServer(
+        pipelines,
+        max_batch_size=args.max_batch_size or server_config.get("max_batch_size", 8),
+        max_wait_ms=args.max_wait_ms if args.max_wait_ms is not None else server_config.get("max_wait_ms", 10.0),
+        models=requested_models(args)
+    )
+    # kill -USR1 <pid> : export des latences (fichier --latency-report, sinon log)
+    dump_on_signal(args.latency_report, aggregator=pipelines[0].latency_aggregator)
+    
+    client = get_client(args, config)
+    serve(pipeline_server, host=client.host, port=client.port, socket_path=client.socket_path)
+
+
 def process_command(args):
     """Commande pour traiter un fichier audio."""
     config = Config(args.config) if args.config else Config()
     
-    # Charge les modèles
-    stt_model = load_stt_model(args.stt_model, config)
-    nlp_model = load_nlp_model(args.nlp_model, config)
+    # Transmet au serveur s'il tourne avec la même configuration (modèles déjà chargés), sinon traite localement
+    client = None if (args.stream or args.no_server) else get_client(args, config)
+    server_models = client.server_models() if client is not None else None
+    models = requested_models(args)
+    pipeline = None
     
-    # Crée le pipeline
-    pipeline = Pipeline(stt_model, nlp_model)
+    if server_models is not None and server_models != models:
+        logger.warning(
+            f"Running pipeline server uses {server_models or 'an unknown configuration'}, "
+            f"not the requested {models}: processing locally"
+        )
+        server_models = None
     
-    # Traite l'audio
-    result = pipeline.process(args.audio)
+    if server_models is not None:
+        logger.info("Forwarding request to the running pipeline server")
+        result = client.process(args.audio, upload=args.upload)
+        # Configuration rapportée par le serveur (celle qui a produit le résultat)
+        models = server_models
+    else:
+        pipeline = build_pipeline(args, config)
+        
+        # Traite l'audio
+        if args.stream:
+            result = stream_audio(pipeline, args.audio, args.chunk_duration)
+        else:
+            result = pipeline.process(args.audio)
     
     # Affiche les résultats
     print("\n=== Configuration ===")
-    print(f"Modèle STT: {args.stt_model}")
-    print(f"Modèle NLP: {args.nlp_model}")
+    print(f"Modèle STT: {models['stt_model']}")
+    print(f"Modèle NLP: {models['nlp_model']}")
+    if pipeline is None:
+        print("Traité par: serveur de pipeline")
     
     print("\n=== Résultats ===")
     print(f"Transcription: {result['transcript']}")
@@ -72,10 +169,21 @@ def process_command(args):
     if result.get('confidence'):
         print(f"Confidence: {result['confidence']:.2f}")
     
+    if "route" in result:
+        route = result.get("route")
+        if route:
+            print(f"Itinéraire ({route['total_distance']:.1f} km): {' → '.join(route['steps'])}")
+        else:
+            print("Itinéraire: Non trouvé")
+    
     # Affiche le message d'erreur si présent
     if result.get('error_message'):
         print(f"\n{result['error_message']}")
     
+    print("\n=== Latence par étape ===")
+    for stage, duration in result.get("timings", {}).items():
+        print(f"{stage}: {duration * 1000:.1f} ms")
+    
     # Détermine le chemin de sortie
     if args.output:
         output_path = Path(args.output)
@@ -84,7 +192,7 @@ def process_command(args):
         audio_name = Path(args.audio).stem
         output_dir = Path("results/pipeline")
         output_dir.mkdir(parents=True, exist_ok=True)
-        output_path = output_dir / f"{audio_name}_{args.stt_model}_{args.nlp_model}_result.json"
+        output_path = output_dir / f"{audio_name}_{models['stt_model']}_{models['nlp_model']}_result.json"
     
     # Sauvegarde JSON
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -95,9 +203,19 @@ def process_command(args):
     # Génère le rapport markdown
     from src.pipeline.report import generate_pipeline_report
     report_path = output_path.with_suffix('.md')
-    generate_pipeline_report(result, report_path, stt_model_name=args.stt_model, nlp_model_name=args.nlp_model)
+    generate_pipeline_report(result, report_path, stt_model_name=models['stt_model'], nlp_model_name=models['nlp_model'])
     print(f"Rapport markdown généré: {report_path}")
     
+    if args.latency_report:
+        if pipeline is not None:
+            pipeline.latency_aggregator.dump(args.latency_report)
+        else:
+            latency_path = Path(args.latency_report)
+            latency_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(latency_path, 'w', encoding='utf-8') as f:
+                json.dump(client.stats()["latency"], f, indent=2, ensure_ascii=False)
+        print(f"Résumé des latences sauvegardé dans: {args.latency_report}")
+    
     # Affiche la commande pour refaire le test
     print(f"\n=== Commande pour refaire le test ===")
     print(f"python3 -m src.cli.pipeline --audio {args.audio} --stt-model {args.stt_model} --nlp-model {args.nlp_model}")
@@ -107,15 +225,35 @@ def main():
     """Point d'entrée principal."""
     parser = argparse.ArgumentParser(description="THOR Pipeline CLI")
     
-    parser.add_argument("--audio", required=True, help="Path to audio file")
+    parser.add_argument("--audio", help="Path to audio file")
     parser.add_argument("--stt-model", default="whisper", help="STT model to use (whisper, vosk)")
     parser.add_argument("--nlp-model", default="spacy", help="NLP model to use (spacy)")
     parser.add_argument("--config", help="Path to config file")
     parser.add_argument("--output", help="Path to save results JSON")
+    parser.add_argument("--route", action="store_true", help="Resolve cities to stations and compute the train route")
+    parser.add_argument("--stream", action="store_true", help="Feed the audio as a stream of chunks (partial transcripts, early extraction)")
+    parser.add_argument("--chunk-duration", type=float, default=0.5, help="Chunk duration in seconds for --stream")
+    parser.add_argument("--latency-report", help="Path to save the per-stage latency summary (JSON)")
+    
+    # Serveur local (modèles gardés en mémoire) et mode client
+    parser.add_argument("--serve", action="store_true", help="Start a pipeline server that keeps models loaded")
+    parser.add_argument("--host", help=f"Server host (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, help=f"Server port (default: {DEFAULT_PORT})")
+    parser.add_argument("--socket", help="Unix socket path (instead of host/port)")
+    parser.add_argument("--workers", type=int, help="Number of pipeline instances in the server (default: 1)")
+    parser.add_argument("--max-batch-size", type=int, help="Maximum micro-batch size in the server (default: 8)")
+    parser.add_argument("--max-wait-ms", type=float, help="Maximum wait to fill a micro-batch in ms (default: 10)")
+    parser.add_argument("--no-server", action="store_true", help="Always process locally, even if a server is running")
+    parser.add_argument("--upload", action="store_true", help="Send the audio bytes to the server instead of its path")
     
     args = parser.parse_args()
     
-    process_command(args)
+    if args.serve:
+        serve_command(args)
+    elif args.audio:
+        process_command(args)
+    else:
+        parser.error("--audio is required (or --serve to start the server)")
 
 
 if __name__ == "__main__":
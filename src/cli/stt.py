@@ -5,11 +5,15 @@ import argparse
 from pathlib import Path
 from src.common.config import Config
 from src.common.logging import setup_logging
+from src.common.audio_cache import DEFAULT_AUDIO_CACHE_DIR
+from src.common.dataset_cache import DEFAULT_DATASET_CACHE_DIR
 from src.stt.models.dummy import DummySTTModel
 from src.stt.models.whisper import WhisperModel
 from src.stt.models.vosk import VoskModel
 from src.stt.eval.evaluate import evaluate_model
 from src.stt.eval.error_analysis import analyze_errors
+from src.stt.eval.throughput import MODES, default_concurrency_levels, run_throughput_benchmark
+from src.common.io import read_jsonl
 
 logger = setup_logging(module="cli.stt")
 
@@ -59,7 +63,16 @@ def evaluate_command(args):
     output_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Evaluating {args.model} on {args.dataset}")
-    metrics = evaluate_model(model, args.dataset, output_dir)
+    metrics = evaluate_model(
+        model,
+        args.dataset,
+        output_dir,
+        workers=args.workers,
+        resume=args.resume,
+        batch_size=args.batch_size,
+        audio_cache_dir=args.audio_cache,
+        dataset_cache_dir=args.dataset_cache
+    )
     
     print("\n=== Metrics ===")
     for key, value in metrics.items():
@@ -68,11 +81,49 @@ def evaluate_command(args):
     # Analyse des erreurs
     if args.analyze_errors:
         logger.info("Analyzing errors...")
-        analyze_errors(
+        analysis = analyze_errors(
             output_dir / "predictions.jsonl",
             output_dir,
             top_n=args.top_errors
         )
+        
+        print("\n=== Erreurs par mot ===")
+        print(f"Substitutions: {analysis['total_substitutions']}, "
+              f"suppressions: {analysis['total_deletions']}, insertions: {analysis['total_insertions']}")
+        for entry in analysis["top_substitutions"][:10]:
+            print(f"  {entry['reference']} → {entry['prediction']}: {entry['count']}")
+
+
+def benchmark_command(args):
+    """Commande pour mesurer le débit d'un modèle selon la concurrence."""
+    config = Config(args.config) if args.config else Config()
+    model = load_model(args.model, config)
+    
+    audio_paths = [item["audio_path"] for item in read_jsonl(args.dataset)]
+    if args.max_samples:
+        audio_paths = audio_paths[:args.max_samples]
+    levels = args.concurrency or default_concurrency_levels()
+    
+    summary = run_throughput_benchmark(
+        model,
+        audio_paths,
+        concurrency_levels=levels,
+        modes=args.modes,
+        rounds=args.rounds,
+        output_dir=args.output_dir
+    )
+    
+    print(f"\n=== Throughput: {summary['model']} ({summary['requests_per_level']} requests/level, {summary['cpu_count']} CPUs) ===")
+    print(f"{'mode':<8} {'conc':>4} {'utt/s':>8} {'RTF':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'CPU %':>6} {'errors':>6}")
+    for level in summary["levels"]:
+        rtf = f"{level['rtf']:.3f}" if level["rtf"] is not None else "n/a"
+        print(
+            f"{level['mode']:<8} {level['concurrency']:>4} {level['utterances_per_s']:>8.2f} {rtf:>7} "
+            f"{level['latency_p50']:>8.3f} {level['latency_p95']:>8.3f} {level['latency_p99']:>8.3f} "
+            f"{level['cpu_utilization'] * 100:>6.0f} {level['errors']:>6}"
+        )
+    for mode, saturation in summary["saturation"].items():
+        print(f"Saturation ({mode}): {saturation if saturation is not None else 'not reached'}")
 
 
 def main():
@@ -94,6 +145,23 @@ def main():
     eval_parser.add_argument("--output-dir", default="results/stt", help="Output directory")
     eval_parser.add_argument("--analyze-errors", action="store_true", help="Analyze errors")
     eval_parser.add_argument("--top-errors", type=int, default=20, help="Number of top errors to show")
+    eval_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes (one model per worker)")
+    eval_parser.add_argument("--resume", action="store_true", help="Resume an interrupted evaluation from its journal")
+    eval_parser.add_argument("--batch-size", type=int, help="Number of files transcribed per model call (default: model config or 1)")
+    eval_parser.add_argument("--audio-cache", nargs="?", const=str(DEFAULT_AUDIO_CACHE_DIR), help=f"Cache decoded audio (default dir: {DEFAULT_AUDIO_CACHE_DIR})")
+    eval_parser.add_argument("--dataset-cache", default=str(DEFAULT_DATASET_CACHE_DIR), help=f"Columnar dataset cache directory (default: {DEFAULT_DATASET_CACHE_DIR})")
+    eval_parser.add_argument("--no-dataset-cache", dest="dataset_cache", action="store_const", const=None, help="Read the JSONL dataset without writing a cache")
+    
+    # Commande benchmark
+    bench_parser = subparsers.add_parser("benchmark", help="Measure throughput under varying concurrency")
+    bench_parser.add_argument("--dataset", required=True, help="Path to dataset JSONL (audio_path field)")
+    bench_parser.add_argument("--model", default="whisper", help="STT model to use")
+    bench_parser.add_argument("--config", help="Path to config file")
+    bench_parser.add_argument("--concurrency", type=int, nargs="+", help="Concurrency levels (default: 1 2 4 ... CPU count)")
+    bench_parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="Execution modes")
+    bench_parser.add_argument("--max-samples", type=int, help="Limit the number of audio files")
+    bench_parser.add_argument("--rounds", type=int, default=1, help="Passes over the audio set per level")
+    bench_parser.add_argument("--output-dir", default="results/stt/throughput", help="Output directory")
     
     args = parser.parse_args()
     
@@ -101,6 +169,8 @@ def main():
         transcribe_command(args)
     elif args.command == "evaluate":
         evaluate_command(args)
+    elif args.command == "benchmark":
+        benchmark_command(args)
     else:
         parser.print_help()
 
@@ -10,6 +10,7 @@ except ImportError:
     sf = None
     librosa = None
 
+import wave
 import numpy as np
 from pathlib import Path
 from typing import Optional
@@ -122,3 +123,58 @@ def get_audio_info(file_path: str | Path) -> dict:
         "subtype": info.subtype
     }
 
+
+
+def load_audio(file_path: str | Path, target_sr: int = 16000) -> np.ndarray:
+    """
+    Décode un fichier audio en signal mono float32 à la fréquence cible.
+    
+    Args:
+        file_path: Chemin vers le fichier audio
+        target_sr: Fréquence d'échantillonnage cible (Hz)
+    
+    Returns:
+        Signal audio (float32, mono)
+    """
+    if not AUDIO_AVAILABLE:
+        raise ImportError("librosa is required for audio decoding")
+    audio, _ = librosa.load(str(file_path), sr=target_sr, mono=True)
+    return audio.astype(np.float32, copy=False)
+
+
+def pcm16_to_float32(chunk: bytes) -> np.ndarray:
+    """
+    Convertit un bloc PCM 16 bits little-endian (mono) en signal float32.
+    
+    Args:
+        chunk: Octets PCM 16 bits
+    
+    Returns:
+        Signal audio normalisé entre -1 et 1
+    """
+    return np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def write_wav(output_path: str | Path, audio: np.ndarray, sample_rate: int = 16000) -> Path:
+    """
+    Écrit un signal mono float32 en WAV PCM 16 bits (module standard `wave`).
+    
+    Args:
+        output_path: Chemin du fichier de sortie
+        audio: Signal audio (float32 entre -1 et 1)
+        sample_rate: Fréquence d'échantillonnage (Hz)
+    
+    Returns:
+        Chemin du fichier écrit
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(str(output_path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    
+    return output_path
@@ -0,0 +1,121 @@
+"""
+Cache d'audio décodé : chaque fichier est décodé une seule fois.
+
+Le signal (mono, float32, fréquence cible) est stocké en `.npy` sous une clé
+dérivée du contenu du fichier, puis relu en mémoire mappée : les évaluations
+suivantes ne refont ni décodage ni rééchantillonnage.
+
+L'empreinte de chaque fichier source est mémorisée dans `index.jsonl`
+(chemin, taille, mtime → empreinte) : un fichier inchangé n'est pas relu
+pour être haché aux exécutions suivantes.
+"""
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+import numpy as np
+from src.common.audio import load_audio
+from src.common.io import file_hash
+
+DEFAULT_AUDIO_CACHE_DIR = Path("data/cache/audio")
+
+
+class AudioCache:
+    """Cache disque des signaux audio décodés, indexé par empreinte du fichier source."""
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_AUDIO_CACHE_DIR, sample_rate: int = 16000):
+        """
+        Args:
+            cache_dir: Dossier racine du cache
+            sample_rate: Fréquence d'échantillonnage des signaux stockés (Hz)
+        """
+        self.sample_rate = sample_rate
+        self.cache_dir = Path(cache_dir) / f"{sample_rate}hz"
+        self.index_path = self.cache_dir / "index.jsonl"
+        # (chemin, taille, mtime) → empreinte, pour ne pas relire le fichier à chaque exécution
+        self._hashes: Dict[Tuple[str, int, int], str] = self._load_index()
+
+    def _load_index(self) -> Dict[Tuple[str, int, int], str]:
+        """Relit l'index des empreintes (les lignes illisibles sont ignorées)."""
+        hashes = {}
+        if not self.index_path.exists():
+            return hashes
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    hashes[(entry["path"], entry["size"], entry["mtime_ns"])] = entry["digest"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return hashes
+
+    def _append_index(self, key: Tuple[str, int, int], digest: str):
+        """Ajoute une entrée à l'index (une ligne par écriture : sûr entre processus)."""
+        path, size, mtime_ns = key
+        line = json.dumps({"path": path, "size": size, "mtime_ns": mtime_ns, "digest": digest}, ensure_ascii=False)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def cache_path(self, audio_path: str | Path) -> Path:
+        """
+        Retourne le chemin du fichier `.npy` associé à un audio.
+
+        Args:
+            audio_path: Chemin vers le fichier audio source
+
+        Returns:
+            Chemin du signal décodé dans le cache
+        """
+        stat = os.stat(audio_path)
+        key = (str(Path(audio_path).resolve()), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_hash(audio_path)
+            self._hashes[key] = digest
+            self._append_index(key, digest)
+        return self.cache_dir / digest[:2] / f"{digest}.npy"
+
+    def load(self, audio_path: str | Path) -> np.ndarray:
+        """
+        Retourne le signal décodé d'un fichier audio (décodé et mis en cache au premier accès).
+
+        Args:
+            audio_path: Chemin vers le fichier audio
+
+        Returns:
+            Signal mono float32 en lecture seule (mémoire mappée)
+        """
+        path = self.cache_path(audio_path)
+        if not path.exists():
+            self._store(path, load_audio(audio_path, target_sr=self.sample_rate))
+        return np.load(path, mmap_mode="r")
+
+    def duration(self, audio_path: str | Path) -> float:
+        """
+        Durée d'un fichier audio (secondes), déduite de la longueur du signal décodé.
+
+        Décode l'audio s'il n'est pas en cache : quand le signal n'est pas
+        utilisé ensuite, préférer les métadonnées (get_audio_info).
+
+        Args:
+            audio_path: Chemin vers le fichier audio
+
+        Returns:
+            Durée en secondes
+        """
+        return len(self.load(audio_path)) / self.sample_rate
+
+    @staticmethod
+    def _store(path: Path, audio: np.ndarray):
+        """Écrit le signal de façon atomique (plusieurs processus peuvent remplir le cache)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, audio.astype(np.float32, copy=False))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,344 @@
+"""
+Cache colonnaire des datasets JSONL.
+
+Un split JSONL est converti une seule fois en colonnes numpy stockées sur
+disque (un dossier par empreinte du fichier source), puis relu en mémoire
+mappée : les évaluations suivantes démarrent sans reparser le JSON, et les
+colonnes de texte occupent un seul buffer UTF-8 plus un tableau d'offsets au
+lieu d'un dictionnaire Python par ligne.
+
+Types de colonnes :
+- "str"   : buffer UTF-8 (uint8) + offsets (int64)
+- "bool"  : tableau booléen
+- "float" : tableau float64 (entiers compris)
+- "json"  : valeurs composites, sérialisées en JSON dans une colonne "str"
+
+Chaque colonne a un tableau d'état (int8) : clé absente, valeur null ou valeur présente.
+"""
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+from src.common.io import read_jsonl, file_hash
+
+DEFAULT_DATASET_CACHE_DIR = Path("data/cache/datasets")
+
+# Version du format sur disque (à incrémenter si l'encodage change)
+CACHE_FORMAT_VERSION = 1
+
+# États d'une cellule
+ABSENT = 0
+NULL = 1
+PRESENT = 2
+
+
+class StringColumn:
+    """Colonne de chaînes : buffer UTF-8 contigu et offsets, décodés à la demande."""
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, state: np.ndarray, decode_json: bool = False):
+        """
+        Args:
+            buffer: Octets UTF-8 de toutes les valeurs concaténées (uint8)
+            offsets: Début de chaque valeur dans le buffer (int64, longueur n + 1)
+            state: État de chaque cellule (ABSENT, NULL, PRESENT)
+            decode_json: Les valeurs sont du JSON à désérialiser
+        """
+        self.buffer = buffer
+        self.offsets = offsets
+        self.state = state
+        self.decode_json = decode_json
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    def __getitem__(self, index: int) -> Any:
+        if self.state[index] != PRESENT:
+            return None
+        value = self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode("utf-8")
+        return json.loads(value) if self.decode_json else value
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[Any]:
+        """Retourne toutes les valeurs de la colonne."""
+        return list(self)
+
+
+class ValueColumn:
+    """Colonne numérique ou booléenne (tableau numpy et état des cellules)."""
+
+    def __init__(self, values: np.ndarray, state: np.ndarray, integers: bool = False):
+        """
+        Args:
+            values: Valeurs (bool ou float64)
+            state: État de chaque cellule (ABSENT, NULL, PRESENT)
+            integers: Les valeurs d'origine sont des entiers (restitués en int)
+        """
+        self.values = values
+        self.state = state
+        self.integers = integers
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    def __getitem__(self, index: int) -> Any:
+        if self.state[index] != PRESENT:
+            return None
+        value = self.values[index].item()
+        if self.integers:
+            return int(value)
+        return value
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[Any]:
+        """Retourne toutes les valeurs de la colonne."""
+        return list(self)
+
+
+def _column_kind(values: List[Any]) -> str:
+    """Choisit le type de stockage d'une colonne d'après ses valeurs non nulles."""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return "bool"
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return "float"
+    if all(isinstance(value, str) for value in present):
+        return "str"
+    return "json"
+
+
+def _encode_strings(values: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    """Concatène des chaînes en un buffer UTF-8 et des offsets."""
+    encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    buffer = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return {"buffer": buffer, "offsets": offsets}
+
+
+class ColumnarDataset:
+    """
+    Dataset stocké par colonnes.
+
+    `dataset["sentence"]` donne une colonne (accès indexé, décodage à la
+    demande) ; `dataset.row(i)` reconstruit la ligne d'origine.
+    """
+
+    def __init__(self, columns: Dict[str, Any], length: int, path: Optional[Path] = None):
+        """
+        Args:
+            columns: Colonnes par nom (ordre de première apparition des clés)
+            length: Nombre de lignes
+            path: Dossier du cache sur disque (None si le dataset n'est qu'en mémoire)
+        """
+        self.columns = columns
+        self.length = length
+        self.path = path
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def get(self, name: str, default: Any = None):
+        """Retourne une colonne, ou `default` si elle n'existe pas."""
+        return self.columns.get(name, default)
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """
+        Reconstruit une ligne du dataset.
+
+        Args:
+            index: Position de la ligne
+
+        Returns:
+            Dictionnaire (les clés absentes de la ligne d'origine sont omises)
+        """
+        return {
+            name: column[index]
+            for name, column in self.columns.items()
+            if column.state[index] != ABSENT
+        }
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Itère sur les lignes reconstruites."""
+        for index in range(self.length):
+            yield self.row(index)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "ColumnarDataset":
+        """
+        Construit un dataset colonnaire en mémoire à partir de lignes.
+
+        Args:
+            records: Lignes (dictionnaires)
+
+        Returns:
+            ColumnarDataset
+        """
+        names: Dict[str, None] = {}
+        for record in records:
+            for name in record:
+                names.setdefault(name)
+
+        columns = {}
+        for name in names:
+            values = [record.get(name) for record in records]
+            state = np.array(
+                [PRESENT if value is not None else (NULL if name in record else ABSENT)
+                 for record, value in zip(records, values)],
+                dtype=np.int8
+            )
+            columns[name] = cls._build_column(values, state)
+        return cls(columns, len(records))
+
+    @staticmethod
+    def _build_column(values: List[Any], state: np.ndarray):
+        kind = _column_kind(values)
+        if kind == "bool":
+            return ValueColumn(np.array([bool(value) for value in values], dtype=bool), state)
+        if kind == "float":
+            return ValueColumn(
+                np.array([value if value is not None else 0.0 for value in values], dtype=np.float64),
+                state,
+                integers=all(isinstance(value, int) for value in values if value is not None)
+            )
+        if kind == "json":
+            values = [json.dumps(value, ensure_ascii=False) if value is not None else None for value in values]
+        arrays = _encode_strings(values)
+        return StringColumn(arrays["buffer"], arrays["offsets"], state, decode_json=kind == "json")
+
+    def save(self, path: str | Path):
+        """
+        Écrit le dataset dans un dossier (un `.npy` par tableau et `meta.json`).
+
+        Args:
+            path: Dossier de destination (créé)
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta = {"version": CACHE_FORMAT_VERSION, "length": self.length, "columns": []}
+        for index, (name, column) in enumerate(self.columns.items()):
+            prefix = f"c{index}"
+            np.save(path / f"{prefix}.state.npy", column.state)
+            if isinstance(column, StringColumn):
+                kind = "json" if column.decode_json else "str"
+                np.save(path / f"{prefix}.buffer.npy", column.buffer)
+                np.save(path / f"{prefix}.offsets.npy", column.offsets)
+            else:
+                kind = "bool" if column.values.dtype == bool else "float"
+                np.save(path / f"{prefix}.values.npy", column.values)
+            meta["columns"].append({
+                "name": name,
+                "kind": kind,
+                "prefix": prefix,
+                "integers": getattr(column, "integers", False)
+            })
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def open(cls, path: str | Path) -> "ColumnarDataset":
+        """
+        Ouvre un dataset écrit par `save` (tableaux en mémoire mappée, sans copie).
+
+        Args:
+            path: Dossier du dataset
+
+        Returns:
+            ColumnarDataset
+        """
+        path = Path(path)
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset cache version in {path}")
+
+        def load(name: str) -> np.ndarray:
+            return np.load(path / name, mmap_mode="r")
+
+        columns = {}
+        for spec in meta["columns"]:
+            prefix = spec["prefix"]
+            state = load(f"{prefix}.state.npy")
+            if spec["kind"] in ("str", "json"):
+                columns[spec["name"]] = StringColumn(
+                    load(f"{prefix}.buffer.npy"),
+                    load(f"{prefix}.offsets.npy"),
+                    state,
+                    decode_json=spec["kind"] == "json"
+                )
+            else:
+                columns[spec["name"]] = ValueColumn(
+                    load(f"{prefix}.values.npy"),
+                    state,
+                    integers=spec.get("integers", False)
+                )
+        return cls(columns, meta["length"], path)
+
+    def __getstate__(self):
+        # Un dataset sur disque est rouvert (mémoire mappée) par le processus qui le reçoit
+        if self.path is not None:
+            return {"path": str(self.path)}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if set(state) == {"path"}:
+            state = ColumnarDataset.open(state["path"]).__dict__
+        self.__dict__.update(state)
+
+
+def load_dataset(
+    dataset_path: str | Path,
+    cache_dir: Optional[str | Path] = DEFAULT_DATASET_CACHE_DIR
+) -> ColumnarDataset:
+    """
+    Charge un dataset JSONL sous forme colonnaire.
+
+    Au premier chargement, le JSONL est parsé et écrit dans
+    `<cache_dir>/<empreinte>/` ; les chargements suivants ouvrent directement
+    ce dossier. Modifier le fichier source change son empreinte et donc l'entrée de cache.
+
+    Args:
+        dataset_path: Chemin vers le fichier JSONL
+        cache_dir: Dossier du cache (None pour ne rien écrire sur disque)
+
+    Returns:
+        ColumnarDataset
+    """
+    if cache_dir is None:
+        return ColumnarDataset.from_records(list(read_jsonl(dataset_path)))
+
+    cache_path = Path(cache_dir) / file_hash(dataset_path)
+    if (cache_path / "meta.json").exists():
+        try:
+            return ColumnarDataset.open(cache_path)
+        except (OSError, ValueError):
+            shutil.rmtree(cache_path, ignore_errors=True)
+
+    dataset = ColumnarDataset.from_records(list(read_jsonl(dataset_path)))
+
+    # Écriture dans un dossier temporaire puis renommage : plusieurs processus peuvent remplir le cache
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(tempfile.mkdtemp(prefix=".tmp-", dir=cache_path.parent))
+    try:
+        dataset.save(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Un autre processus a écrit la même entrée entre-temps
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not (cache_path / "meta.json").exists():
+            raise
+    return ColumnarDataset.open(cache_path)
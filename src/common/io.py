@@ -3,6 +3,7 @@ Utilitaires pour la lecture/écriture de fichiers.
 """
 import json
 import csv
+import hashlib
 from pathlib import Path
 from typing import List, Dict, Any, Iterator
 import pandas as pd
@@ -71,3 +72,21 @@ def write_csv(file_path: str | Path, data: List[Dict[str, Any]]):
     df = pd.DataFrame(data)
     df.to_csv(file_path, index=False, encoding='utf-8')
 
+
+def file_hash(file_path: str | Path, algorithm: str = "sha1", chunk_size: int = 1 << 20) -> str:
+    """
+    Calcule l'empreinte du contenu d'un fichier (clé de cache).
+    
+    Args:
+        file_path: Chemin vers le fichier
+        algorithm: Algorithme de hachage (hashlib)
+        chunk_size: Taille des blocs lus (octets)
+    
+    Returns:
+        Empreinte hexadécimale
+    """
+    digest = hashlib.new(algorithm)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
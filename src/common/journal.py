@@ -0,0 +1,182 @@
+"""
+Journal d'évaluation : sauvegarde incrémentale des résultats par échantillon.
+
+Chaque échantillon évalué est ajouté immédiatement au journal (une ligne JSONL),
+ce qui permet de reprendre une évaluation interrompue sans refaire les
+échantillons déjà traités.
+
+La première ligne du journal est un en-tête avec l'empreinte du modèle et du
+dataset : une reprise avec un autre modèle ou une autre version du dataset est refusée.
+"""
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.common.io import file_hash
+from src.common.logging import setup_logging
+
+logger = setup_logging(module="journal")
+
+JOURNAL_FILENAME = "predictions.journal.jsonl"
+
+
+def sample_key(item: Dict[str, Any], index: int) -> str:
+    """
+    Identifiant d'un échantillon dans le journal.
+
+    Args:
+        item: Ligne du dataset
+        index: Position de la ligne dans le dataset (utilisée si l'id est absent)
+
+    Returns:
+        Clé de l'échantillon
+    """
+    sample_id = item.get("id")
+    return str(sample_id) if sample_id not in (None, "") else f"#{index}"
+
+
+def sample_keys(ids: Sequence[Any]) -> List[str]:
+    """
+    Identifiants de tous les échantillons d'un dataset.
+
+    Un id présent sur plusieurs lignes est suffixé par la position de chaque
+    ligne (`id#position`) : les doublons ne se confondent pas dans le journal.
+
+    Args:
+        ids: Id de chaque ligne du dataset (None si absent)
+
+    Returns:
+        Clés des échantillons, dans l'ordre du dataset
+    """
+    keys = [sample_key({"id": sample_id}, index) for index, sample_id in enumerate(ids)]
+    counts = Counter(keys)
+    return [key if counts[key] == 1 else f"{key}#{index}" for index, key in enumerate(keys)]
+
+
+def run_fingerprint(model: Any, dataset_path: str | Path) -> Dict[str, str]:
+    """
+    Empreinte d'une évaluation (modèle et contenu du dataset), écrite dans l'en-tête du journal.
+
+    Args:
+        model: Modèle évalué (`fingerprint()` s'il existe, sinon classe et config)
+        dataset_path: Fichier du dataset
+
+    Returns:
+        Dictionnaire {"model": ..., "dataset": ...}
+    """
+    if hasattr(model, "fingerprint"):
+        model_fingerprint = model.fingerprint()
+    else:
+        description = {
+            "class": f"{type(model).__module__}.{type(model).__qualname__}",
+            "config": getattr(model, "config", None),
+        }
+        payload = json.dumps(description, sort_keys=True, ensure_ascii=False, default=str)
+        model_fingerprint = hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    return {"model": model_fingerprint, "dataset": file_hash(dataset_path)}
+
+
+class EvalJournal:
+    """
+    Journal append-only des résultats (métriques + prédiction) par échantillon.
+
+    Utilisation :
+        with EvalJournal(path, resume=True, fingerprint=run_fingerprint(model, dataset_path)) as journal:
+            done = journal.completed
+            ...
+            journal.append(key, metrics, prediction)
+    """
+
+    def __init__(self, path: str | Path, resume: bool = False, fingerprint: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: Chemin du fichier journal
+            resume: Reprendre le journal existant (sinon il est remis à zéro)
+            fingerprint: Empreinte de l'évaluation (voir run_fingerprint) ; une reprise
+                d'un journal d'empreinte différente lève ValueError
+        """
+        self.path = Path(path)
+        self.resume = resume
+        self.fingerprint = fingerprint
+        self.completed: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+        self._file = None
+
+    def open(self) -> "EvalJournal":
+        """Charge les entrées existantes (si reprise) et ouvre le journal en ajout."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.resume and self.path.exists():
+            header, self.completed = self._load()
+            if self.fingerprint is not None and header != self.fingerprint:
+                raise ValueError(
+                    f"Cannot resume from {self.path}: it was written for another model or dataset version "
+                    f"({header or 'no fingerprint'} != {self.fingerprint}). Rerun without --resume."
+                )
+            logger.info(f"Resuming from {self.path} ({len(self.completed)} samples already evaluated)")
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            if self.fingerprint is not None:
+                self._write({"header": self.fingerprint})
+        return self
+
+    def _load(self) -> Tuple[Optional[Dict[str, Any]], Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]]]:
+        """Lit l'en-tête et les entrées du journal en ignorant une éventuelle dernière ligne tronquée."""
+        header = None
+        completed = {}
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for raw_line in f:
+                try:
+                    entry = json.loads(raw_line)
+                    if "header" in entry:
+                        header = entry["header"]
+                    else:
+                        completed[entry["key"]] = (entry["metrics"], entry["prediction"])
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Ignoring truncated journal entry after {len(completed)} samples")
+                    break
+                valid_size += len(raw_line)
+
+        # Supprime la fin corrompue pour que les ajouts suivants restent lisibles
+        with open(self.path, 'r+b') as f:
+            f.truncate(valid_size)
+            if valid_size:
+                f.seek(valid_size - 1)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+
+        return header, completed
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def append(self, key: str, metrics: Dict[str, Any], prediction: Dict[str, Any]):
+        """
+        Ajoute le résultat d'un échantillon (écrit immédiatement dans le fichier).
+
+        Args:
+            key: Clé de l'échantillon (voir sample_key)
+            metrics: Métriques de l'échantillon
+            prediction: Prédiction de l'échantillon
+        """
+        self._write({"key": key, "metrics": metrics, "prediction": prediction})
+        self.completed[key] = (metrics, prediction)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Retourne (métriques, prédiction) d'un échantillon déjà évalué."""
+        return self.completed.get(key)
+
+    def close(self):
+        """Ferme le journal."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "EvalJournal":
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
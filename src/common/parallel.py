@@ -0,0 +1,76 @@
+"""
+Utilitaires pour l'exécution parallèle (pools de processus).
+"""
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, Iterator
+
+
+def get_mp_context():
+    """
+    Retourne le contexte multiprocessing utilisé par les pools du projet.
+
+    "spawn" évite d'hériter par fork de l'état des bibliothèques natives
+    (threads torch/OpenMP) du processus parent.
+    """
+    return multiprocessing.get_context("spawn")
+
+
+def limit_cpu_threads(num_threads: int):
+    """
+    Limite le nombre de threads de calcul du processus courant.
+
+    Évite la sursouscription quand plusieurs processus partagent la machine.
+
+    Args:
+        num_threads: Nombre de threads autorisés (minimum 1)
+    """
+    num_threads = max(1, int(num_threads))
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+
+    # torch lit OMP_NUM_THREADS à l'import : s'il est déjà chargé, on le règle directement
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(num_threads)
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """Répartit équitablement les cœurs disponibles entre les workers."""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def bounded_map(
+    executor: Executor,
+    function: Callable,
+    iterable: Iterable,
+    max_in_flight: int,
+    *args: Any
+) -> Iterator[Any]:
+    """
+    Équivalent de `executor.map` qui ne consomme `iterable` qu'au fil des résultats.
+
+    `executor.map` soumet toutes les tâches d'emblée (et matérialise donc tous
+    les arguments) ; ici au plus `max_in_flight` tâches sont en attente ou en cours.
+
+    Args:
+        executor: Pool d'exécution
+        function: Fonction appelée comme `function(élément, *args)`
+        iterable: Éléments à traiter (lus à la demande)
+        max_in_flight: Nombre maximal de tâches soumises non encore consommées
+        *args: Arguments supplémentaires passés à chaque appel
+
+    Yields:
+        Résultats, dans l'ordre de `iterable`
+    """
+    max_in_flight = max(1, max_in_flight)
+    futures = deque()
+    for item in iterable:
+        if len(futures) >= max_in_flight:
+            yield futures.popleft().result()
+        futures.append(executor.submit(function, item, *args))
+    while futures:
+        yield futures.popleft().result()
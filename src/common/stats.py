@@ -0,0 +1,269 @@
+"""
+Statistiques en flux : moyenne/variance en ligne (Welford) et quantiles
+approchés par t-digest, fusionnables entre processus.
+
+La mémoire reste constante quelle que soit la taille du dataset.
+"""
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_QUANTILES = (50, 90, 95, 99)
+
+
+class QuantileSketch:
+    """
+    t-digest (variante « merging ») : résumé compact d'une distribution.
+
+    Les valeurs sont regroupées en centroïdes (moyenne, poids) dont la taille
+    maximale dépend du quantile (fonction d'échelle k1) : petits près des
+    queues, d'où une bonne précision sur p95/p99. Tant que peu de valeurs ont
+    été vues, chaque valeur reste un centroïde et les quantiles sont exacts
+    (interpolation linéaire).
+    """
+
+    def __init__(self, compression: float = 100.0):
+        """
+        Args:
+            compression: Paramètre δ (nombre de centroïdes ≈ δ ; plus grand = plus précis)
+        """
+        self.compression = compression
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_limit = int(5 * compression)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        """Ajoute une valeur."""
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        """Fusionne un autre sketch dans celui-ci."""
+        if other.count == 0:
+            return
+        self._buffer.extend(other._centroids)
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _q(self, k: float) -> float:
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        """Fusionne le tampon dans les centroïdes en respectant la borne de taille k1."""
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+
+        total = self.count
+        merged = []
+        mean, weight = points[0]
+        weight_before = 0.0
+        limit = self._q(self._k(0.0) + 1) * total
+
+        for point_mean, point_weight in points[1:]:
+            if weight_before + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                weight_before += weight
+                limit = self._q(self._k(weight_before / total) + 1) * total
+                mean, weight = point_mean, point_weight
+
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float:
+        """
+        Estime un quantile.
+
+        Args:
+            q: Quantile entre 0 et 1
+
+        Returns:
+            Valeur estimée (0.0 si aucune valeur)
+        """
+        self._compress()
+        centroids = self._centroids
+        if not centroids:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+
+        if len(centroids) == self.count:
+            # Toutes les valeurs sont encore distinctes : percentile exact (interpolation linéaire)
+            position = (len(centroids) - 1) * q
+            lower = int(position)
+            upper = min(lower + 1, len(centroids) - 1)
+            return centroids[lower][0] + (position - lower) * (centroids[upper][0] - centroids[lower][0])
+
+        # Chaque centroïde est placé au centre de sa masse cumulée ; interpolation entre centres
+        target = q * self.count
+        previous_center, previous_mean = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in centroids:
+            center = cumulative + weight / 2
+            if target < center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+
+        if self.count == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (self.count - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+
+class RunningStats:
+    """
+    Moyenne et variance en ligne (algorithme de Welford), min/max et quantiles
+    (QuantileSketch). Deux instances se fusionnent en O(taille du sketch).
+    """
+
+    def __init__(self, compression: float = 100.0):
+        """
+        Args:
+            compression: Paramètre de précision du sketch de quantiles
+        """
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.total = 0.0
+        self.sketch = QuantileSketch(compression)
+
+    def add(self, value: float):
+        """Ajoute une valeur."""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.sketch.add(value)
+
+    def merge(self, other: "RunningStats"):
+        """Fusionne d'autres statistiques (formule de Chan et al.)."""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.sketch.merge(other.sketch)
+
+    @property
+    def std(self) -> float:
+        """Écart-type de population."""
+        return math.sqrt(self._m2 / self.count) if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Percentile (p entre 0 et 100)."""
+        return self.sketch.quantile(p / 100.0)
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """Retourne count, mean, std, min, max et les percentiles demandés."""
+        summary = {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.sketch.min if self.count else 0.0,
+            "max": self.sketch.max if self.count else 0.0,
+        }
+        for p in quantiles:
+            summary[f"p{p:g}"] = self.percentile(p)
+        return summary
+
+
+class MetricsAggregator:
+    """
+    Agrège des dictionnaires de métriques par échantillon, en flux.
+
+    Produit pour chaque métrique `<clé>_mean`, `<clé>_std` et `<clé>_p50/p90/p95/p99` ;
+    les clés de comptage (`count_keys`) sont sommées en `total_<clé>`.
+    """
+
+    def __init__(
+        self,
+        count_keys: Iterable[str] = (),
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        compression: float = 100.0
+    ):
+        """
+        Args:
+            count_keys: Clés à sommer plutôt qu'à moyenner
+            quantiles: Percentiles reportés (0-100)
+            compression: Paramètre de précision des sketches de quantiles
+        """
+        self.count_keys = set(count_keys)
+        self.quantiles = tuple(quantiles)
+        self.compression = compression
+        self.samples = 0
+        self.stats: Dict[str, RunningStats] = {}
+        self.totals: Dict[str, float] = {}
+
+    def add(self, metrics: Dict[str, float]):
+        """Ajoute les métriques d'un échantillon (les valeurs non numériques sont ignorées)."""
+        self.samples += 1
+        for key, value in metrics.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in self.count_keys:
+                self.totals[key] = self.totals.get(key, 0) + value
+            else:
+                if key not in self.stats:
+                    self.stats[key] = RunningStats(self.compression)
+                self.stats[key].add(value)
+
+    def update(self, metrics_list: Iterable[Dict[str, float]]) -> "MetricsAggregator":
+        """Ajoute les métriques de plusieurs échantillons."""
+        for metrics in metrics_list:
+            self.add(metrics)
+        return self
+
+    def merge(self, other: "MetricsAggregator"):
+        """Fusionne un autre agrégateur (ex: résultat d'un worker)."""
+        self.samples += other.samples
+        for key, value in other.totals.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        for key, stats in other.stats.items():
+            if key not in self.stats:
+                self.stats[key] = RunningStats(self.compression)
+            self.stats[key].merge(stats)
+
+    def result(self) -> Dict[str, float]:
+        """
+        Retourne les métriques agrégées.
+
+        Returns:
+            Dictionnaire plat (vide si aucun échantillon)
+        """
+        if not self.samples:
+            return {}
+        aggregated = {}
+        for key, stats in self.stats.items():
+            aggregated[f"{key}_mean"] = stats.mean
+            aggregated[f"{key}_std"] = stats.std
+            for p in self.quantiles:
+                aggregated[f"{key}_p{p:g}"] = stats.percentile(p)
+        for key, value in self.totals.items():
+            aggregated[f"total_{key}"] = value
+        return aggregated
@@ -70,3 +70,25 @@ def clean_station_name(name: str) -> str:
     
     return name
 
+
+
+def normalize_city_name(name: str) -> str:
+    """
+    Normalise un nom de ville/gare pour la recherche par clé.
+    
+    Minuscules, sans accents, tirets et apostrophes remplacés par des espaces,
+    "St"/"Ste" développés et suffixe d'arrondissement supprimé
+    ("PARIS-12E-ARRONDISSEMENT" → "paris").
+    
+    Args:
+        name: Nom de ville/gare
+    
+    Returns:
+        Clé normalisée
+    """
+    key = normalize_text(name, lowercase=True, remove_accents=True)
+    key = re.sub(r'[\s-]+\d+(?:er|e|eme)?[\s-]+arrondissement$', '', key)
+    key = re.sub(r"[-'’]", ' ', key)
+    key = re.sub(r'\bste\b\.?', 'sainte', key)
+    key = re.sub(r'\bst\b\.?', 'saint', key)
+    return re.sub(r'\s+', ' ', key).strip()
@@ -0,0 +1,59 @@
+"""
+Regroupement des textes par longueur pour l'inférence par lots.
+
+Un modèle qui padde chaque lot à sa phrase la plus longue (transformers)
+gaspille du calcul quand un lot mélange phrases courtes et longues : trier
+les textes par longueur avant de former les lots réduit ce padding, l'ordre
+des résultats étant ensuite restauré.
+"""
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[List[int]]:
+    """
+    Forme des lots d'indices de longueurs voisines.
+
+    Les lots sont produits du plus long au plus court : un dépassement
+    mémoire éventuel survient dès le premier lot.
+
+    Args:
+        lengths: Longueur de chaque élément
+        batch_size: Nombre maximal d'éléments par lot
+
+    Returns:
+        Liste de lots (indices dans `lengths`)
+    """
+    batch_size = max(1, batch_size)
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index], reverse=True)
+    return [order[start:start + batch_size] for start in range(0, len(order), batch_size)]
+
+
+def map_by_length(
+    function: Callable[[List[T]], List[R]],
+    items: List[T],
+    batch_size: int,
+    key: Callable[[T], int] = len
+) -> List[R]:
+    """
+    Applique une fonction par lots de longueurs voisines, résultats dans l'ordre des entrées.
+
+    Usage typique dans `extract_batch` d'un modèle transformers :
+        return map_by_length(self._extract_padded_batch, texts, batch_size)
+
+    Args:
+        function: Fonction appliquée à un lot, retournant un résultat par élément
+        items: Éléments à traiter
+        batch_size: Nombre maximal d'éléments par lot
+        key: Longueur d'un élément (défaut: len)
+
+    Returns:
+        Résultats, dans l'ordre de `items`
+    """
+    results: List[R] = [None] * len(items)
+    for indices in length_buckets([key(item) for item in items], batch_size):
+        for index, result in zip(indices, function([items[index] for index in indices])):
+            results[index] = result
+    return results
@@ -2,30 +2,120 @@
 Benchmark de plusieurs modèles NLP avec comparaison des métriques.
 """
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from src.nlp.interfaces import NLPModel
 from src.nlp.eval.evaluate import evaluate_model
+from src.nlp.eval.prediction_cache import DEFAULT_PREDICTION_CACHE
+from src.common.dataset_cache import ColumnarDataset, DEFAULT_DATASET_CACHE_DIR, load_dataset
 from src.common.logging import setup_logging
+from src.common.parallel import get_mp_context, limit_cpu_threads, default_threads_per_worker
 
 logger = setup_logging(module="nlp.benchmark")
 
 
+def _evaluate_one(
+    model_name: str,
+    model: NLPModel,
+    config: Optional[Dict[str, Any]],
+    dataset: ColumnarDataset,
+    dataset_path: str | Path,
+    output_dir: Path,
+    save_individual_results: bool,
+    batch_size: Optional[int],
+    prediction_cache: Optional[str | Path]
+) -> Dict[str, Any]:
+    """
+    Évalue un modèle du benchmark et retourne son entrée de résultats.
+    
+    Returns:
+        Dictionnaire avec metrics, config, status (et error en cas d'échec), duration
+    """
+    logger.info(f"Evaluating model: {model_name}")
+    
+    # Dossier de sortie pour ce modèle
+    model_output_dir = output_dir / model_name if save_individual_results else output_dir / "temp" / model_name
+    model_output_dir.mkdir(parents=True, exist_ok=True)
+    
+    start = time.perf_counter()
+    try:
+        # Évalue le modèle
+        metrics = evaluate_model(
+            model=model,
+            dataset_path=dataset_path,
+            output_dir=model_output_dir,
+            save_predictions=save_individual_results,
+            batch_size=batch_size,
+            dataset=dataset,
+            prediction_cache=prediction_cache
+        )
+        
+        logger.info(f"✅ {model_name} - F1: {metrics.get('f1_mean', 0):.4f}")
+        
+        return {
+            "metrics": metrics,
+            "config": config,
+            "status": "success",
+            "duration": time.perf_counter() - start
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ {model_name} failed: {e}")
+        return {
+            "metrics": {},
+            "config": config,
+            "status": "error",
+            "error": str(e),
+            "duration": time.perf_counter() - start
+        }
+
+
+def _evaluate_in_worker(
+    model_name: str,
+    model_class: type,
+    model_config: dict,
+    config: Optional[Dict[str, Any]],
+    num_threads: int,
+    *args
+) -> Dict[str, Any]:
+    """Recrée le modèle dans un processus worker, avec son budget de threads, puis l'évalue."""
+    limit_cpu_threads(num_threads)
+    return _evaluate_one(model_name, model_class(model_config), config, *args)
+
+
 def benchmark_models(
     models: List[tuple[str, NLPModel, Optional[Dict[str, Any]]]],
     dataset_path: str | Path,
     output_dir: str | Path,
-    save_individual_results: bool = True
+    save_individual_results: bool = True,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    prediction_cache: Optional[str | Path] = DEFAULT_PREDICTION_CACHE,
+    dataset_cache_dir: Optional[str | Path] = DEFAULT_DATASET_CACHE_DIR
 ) -> Dict[str, Any]:
     """
     Compare plusieurs modèles NLP sur le même dataset.
     
+    Le dataset est chargé une seule fois (cache colonnaire). Avec `workers > 1`, les modèles sont
+    évalués en parallèle, chacun dans son propre processus (modèle recréé via
+    `model.__class__(model.config)`) avec une part des cœurs comme budget de
+    threads : la durée totale tend vers celle du modèle le plus lent.
+    
+    Les prédictions sont mises en cache par empreinte de modèle : relancer le
+    benchmark après avoir modifié un modèle ne réévalue que celui-ci.
+    
     Args:
         models: Liste de tuples (nom_modèle, modèle, config_dict)
         dataset_path: Chemin vers le dataset JSONL
         output_dir: Dossier de sortie pour les résultats
         save_individual_results: Sauvegarder les résultats individuels de chaque modèle
+        batch_size: Nombre de textes par appel au modèle (défaut: config de chaque modèle)
+        workers: Nombre de modèles évalués simultanément (défaut: nombre de modèles)
+        prediction_cache: Base SQLite du cache de prédictions (None pour le désactiver)
+        dataset_cache_dir: Dossier du cache colonnaire du dataset (None : JSONL relu sans cache)
     
     Returns:
         Dictionnaire avec les résultats comparatifs
@@ -34,42 +124,43 @@ def benchmark_models(
     output_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Starting benchmark of {len(models)} models on {dataset_path}")
+    start = time.perf_counter()
     
+    # Le dataset est lu une fois (cache colonnaire) et partagé par tous les modèles ;
+    # les workers le rouvrent en mémoire mappée au lieu d'en recevoir une copie
+    dataset = load_dataset(dataset_path, dataset_cache_dir)
+    common_args = (dataset, dataset_path, output_dir, save_individual_results, batch_size, prediction_cache)
+    
+    workers = min(workers or len(models), len(models))
     results = {}
     
-    # Évalue chaque modèle
-    for model_name, model, config in models:
-        logger.info(f"Evaluating model: {model_name}")
-        
-        # Dossier de sortie pour ce modèle
-        model_output_dir = output_dir / model_name if save_individual_results else output_dir / "temp"
-        model_output_dir.mkdir(parents=True, exist_ok=True)
-        
-        try:
-            # Évalue le modèle
-            metrics = evaluate_model(
-                model=model,
-                dataset_path=dataset_path,
-                output_dir=model_output_dir,
-                save_predictions=save_individual_results
-            )
-            
-            results[model_name] = {
-                "metrics": metrics,
-                "config": config,
-                "status": "success"
-            }
-            
-            logger.info(f"✅ {model_name} - F1: {metrics.get('f1_mean', 0):.4f}")
-            
-        except Exception as e:
-            logger.error(f"❌ {model_name} failed: {e}")
-            results[model_name] = {
-                "metrics": {},
-                "config": config,
-                "status": "error",
-                "error": str(e)
+    if workers > 1:
+        num_threads = default_threads_per_worker(workers)
+        logger.info(f"Evaluating {len(models)} models with {workers} worker processes ({num_threads} threads each)")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_mp_context()) as executor:
+            futures = {
+                model_name: executor.submit(
+                    _evaluate_in_worker, model_name, type(model), model.config, config, num_threads, *common_args
+                )
+                for model_name, model, config in models
             }
+            for model_name, model, config in models:
+                try:
+                    results[model_name] = futures[model_name].result()
+                except Exception as e:
+                    logger.error(f"❌ {model_name} failed: {e}")
+                    results[model_name] = {
+                        "metrics": {},
+                        "config": config,
+                        "status": "error",
+                        "error": str(e)
+                    }
+    else:
+        # Évalue chaque modèle
+        for model_name, model, config in models:
+            results[model_name] = _evaluate_one(model_name, model, config, *common_args)
+    
+    logger.info(f"All models evaluated in {time.perf_counter() - start:.1f}s")
     
     # Génère le rapport comparatif
     report_path = generate_comparative_report(
@@ -172,6 +263,7 @@ def generate_comparative_report(
 - **F1-Score**: {metrics.get('f1_mean', 0):.4f} ± {metrics.get('f1_std', 0):.4f}
 - **Precision**: {metrics.get('precision_mean', 0):.4f} ± {metrics.get('precision_std', 0):.4f}
 - **Recall**: {metrics.get('recall_mean', 0):.4f} ± {metrics.get('recall_std', 0):.4f}
+- **F1 micro / macro (par ville)**: {metrics.get('micro_f1', 0):.4f} / {metrics.get('macro_f1', 0):.4f}
 
 #### Précision par entité
 
@@ -185,6 +277,9 @@ def generate_comparative_report(
 
 """
         
+        if "duration" in result:
+            report += f"**Durée d'évaluation**: {result['duration']:.1f}s\n\n"
+        
         if config:
             report += f"""#### Configuration
 
@@ -3,31 +3,212 @@
 """
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from tqdm import tqdm
 from src.nlp.interfaces import NLPModel
-from src.nlp.eval.metrics import evaluate_nlp_result, aggregate_metrics
+from src.nlp.batching import length_buckets
+from src.common.types import NLPExtraction
+from src.nlp.eval.metrics import evaluate_nlp_result, aggregate_metrics, corpus_metrics
 from src.nlp.eval.report import save_report
-from src.common.io import read_jsonl, write_jsonl, write_csv
+from src.nlp.eval.prediction_cache import PredictionCache
+from src.common.io import write_jsonl, write_csv
+from src.common.dataset_cache import ColumnarDataset, ABSENT, DEFAULT_DATASET_CACHE_DIR, load_dataset
+from src.common.journal import EvalJournal, JOURNAL_FILENAME, sample_keys, run_fingerprint
 from src.common.logging import setup_logging
 
 logger = setup_logging(module="nlp.eval")
 
 
+def _score_sample(item: Dict[str, Any], text: str, result: NLPExtraction) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """
+    Évalue l'extraction d'un échantillon du dataset.
+    
+    Args:
+        item: Ligne du dataset (références origin/destination/is_valid)
+        text: Texte analysé
+        result: Extraction du modèle
+    
+    Returns:
+        Tuple (métriques, prédiction)
+    """
+    reference_origin = item.get("origin")
+    reference_destination = item.get("destination")
+    reference_is_valid = item.get("is_valid", True)
+    
+    # Évaluation
+    metrics = evaluate_nlp_result(
+        result,
+        reference_origin,
+        reference_destination,
+        reference_is_valid
+    )
+    
+    # Sauvegarde prédiction
+    prediction = {
+        "id": item.get("id", ""),
+        "text": text,
+        "reference_origin": reference_origin,
+        "reference_destination": reference_destination,
+        "reference_is_valid": reference_is_valid,
+        "predicted_origin": result.origin,
+        "predicted_destination": result.destination,
+        "predicted_is_valid": result.is_valid,
+        **metrics
+    }
+    
+    return metrics, prediction
+
+
+def _failed_sample(item: Dict[str, Any], text: str, error: Exception) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """Métriques nulles et prédiction d'erreur pour un échantillon en échec."""
+    sample_id = item.get("id", "")
+    logger.error(f"Failed to extract from text {sample_id}: {error}")
+    metrics = {
+        "precision": 0.0,
+        "recall": 0.0,
+        "f1": 0.0,
+        "origin_accuracy": 0.0,
+        "destination_accuracy": 0.0,
+        "validation_accuracy": 0.0
+    }
+    prediction = {
+        "id": sample_id,
+        "text": text,
+        "reference_origin": item.get("origin"),
+        "reference_destination": item.get("destination"),
+        "reference_is_valid": item.get("is_valid", True),
+        "error": str(error)
+    }
+    return metrics, prediction
+
+
+def _evaluate_sample(model: NLPModel, item: Dict[str, Any], text: str) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """
+    Extrait et évalue un échantillon du dataset.
+    
+    Args:
+        model: Modèle NLP initialisé
+        item: Ligne du dataset (références origin/destination/is_valid)
+        text: Texte à analyser
+    
+    Returns:
+        Tuple (métriques, prédiction)
+    """
+    try:
+        return _score_sample(item, text, model.extract(text))
+    except Exception as e:
+        return _failed_sample(item, text, e)
+
+
+def _evaluate_batch(
+    model: NLPModel,
+    samples: List[Tuple[Dict[str, Any], str]],
+    batch_size: int,
+    cache: Optional[PredictionCache] = None,
+    fingerprint: Optional[str] = None
+) -> List[Tuple[Dict[str, float], Dict[str, Any]]]:
+    """
+    Extrait et évalue un lot d'échantillons en un appel à `extract_batch`.
+    
+    Avec un cache de prédictions, seules les phrases absentes du cache sont
+    passées au modèle (initialisé à ce moment-là seulement), et leurs
+    extractions sont ajoutées au cache.
+    
+    Si le lot échoue, les échantillons sont repris un par un pour isoler l'erreur.
+    
+    Args:
+        model: Modèle NLP
+        samples: Tuples (ligne du dataset, texte)
+        batch_size: Taille de lot passée au modèle
+        cache: Cache de prédictions (optionnel)
+        fingerprint: Empreinte du modèle (clé du cache)
+    
+    Returns:
+        Liste de tuples (métriques, prédiction), dans l'ordre des entrées
+    """
+    texts = [text for _, text in samples]
+    try:
+        results = cache.get_many(fingerprint, texts) if cache is not None else {}
+        missing = list(dict.fromkeys(text for text in texts if text not in results))
+        if missing:
+            model.initialize()
+            extracted = dict(zip(missing, model.extract_batch(missing, batch_size=batch_size)))
+            if cache is not None:
+                cache.put_many(fingerprint, extracted)
+            results.update(extracted)
+        return [_score_sample(item, text, results[text]) for item, text in samples]
+    except Exception as e:
+        if len(samples) == 1:
+            return [_failed_sample(samples[0][0], samples[0][1], e)]
+        logger.warning(f"Batch extraction failed ({e}), retrying samples one by one")
+    
+    model.initialize()
+    return [_evaluate_sample(model, item, text) for item, text in samples]
+
+
+def _sample_text(dataset: ColumnarDataset, index: int) -> str:
+    """Texte d'une ligne du dataset (champ "sentence", sinon "transcript")."""
+    for name in ("sentence", "transcript"):
+        column = dataset.get(name)
+        if column is not None and column.state[index] != ABSENT:
+            return column[index] or ""
+    return ""
+
+
+def load_samples(dataset: ColumnarDataset) -> List[Tuple[str, int]]:
+    """
+    Liste les échantillons évaluables d'un dataset (les lignes sans texte sont ignorées).
+    
+    Args:
+        dataset: Dataset colonnaire (voir `load_dataset`)
+    
+    Returns:
+        Liste de tuples (clé de journal, position dans le dataset)
+    """
+    ids = dataset.get("id")
+    keys = sample_keys(ids.to_list() if ids is not None else [None] * len(dataset))
+    return [(key, i) for i, key in enumerate(keys) if _sample_text(dataset, i)]
+
+
 def evaluate_model(
     model: NLPModel,
     dataset_path: str | Path,
     output_dir: str | Path,
-    save_predictions: bool = True
+    save_predictions: bool = True,
+    resume: bool = False,
+    batch_size: Optional[int] = None,
+    dataset: Optional[ColumnarDataset] = None,
+    prediction_cache: Optional[str | Path] = None,
+    dataset_cache_dir: Optional[str | Path] = DEFAULT_DATASET_CACHE_DIR
 ) -> Dict[str, Any]:
     """
     Évalue un modèle NLP sur un dataset.
     
+    Chaque échantillon est ajouté au journal `predictions.journal.jsonl` dès
+    son évaluation. Avec `resume=True`, les échantillons déjà présents dans le
+    journal sont ignorés et les métriques sont recalculées à partir du journal.
+    
+    Les textes sont passés au modèle par lots (`extract_batch`), ce qui
+    amortit le coût fixe par appel des modèles spaCy / transformers ; les
+    lots regroupent des phrases de longueurs voisines (moins de padding).
+    
+    Le dataset est lu via le cache colonnaire (`dataset_cache_dir`) : seules
+    les lignes du lot en cours sont reconstruites en dictionnaires.
+    
+    Avec `prediction_cache`, les extractions sont mises en cache par
+    (empreinte du modèle, phrase) : seules les phrases jamais vues par ce
+    modèle, dans sa version actuelle, lui sont soumises.
+    
     Args:
         model: Modèle NLP à évaluer
         dataset_path: Chemin vers le fichier JSONL du dataset
         output_dir: Dossier de sortie pour les résultats
         save_predictions: Sauvegarder les prédictions
+        resume: Reprendre une évaluation interrompue à partir du journal
+        batch_size: Nombre de textes par appel au modèle (défaut: `batch_size` de la config du modèle, sinon 32)
+        dataset: Dataset déjà chargé par `load_dataset` (évite de rouvrir `dataset_path`)
+        prediction_cache: Chemin de la base SQLite du cache de prédictions (optionnel)
+        dataset_cache_dir: Dossier du cache colonnaire du dataset (None : JSONL relu sans cache)
     
     Returns:
         Dictionnaire avec les métriques agrégées
@@ -37,69 +218,65 @@ def evaluate_model(
     
     logger.info(f"Evaluating model {model.name} on {dataset_path}")
     
-    # Initialise le modèle
-    model.initialize()
-    
-    # Charge le dataset
-    metrics_list = []
-    predictions = []
+    # Charge le dataset (les lignes sans texte sont ignorées)
+    if dataset is None:
+        dataset = load_dataset(dataset_path, dataset_cache_dir)
+    samples = load_samples(dataset)
     
-    for item in tqdm(read_jsonl(dataset_path), desc="Evaluating"):
-        text = item.get("sentence", item.get("transcript", ""))
-        reference_origin = item.get("origin")
-        reference_destination = item.get("destination")
-        reference_is_valid = item.get("is_valid", True)
-        sample_id = item.get("id", "")
+    with EvalJournal(output_dir / JOURNAL_FILENAME, resume=resume, fingerprint=run_fingerprint(model, dataset_path)) as journal:
+        pending = [sample for sample in samples if journal.get(sample[0]) is None]
+        if len(pending) < len(samples):
+            logger.info(f"Skipping {len(samples) - len(pending)} samples already in journal")
+        
+        cache = PredictionCache(prediction_cache) if prediction_cache is not None else None
+        fingerprint = model.fingerprint() if cache is not None else None
+        if pending and cache is None:
+            # Initialise le modèle (avec un cache, seulement si une phrase n'y est pas)
+            model.initialize()
         
-        if not text:
-            continue
+        if batch_size is None:
+            batch_size = model.config.get("batch_size", 32)
+        batch_size = max(1, batch_size)
         
-        # Extraction
+        # Chaque lot est journalisé dès qu'il est évalué
         try:
-            result = model.extract(text)
-            
-            # Évaluation
-            metrics = evaluate_nlp_result(
-                result,
-                reference_origin,
-                reference_destination,
-                reference_is_valid
-            )
-            metrics_list.append(metrics)
-            
-            # Sauvegarde prédiction
-            predictions.append({
-                "id": sample_id,
-                "text": text,
-                "reference_origin": reference_origin,
-                "reference_destination": reference_destination,
-                "reference_is_valid": reference_is_valid,
-                "predicted_origin": result.origin,
-                "predicted_destination": result.destination,
-                "predicted_is_valid": result.is_valid,
-                **metrics
-            })
-            
-        except Exception as e:
-            logger.error(f"Failed to extract from text {sample_id}: {e}")
-            metrics_list.append({
-                "precision": 0.0,
-                "recall": 0.0,
-                "f1": 0.0,
-                "origin_accuracy": 0.0,
-                "destination_accuracy": 0.0,
-                "validation_accuracy": 0.0
-            })
-            predictions.append({
-                "id": sample_id,
-                "text": text,
-                "reference_origin": reference_origin,
-                "reference_destination": reference_destination,
-                "error": str(e)
-            })
+            with tqdm(total=len(pending), desc="Evaluating") as progress:
+                # Lots de phrases de longueurs voisines : moins de padding pour les modèles qui paddent par lot
+                lengths = [len(_sample_text(dataset, index)) for _, index in pending]
+                for batch_indices in length_buckets(lengths, batch_size):
+                    batch = [pending[i] for i in batch_indices]
+                    batch_samples = [(dataset.row(index), _sample_text(dataset, index)) for _, index in batch]
+                    batch_outcomes = _evaluate_batch(model, batch_samples, batch_size, cache, fingerprint)
+                    for (key, _), (metrics, prediction) in zip(batch, batch_outcomes):
+                        journal.append(key, metrics, prediction)
+                    progress.update(len(batch))
+        finally:
+            if cache is not None:
+                cache.close()
+        
+        # Reconstruit les résultats dans l'ordre du dataset à partir du journal
+        outcomes = [journal.get(key) for key, _ in samples]
+    
+    predictions = [prediction for _, prediction in outcomes]
     
     # Agrège les métriques
-    aggregated = aggregate_metrics(metrics_list)
+    aggregated = aggregate_metrics(metrics for metrics, _ in outcomes)
+    
+    # Métriques du corpus (micro / macro par ville) calculées sur les colonnes de prédictions
+    corpus, per_city = corpus_metrics(
+        [prediction.get("reference_origin") for prediction in predictions],
+        [prediction.get("predicted_origin") for prediction in predictions],
+        [prediction.get("reference_destination") for prediction in predictions],
+        [prediction.get("predicted_destination") for prediction in predictions],
+        [prediction.get("reference_is_valid") for prediction in predictions],
+        [prediction.get("predicted_is_valid") for prediction in predictions]
+    )
+    if predictions:
+        aggregated.update({
+            key: value for key, value in corpus.items()
+            if key.startswith(("micro_", "macro_", "total_"))
+        })
+    write_csv(output_dir / "per_city.csv", per_city)
     
     # Sauvegarde
     if save_predictions:
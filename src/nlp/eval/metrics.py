@@ -1,8 +1,21 @@
 """
 Métriques pour l'évaluation NLP.
+
+Deux niveaux :
+- par échantillon (`evaluate_nlp_result`), pour les prédictions détaillées ;
+- au niveau du corpus (`corpus_metrics`), calculé sur des tableaux : TP/FP/FN,
+  P/R/F1 micro et macro (par ville), précision par entité et de validation.
 """
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
 from src.common.types import NLPExtraction
+from src.common.stats import MetricsAggregator
+
+
+def normalize_entity(value: str | None) -> str | None:
+    """Normalise une entité pour la comparaison (casse et espaces ; None si vide)."""
+    return (value.lower().strip() or None) if value else None
 
 
 def calculate_precision_recall_f1(
@@ -130,25 +143,19 @@ def evaluate_nlp_result(
     Returns:
         Dictionnaire avec toutes les métriques
     """
+    # Chaque entité est normalisée une seule fois
+    true_origin = normalize_entity(reference_origin)
+    pred_origin = normalize_entity(result.origin)
+    true_destination = normalize_entity(reference_destination)
+    pred_destination = normalize_entity(result.destination)
+    
     metrics = {}
     
     # Métriques d'extraction
-    prf = calculate_precision_recall_f1(
-        reference_origin,
-        result.origin,
-        reference_destination,
-        result.destination
-    )
-    metrics.update(prf)
+    metrics.update(calculate_precision_recall_f1(true_origin, pred_origin, true_destination, pred_destination))
     
     # Précision par entité
-    entity_acc = calculate_entity_accuracy(
-        reference_origin,
-        result.origin,
-        reference_destination,
-        result.destination
-    )
-    metrics.update(entity_acc)
+    metrics.update(calculate_entity_accuracy(true_origin, pred_origin, true_destination, pred_destination))
     
     # Validation (is_valid)
     metrics["validation_accuracy"] = 1.0 if (result.is_valid == reference_is_valid) else 0.0
@@ -156,27 +163,218 @@ def evaluate_nlp_result(
     return metrics
 
 
-def aggregate_metrics(metrics_list: List[Dict[str, float]]) -> Dict[str, float]:
+def encode_entities(
+    *columns: Sequence[str | None],
+    reference_columns: Sequence[int] = ()
+) -> Tuple[List[np.ndarray], List[str]]:
     """
-    Agrège les métriques sur plusieurs échantillons.
+    Encode des colonnes d'entités en codes entiers partagés.
+    
+    Les valeurs sont factorisées par hachage (pandas), puis seules les valeurs
+    distinctes sont normalisées : le coût de normalisation ne dépend que du
+    nombre de villes, pas du nombre de phrases.
+    
+    Le nom d'un code est la graphie la plus fréquente dans les colonnes de
+    référence, sinon la plus fréquente dans toutes les colonnes.
     
     Args:
-        metrics_list: Liste de dictionnaires de métriques
+        *columns: Colonnes de noms d'entités (None ou "" pour une entité absente)
+        reference_columns: Positions des colonnes de référence parmi `columns`
     
     Returns:
-        Métriques agrégées (moyennes)
+        Tuple (codes par colonne, -1 pour une entité absente ; nom de chaque code)
     """
-    if not metrics_list:
-        return {}
+    lengths = [len(column) for column in columns]
+    values = np.concatenate([np.asarray(column, dtype=object) for column in columns])
+    # Valeurs absentes codées -1 (comportement par défaut de toutes les versions de pandas)
+    raw_codes, raw_uniques = pd.factorize(values)
+    
+    # Fréquence de chaque graphie, dans les références puis dans toutes les colonnes
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    counts = np.bincount(raw_codes[raw_codes >= 0], minlength=len(raw_uniques))
+    reference_counts = np.zeros(len(raw_uniques), dtype=np.int64)
+    for column in reference_columns:
+        column_codes = raw_codes[bounds[column]:bounds[column + 1]]
+        reference_counts += np.bincount(column_codes[column_codes >= 0], minlength=len(raw_uniques))
     
-    aggregated = {}
-    for key in metrics_list[0].keys():
-        values = [m[key] for m in metrics_list if key in m]
-        if values:
-            aggregated[f"{key}_mean"] = sum(values) / len(values)
-            aggregated[f"{key}_std"] = (
-                sum((x - aggregated[f"{key}_mean"]) ** 2 for x in values) / len(values)
-            ) ** 0.5
+    # Les variantes de casse / d'espaces d'une même ville fusionnent en un code
+    normalized = [normalize_entity(value) if isinstance(value, str) else None for value in raw_uniques]
+    spellings: List[int] = []
+    code_of: Dict[str, int] = {}
+    mapping = np.full(len(raw_uniques) + 1, -1, dtype=np.int64)  # dernière case : sentinelle NA
+    for raw_index, value in enumerate(normalized):
+        if value is None:
+            continue
+        if value not in code_of:
+            code_of[value] = len(spellings)
+            spellings.append(raw_index)
+        else:
+            best = spellings[code_of[value]]
+            if (reference_counts[raw_index], counts[raw_index]) > (reference_counts[best], counts[best]):
+                spellings[code_of[value]] = raw_index
+        mapping[raw_index] = code_of[value]
+    codes = mapping[raw_codes]
+    names = [raw_uniques[raw_index].strip() for raw_index in spellings]
     
-    return aggregated
+    return list(np.split(codes, bounds[1:-1])), names
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Division élément par élément, 0 là où le dénominateur est nul."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
 
+
+def _f1(precision: np.ndarray, recall: np.ndarray) -> np.ndarray:
+    return _safe_divide(2 * precision * recall, precision + recall)
+
+
+def corpus_metrics(
+    reference_origins: Sequence[str | None],
+    predicted_origins: Sequence[str | None],
+    reference_destinations: Sequence[str | None],
+    predicted_destinations: Sequence[str | None],
+    reference_valid: Optional[Sequence[bool | None]] = None,
+    predicted_valid: Optional[Sequence[bool | None]] = None
+) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+    """
+    Calcule les métriques NLP au niveau du corpus, en opérations vectorisées.
+    
+    Pour chaque emplacement (origine, destination) : une prédiction égale à la
+    référence est un TP ; une prédiction différente ou sans référence un FP ;
+    une référence non retrouvée un FN (mêmes règles que `calculate_precision_recall_f1`).
+    
+    - micro : P/R/F1 à partir des TP/FP/FN sommés sur le corpus ;
+    - macro : moyenne des P/R/F1 par ville (villes présentes en référence ou en prédiction) ;
+    - samples : moyenne des P/R/F1 par phrase (équivalent des `*_mean` par échantillon).
+    
+    Args:
+        reference_origins: Origines de référence
+        predicted_origins: Origines prédites
+        reference_destinations: Destinations de référence
+        predicted_destinations: Destinations prédites
+        reference_valid: Validité de référence (None = True)
+        predicted_valid: Validité prédite (None = inconnue, comptée fausse)
+    
+    Returns:
+        Tuple (métriques du corpus, détail par ville trié par support décroissant)
+    """
+    (ref_origin, pred_origin, ref_destination, pred_destination), names = encode_entities(
+        reference_origins, predicted_origins, reference_destinations, predicted_destinations,
+        reference_columns=(0, 2)
+    )
+    samples = len(ref_origin)
+    num_cities = len(names)
+    
+    tp = np.zeros(samples, dtype=np.int64)
+    fp = np.zeros(samples, dtype=np.int64)
+    fn = np.zeros(samples, dtype=np.int64)
+    city_tp = np.zeros(num_cities, dtype=np.int64)
+    city_fp = np.zeros(num_cities, dtype=np.int64)
+    city_fn = np.zeros(num_cities, dtype=np.int64)
+    accuracies = {}
+    
+    for slot, ref, pred in (("origin", ref_origin, pred_origin), ("destination", ref_destination, pred_destination)):
+        match = (ref >= 0) & (ref == pred)
+        false_positive = (pred >= 0) & ~match
+        false_negative = (ref >= 0) & ~match
+        tp += match
+        fp += false_positive
+        fn += false_negative
+        city_tp += np.bincount(ref[match], minlength=num_cities)
+        city_fp += np.bincount(pred[false_positive], minlength=num_cities)
+        city_fn += np.bincount(ref[false_negative], minlength=num_cities)
+        # Deux entités absentes comptent comme une extraction correcte
+        accuracies[slot] = ref == pred
+    
+    # Micro : comptes sommés sur le corpus
+    total_tp, total_fp, total_fn = int(tp.sum()), int(fp.sum()), int(fn.sum())
+    micro_precision = total_tp / (total_tp + total_fp) if total_tp + total_fp else 0.0
+    micro_recall = total_tp / (total_tp + total_fn) if total_tp + total_fn else 0.0
+    micro_f1 = 2 * micro_precision * micro_recall / (micro_precision + micro_recall) if micro_precision + micro_recall else 0.0
+    
+    # Par phrase
+    sample_precision = _safe_divide(tp, tp + fp)
+    sample_recall = _safe_divide(tp, tp + fn)
+    sample_f1 = _f1(sample_precision, sample_recall)
+    
+    # Macro : par ville
+    city_precision = _safe_divide(city_tp, city_tp + city_fp)
+    city_recall = _safe_divide(city_tp, city_tp + city_fn)
+    city_f1 = _f1(city_precision, city_recall)
+    seen = (city_tp + city_fp + city_fn) > 0
+    
+    # Validation (référence absente = demande valide)
+    if reference_valid is None:
+        reference_valid = [True] * samples
+    if predicted_valid is None:
+        predicted_valid = [None] * samples
+    ref_valid = np.array([1 if value is None or value else 0 for value in reference_valid], dtype=np.int8)
+    pred_valid = np.array([-1 if value is None else int(bool(value)) for value in predicted_valid], dtype=np.int8)
+    
+    def mean(values: np.ndarray) -> float:
+        return float(values.mean()) if len(values) else 0.0
+    
+    metrics = {
+        "num_samples": samples,
+        "total_tp": total_tp,
+        "total_fp": total_fp,
+        "total_fn": total_fn,
+        "micro_precision": micro_precision,
+        "micro_recall": micro_recall,
+        "micro_f1": micro_f1,
+        "macro_precision": mean(city_precision[seen]),
+        "macro_recall": mean(city_recall[seen]),
+        "macro_f1": mean(city_f1[seen]),
+        "samples_precision": mean(sample_precision),
+        "samples_recall": mean(sample_recall),
+        "samples_f1": mean(sample_f1),
+        "origin_accuracy": mean(accuracies["origin"]),
+        "destination_accuracy": mean(accuracies["destination"]),
+        "both_correct": mean(accuracies["origin"] & accuracies["destination"]),
+        "validation_accuracy": mean(ref_valid == pred_valid),
+    }
+    
+    support = city_tp + city_fn
+    order = np.lexsort((np.arange(num_cities), -support))
+    per_city = [
+        {
+            "city": names[index],
+            "support": int(support[index]),
+            "tp": int(city_tp[index]),
+            "fp": int(city_fp[index]),
+            "fn": int(city_fn[index]),
+            "precision": float(city_precision[index]),
+            "recall": float(city_recall[index]),
+            "f1": float(city_f1[index]),
+        }
+        for index in order
+        if seen[index]
+    ]
+    
+    return metrics, per_city
+
+
+def create_aggregator() -> MetricsAggregator:
+    """Crée un agrégateur en flux pour les métriques NLP (sans percentiles, voir aggregate_metrics)."""
+    return MetricsAggregator(quantiles=())
+
+
+def aggregate_metrics(metrics: Iterable[Dict[str, float]] | MetricsAggregator) -> Dict[str, float]:
+    """
+    Agrège les métriques sur plusieurs échantillons.
+    
+    Les métriques par échantillon sont des indicateurs 0/1 ou des ratios sur
+    deux entités au plus : leurs percentiles n'ont pas de sens et ne sont pas reportés.
+    
+    Args:
+        metrics: Métriques par échantillon, ou agrégateur déjà alimenté
+    
+    Returns:
+        Métriques agrégées : moyenne et écart-type par métrique
+    """
+    if not isinstance(metrics, MetricsAggregator):
+        metrics = create_aggregator().update(metrics)
+    
+    return metrics.result()
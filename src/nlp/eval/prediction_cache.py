@@ -0,0 +1,126 @@
+"""
+Cache des prédictions NLP, indexé par (empreinte du modèle, empreinte de la phrase).
+
+Stocké dans une base SQLite locale : relancer un benchmark après avoir
+modifié un seul modèle ne réévalue que ce modèle ; les phrases déjà vues
+par un modèle inchangé sont relues depuis le cache.
+"""
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.common.types import NLPExtraction
+
+DEFAULT_PREDICTION_CACHE = Path("data/cache/nlp_predictions.sqlite")
+
+# Limite du nombre de paramètres d'une requête SQLite
+_QUERY_CHUNK = 500
+
+
+def text_hash(text: str) -> str:
+    """Empreinte d'une phrase (clé du cache)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Cache persistant des extractions NLP.
+
+    Plusieurs processus peuvent lire et écrire la même base (journal WAL) ;
+    la connexion est ouverte à la première utilisation dans chaque processus.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_PREDICTION_CACHE):
+        """
+        Args:
+            path: Chemin du fichier SQLite
+        """
+        self.path = Path(path)
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "fingerprint TEXT NOT NULL, "
+                "text_hash TEXT NOT NULL, "
+                "result TEXT NOT NULL, "
+                "PRIMARY KEY (fingerprint, text_hash)) WITHOUT ROWID"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def get_many(self, fingerprint: str, texts: List[str]) -> Dict[str, NLPExtraction]:
+        """
+        Cherche les prédictions en cache d'un modèle.
+
+        Args:
+            fingerprint: Empreinte du modèle (voir NLPModel.fingerprint)
+            texts: Phrases recherchées
+
+        Returns:
+            Dictionnaire phrase → NLPExtraction (phrases trouvées uniquement)
+        """
+        by_hash = {text_hash(text): text for text in texts}
+        hashes = list(by_hash)
+        found = {}
+        for start in range(0, len(hashes), _QUERY_CHUNK):
+            chunk = hashes[start:start + _QUERY_CHUNK]
+            rows = self.connection.execute(
+                f"SELECT text_hash, result FROM predictions WHERE fingerprint = ? "
+                f"AND text_hash IN ({', '.join('?' * len(chunk))})",
+                [fingerprint, *chunk]
+            )
+            for digest, result in rows:
+                found[by_hash[digest]] = NLPExtraction(**json.loads(result))
+        return found
+
+    def put_many(self, fingerprint: str, results: Dict[str, NLPExtraction]):
+        """
+        Enregistre des prédictions d'un modèle.
+
+        Args:
+            fingerprint: Empreinte du modèle
+            results: Dictionnaire phrase → NLPExtraction
+        """
+        if not results:
+            return
+        rows = [
+            (fingerprint, text_hash(text), json.dumps(asdict(result), ensure_ascii=False, default=str))
+            for text, result in results.items()
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO predictions (fingerprint, text_hash, result) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def clear(self, fingerprint: Optional[str] = None):
+        """
+        Supprime des entrées du cache.
+
+        Args:
+            fingerprint: Empreinte du modèle à purger (None pour tout vider)
+        """
+        with self.connection:
+            if fingerprint is None:
+                self.connection.execute("DELETE FROM predictions")
+            else:
+                self.connection.execute("DELETE FROM predictions WHERE fingerprint = ?", (fingerprint,))
+
+    def close(self):
+        """Ferme la connexion."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __getstate__(self):
+        # La connexion n'est pas transmise : chaque processus ouvre la sienne
+        return {"path": self.path, "_connection": None}
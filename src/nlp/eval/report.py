@@ -58,6 +58,10 @@ def generate_markdown_report(
 - **Recall**: {detailed_metrics.get('recall_mean', 0):.4f} ± {detailed_metrics.get('recall_std', 0):.4f}
 - **F1-Score**: {detailed_metrics.get('f1_mean', 0):.4f} ± {detailed_metrics.get('f1_std', 0):.4f}
 
+### Corpus (micro / macro par ville)
+- **Micro** : P {detailed_metrics.get('micro_precision', 0):.4f}, R {detailed_metrics.get('micro_recall', 0):.4f}, F1 {detailed_metrics.get('micro_f1', 0):.4f} (TP {detailed_metrics.get('total_tp', 0)}, FP {detailed_metrics.get('total_fp', 0)}, FN {detailed_metrics.get('total_fn', 0)})
+- **Macro** : P {detailed_metrics.get('macro_precision', 0):.4f}, R {detailed_metrics.get('macro_recall', 0):.4f}, F1 {detailed_metrics.get('macro_f1', 0):.4f}
+
 ### Précision par entité
 - **Origine correcte**: {origin_correct}/{total_samples} ({origin_correct/total_samples*100:.1f}%)
 - **Destination correcte**: {dest_correct}/{total_samples} ({dest_correct/total_samples*100:.1f}%)
@@ -114,6 +118,7 @@ def generate_markdown_report(
 - `metrics.json`: Métriques agrégées au format JSON
 - `predictions.jsonl`: Toutes les prédictions avec métriques détaillées
 - `predictions.csv`: Même contenu en format CSV
+- `per_city.csv`: Precision, recall et F1 par ville (support, TP, FP, FN)
 - `report.md`: Ce rapport
 
 ---
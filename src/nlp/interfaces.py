@@ -1,9 +1,15 @@
 """
 Interfaces pour les modèles NLP.
 """
+import hashlib
+import inspect
+import json
+import sys
 from pathlib import Path
 from abc import ABC, abstractmethod
+from typing import Any, Dict, List
 from src.common.types import NLPExtraction
+from src.common.io import file_hash
 
 
 class NLPModel(ABC):
@@ -32,6 +38,25 @@ class NLPModel(ABC):
         """
         pass
     
+    def extract_batch(self, texts: List[str], batch_size: int = 32) -> List[NLPExtraction]:
+        """
+        Extrait l'origine et la destination de plusieurs textes.
+        
+        Par défaut, appelle `extract` sur chaque texte. Les modèles capables
+        de traitement par lots surchargent cette méthode (ex: `nlp.pipe` de
+        spaCy, avec `n_process` optionnel ; lots paddés pour un modèle
+        transformers, formés par longueur avec `src.nlp.batching.map_by_length`)
+        afin de ne payer qu'une fois le coût fixe par appel.
+        
+        Args:
+            texts: Textes à analyser
+            batch_size: Nombre maximal de textes par passe du modèle
+        
+        Returns:
+            Liste de NLPExtraction, dans l'ordre des textes
+        """
+        return [self.extract(text) for text in texts]
+    
     def initialize(self):
         """Initialise le modèle (chargement, etc.)."""
         if not self._initialized:
@@ -54,6 +79,105 @@ class NLPModel(ABC):
         # Par défaut, ne fait rien (pour les modèles qui ne nécessitent pas d'entraînement)
         pass
     
+    def fingerprint(self) -> str:
+        """
+        Empreinte de ce qui détermine les prédictions du modèle.
+        
+        Combine la classe, le code source des classes du modèle (règles,
+        prétraitements) et des modules `src.*` importés par leurs modules,
+        la config, l'identité des fichiers référencés par la config (clés en
+        `*_path` : poids, listes de villes...) et celle du modèle désigné par
+        `model_name` (version du package spaCy installé, ou révision et
+        fichiers du snapshot Hugging Face en cache). Sert de clé au cache de
+        prédictions : modifier l'un de ces éléments invalide les prédictions
+        en cache de ce modèle seulement.
+        
+        Returns:
+            Empreinte hexadécimale
+        """
+        description = {
+            "class": f"{type(self).__module__}.{type(self).__qualname__}",
+            "sources": self._source_hashes(),
+            "config": self.config,
+            "files": {
+                key: self._path_identity(value)
+                for key, value in sorted(self.config.items())
+                if key.endswith("_path") and value and Path(value).exists()
+            },
+            "model": self._model_identity(self.config.get("model_name")),
+        }
+        payload = json.dumps(description, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    
+    def _source_hashes(self) -> Dict[str, str]:
+        """
+        Empreintes des fichiers source des classes du modèle (hors classes de base
+        abstraites) et des modules `src.*` que leurs modules importent directement.
+        """
+        modules = {}
+        for cls in type(self).__mro__:
+            if cls in (NLPModel, ABC, object):
+                continue
+            module = sys.modules.get(cls.__module__)
+            if module is None or module.__name__ in modules:
+                continue
+            modules[module.__name__] = module
+            # Modules utilitaires du projet importés par le module du modèle
+            for value in vars(module).values():
+                name = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+                if isinstance(name, str) and name.startswith("src.") and name in sys.modules:
+                    modules.setdefault(name, sys.modules[name])
+        
+        hashes = {}
+        for name, module in sorted(modules.items()):
+            source_file = getattr(module, "__file__", None)
+            if source_file and source_file.endswith(".py"):
+                hashes[name] = file_hash(source_file)
+        return hashes
+    
+    @classmethod
+    def _model_identity(cls, model_name: Any) -> Any:
+        """
+        Identité d'un modèle désigné par son nom : version du package spaCy
+        installé, ou révision et fichiers du snapshot Hugging Face en cache
+        (None si le nom ne désigne ni l'un ni l'autre).
+        """
+        if not isinstance(model_name, str) or not model_name:
+            return None
+        if Path(model_name).exists():
+            return cls._path_identity(model_name)
+        
+        try:
+            import spacy.util
+            if spacy.util.is_package(model_name):
+                return {"spacy_package": spacy.util.get_package_version(model_name)}
+        except ImportError:
+            pass
+        
+        try:
+            from huggingface_hub import try_to_load_from_cache
+            config_file = try_to_load_from_cache(model_name, "config.json")
+            if isinstance(config_file, str):
+                snapshot = Path(config_file).parent
+                return {"revision": snapshot.name, "files": cls._path_identity(snapshot)}
+        except (ImportError, ValueError):
+            pass
+        return None
+    
+    @staticmethod
+    def _path_identity(path: str | Path) -> Any:
+        """
+        Identité d'un fichier (empreinte du contenu) ou d'un dossier de poids
+        (taille et mtime de chaque fichier, pour ne pas relire des centaines de Mo).
+        """
+        path = Path(path)
+        if path.is_file():
+            return file_hash(path)
+        return sorted(
+            (str(file.relative_to(path)), file.stat().st_size, file.stat().st_mtime_ns)
+            for file in path.rglob("*") if file.is_file()
+        )
+    
     @property
     def name(self) -> str:
         """Retourne le nom du modèle."""
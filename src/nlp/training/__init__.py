@@ -1,9 +1,10 @@
 """
 Module d'entraînement pour les modèles NLP.
 """
+from src.nlp.training.city_annotator import CityAnnotator
 from src.nlp.training.convert import convert_to_spacy_format
 from src.nlp.training.trainer import train_spacy_model
 
-__all__ = ["convert_to_spacy_format", "train_spacy_model"]
+__all__ = ["CityAnnotator", "convert_to_spacy_format", "train_spacy_model"]
 
 
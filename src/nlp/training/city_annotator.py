@@ -0,0 +1,184 @@
+"""
+Repérage des villes dans un texte par automate d'Aho-Corasick.
+
+L'automate est construit une fois à partir d'une liste de villes (gazetteer)
+puis trouve toutes les occurrences de toutes les villes en une seule passe
+linéaire sur la phrase. La comparaison ignore la casse, les accents, les
+tirets et les apostrophes ("saint etienne" trouve "Saint-Étienne"), et une
+occurrence doit être un mot entier ("Nice" n'est pas trouvé dans "Venice").
+
+Le texte est replié caractère par caractère (un caractère replié par
+caractère d'origine) : les positions trouvées sont directement celles du
+texte d'origine.
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Séparateurs assimilés à une espace dans les noms de villes
+_SEPARATORS = "-'’‐‑"
+
+# Table de repliement précalculée pour les alphabets latins (les autres caractères sont gardés tels quels)
+_FOLD_RANGE = 0x0250
+
+
+def _fold_char(char: str) -> str:
+    """Replie un caractère (minuscule, sans accent) en un seul caractère."""
+    if char in _SEPARATORS:
+        return " "
+    folded = "".join(
+        c for c in unicodedata.normalize("NFD", char.lower())
+        if unicodedata.category(c) != "Mn"
+    )
+    return folded if len(folded) == 1 else char
+
+
+_FOLD_TABLE = {
+    code: folded
+    for code in range(_FOLD_RANGE)
+    if (folded := _fold_char(chr(code))) != chr(code)
+}
+_FOLD_TABLE.update({ord(char): " " for char in _SEPARATORS})
+
+
+def fold_text(text: str) -> str:
+    """
+    Replie un texte pour la recherche (minuscules, sans accents, tirets/apostrophes → espaces).
+
+    Le résultat a la même longueur que le texte : les positions se correspondent.
+
+    Args:
+        text: Texte à replier
+
+    Returns:
+        Texte replié
+    """
+    folded = text.translate(_FOLD_TABLE)
+    if folded.isascii():
+        return folded
+    # Caractères hors de la table précalculée : repliés un par un
+    return "".join(char if ord(char) < _FOLD_RANGE else _fold_char(char) for char in folded)
+
+
+def city_key(name: str) -> str:
+    """Clé d'une ville : nom replié, espaces normalisés."""
+    return " ".join(fold_text(name).split())
+
+
+class CityAnnotator:
+    """
+    Automate d'Aho-Corasick sur les noms de villes repliés.
+
+    Utilisation :
+        annotator = CityAnnotator(["Paris", "Saint-Étienne", "Nice"])
+        annotator.find_all("De Paris à Saint Etienne")
+        # [(3, 8, "paris"), (11, 24, "saint etienne")]
+    """
+
+    def __init__(self, cities: Iterable[str]):
+        """
+        Args:
+            cities: Noms de villes (les variantes de casse/accents sont fusionnées)
+        """
+        # Nœud 0 = racine ; transitions, lien d'échec et clé reconnue par nœud
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]
+        # Nœud de sortie suivant sur la chaîne des liens d'échec (0 si aucun)
+        self._next_output: List[int] = [0]
+        self.keys = set()
+
+        for city in cities:
+            key = city_key(city) if city else ""
+            if key and key not in self.keys:
+                self.keys.add(key)
+                self._insert(key)
+        self._build_links()
+
+    def _insert(self, key: str):
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._next_output.append(0)
+            node = next_node
+        self._output[node] = key
+
+    def _build_links(self):
+        """Calcule les liens d'échec et de sortie (parcours en largeur)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._next_output[child] = target if self._output[target] is not None else self._next_output[target]
+                queue.append(child)
+
+    def _matches(self, folded: str) -> Iterable[Tuple[int, int, str]]:
+        """Toutes les occurrences (chevauchantes) des clés, en une passe sur le texte replié."""
+        goto, fail, output, next_output = self._goto, self._fail, self._output, self._next_output
+        node = 0
+        for position, char in enumerate(folded):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            match = node if output[node] is not None else next_output[node]
+            while match:
+                key = output[match]
+                yield position + 1 - len(key), position + 1, key
+                match = next_output[match]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """
+        Trouve les villes d'un texte (mots entiers, sans chevauchement).
+
+        À position de départ égale, la ville la plus longue l'emporte
+        ("Saint-Étienne" plutôt que "Saint") ; une occurrence qui en chevauche
+        une précédente est écartée.
+
+        Args:
+            text: Texte à analyser
+
+        Returns:
+            Liste de tuples (start, end, clé de la ville), triée par position
+        """
+        folded = fold_text(text)
+        length = len(folded)
+        candidates = [
+            (start, end, key)
+            for start, end, key in self._matches(folded)
+            if (start == 0 or not folded[start - 1].isalnum())
+            and (end == length or not folded[end].isalnum())
+        ]
+        candidates.sort(key=lambda span: (span[0], -span[1]))
+
+        spans = []
+        last_end = 0
+        for start, end, key in candidates:
+            if start >= last_end:
+                spans.append((start, end, key))
+                last_end = end
+        return spans
+
+    def find(self, text: str, city: str) -> List[Tuple[int, int]]:
+        """
+        Trouve les occurrences d'une ville donnée.
+
+        Args:
+            text: Texte à analyser
+            city: Nom de la ville (doit faire partie du gazetteer)
+
+        Returns:
+            Liste de tuples (start, end)
+        """
+        key = city_key(city) if city else ""
+        return [(start, end) for start, end, found in self.find_all(text) if found == key]
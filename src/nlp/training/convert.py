@@ -1,18 +1,50 @@
 """
 Conversion de datasets JSONL vers format spaCy pour l'entraînement.
+
+Deux sorties possibles :
+- `convert_to_spacy_format` : liste de tuples (text, annotations) en mémoire
+- `convert_to_docbin` : corpus binaire `.spacy` (DocBin) en cache sur disque,
+  indexé par l'empreinte du dataset source et du tokenizer ; les
+  entraînements suivants relisent directement les Doc déjà tokenisés et alignés.
 """
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Tuple
-from src.common.io import read_jsonl
+from typing import List, Dict, Iterable, Optional, Tuple
+
+try:
+    import spacy
+    from spacy.tokens import DocBin
+    SPACY_AVAILABLE = True
+except ImportError:
+    SPACY_AVAILABLE = False
+    spacy = None
+    DocBin = None
+
+from src.common.io import read_jsonl, file_hash
 from src.common.logging import setup_logging
+from src.nlp.training.city_annotator import CityAnnotator, city_key
 
 logger = setup_logging(module="nlp.training")
 
+DEFAULT_SPACY_CORPUS_DIR = Path("data/cache/spacy_corpus")
+DEFAULT_SHARD_SIZE = 2000
+
+# Version du format du corpus (à incrémenter si la conversion change)
+CORPUS_FORMAT_VERSION = 1
+
 
 def find_city_in_text(text: str, city: str) -> List[Tuple[int, int]]:
     """
     Trouve toutes les occurrences d'une ville dans le texte.
     
+    Mots entiers uniquement, sans tenir compte de la casse ni des accents
+    ("Nice" n'est pas trouvé dans "Venice"). Pour annoter tout un dataset,
+    construire plutôt un CityAnnotator une seule fois (voir convert_to_spacy_format).
+    
     Args:
         text: Texte à analyser
         city: Nom de la ville à chercher
@@ -22,25 +54,13 @@ def find_city_in_text(text: str, city: str) -> List[Tuple[int, int]]:
     """
     if not city:
         return []
-    
-    positions = []
-    text_lower = text.lower()
-    city_lower = city.lower()
-    
-    start = 0
-    while True:
-        pos = text_lower.find(city_lower, start)
-        if pos == -1:
-            break
-        positions.append((pos, pos + len(city)))
-        start = pos + 1
-    
-    return positions
+    return CityAnnotator([city]).find(text, city)
 
 
 def convert_to_spacy_format(
     dataset_path: str | Path,
-    output_path: str | Path = None
+    output_path: str | Path = None,
+    gazetteer: Optional[Iterable[str]] = None
 ) -> List[Tuple[str, Dict]]:
     """
     Convertit un dataset JSONL en format spaCy pour l'entraînement.
@@ -53,9 +73,14 @@ def convert_to_spacy_format(
         ...
     ]
     
+    Les villes sont repérées par un automate construit une fois pour tout le
+    dataset (une passe par phrase, quel que soit le nombre de villes).
+    
     Args:
         dataset_path: Chemin vers le fichier JSONL
         output_path: Chemin de sortie (optionnel, pour sauvegarder)
+        gazetteer: Villes supplémentaires à reconnaître, en plus des origines et destinations
+            du dataset (une ville plus longue l'emporte : "Saint-Étienne" plutôt que "Saint")
     
     Returns:
         Liste de tuples (text, annotations) au format spaCy
@@ -65,7 +90,17 @@ def convert_to_spacy_format(
     
     logger.info(f"Converting {dataset_path} to spaCy format...")
     
-    for item in read_jsonl(dataset_path):
+    items = list(read_jsonl(dataset_path))
+    cities = [
+        city
+        for item in items
+        for city in (item.get("origin"), item.get("destination"))
+        if city
+    ]
+    annotator = CityAnnotator([*cities, *(gazetteer or [])])
+    logger.info(f"City automaton built from {len(annotator.keys)} cities")
+    
+    for item in items:
         text = item.get("sentence", item.get("transcript", ""))
         origin = item.get("origin")
         destination = item.get("destination")
@@ -73,21 +108,27 @@ def convert_to_spacy_format(
         if not text:
             continue
         
+        # Toutes les villes de la phrase, en une passe
+        spans = annotator.find_all(text)
+        origin_key = city_key(origin) if origin else None
+        destination_key = city_key(destination) if destination else None
+        
         entities = []
         
         # Trouve les positions de l'origine
-        if origin:
-            origin_positions = find_city_in_text(text, origin)
-            for start, end in origin_positions:
-                entities.append((start, end, "ORIGIN"))
+        if origin_key:
+            for start, end, key in spans:
+                if key == origin_key:
+                    entities.append((start, end, "ORIGIN"))
         
         # Trouve les positions de la destination
-        if destination:
-            dest_positions = find_city_in_text(text, destination)
-            for start, end in dest_positions:
+        if destination_key:
+            for start, end, key in spans:
                 # Évite les doublons si origine et destination sont la même ville
-                if not any(start == orig_start and end == orig_end 
-                          for orig_start, orig_end, _ in entities):
+                if key == destination_key and not any(
+                    start == orig_start and end == orig_end
+                    for orig_start, orig_end, _ in entities
+                ):
                     entities.append((start, end, "DESTINATION"))
         
         # Trie les entités par position (spaCy le requiert)
@@ -116,7 +157,6 @@ def convert_to_spacy_format(
     
     # Sauvegarde si demandé
     if output_path:
-        import json
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -126,3 +166,128 @@ def convert_to_spacy_format(
     return training_data
 
 
+def tokenizer_fingerprint(nlp) -> str:
+    """
+    Identité du tokenizer d'un pipeline spaCy (version de spaCy, langue, modèle de base).
+    
+    Args:
+        nlp: Pipeline spaCy
+    
+    Returns:
+        Chaîne identifiant le tokenizer
+    """
+    meta = nlp.meta
+    return f"spacy-{spacy.__version__}:{nlp.lang}:{meta.get('name')}-{meta.get('version')}"
+
+
+def spacy_corpus_path(
+    dataset_path: str | Path,
+    nlp,
+    cache_dir: str | Path = DEFAULT_SPACY_CORPUS_DIR,
+    gazetteer: Optional[Iterable[str]] = None
+) -> Path:
+    """
+    Dossier du corpus DocBin d'un dataset dans le cache.
+    
+    Args:
+        dataset_path: Chemin vers le fichier JSONL
+        nlp: Pipeline spaCy dont le tokenizer produit les Doc
+        cache_dir: Dossier du cache
+        gazetteer: Villes supplémentaires passées à la conversion
+    
+    Returns:
+        Chemin `<cache_dir>/<empreinte>`
+    """
+    key = [
+        str(CORPUS_FORMAT_VERSION),
+        file_hash(dataset_path),
+        tokenizer_fingerprint(nlp),
+        *sorted(set(gazetteer or []))
+    ]
+    digest = hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest()
+    return Path(cache_dir) / digest
+
+
+def convert_to_docbin(
+    dataset_path: str | Path,
+    nlp,
+    cache_dir: str | Path = DEFAULT_SPACY_CORPUS_DIR,
+    shard_size: int = DEFAULT_SHARD_SIZE,
+    gazetteer: Optional[Iterable[str]] = None
+) -> Path:
+    """
+    Convertit un dataset JSONL en corpus spaCy binaire (fichiers `.spacy`), avec cache.
+    
+    Les Doc sont tokenisés par `nlp` et leurs entités alignées sur les tokens
+    une seule fois ; le corpus est découpé en shards de `shard_size` phrases
+    (`shard-00000.spacy`, ...) pour pouvoir être lu en flux. Si le corpus du
+    même dataset (même contenu, même tokenizer) existe déjà, il est réutilisé tel quel.
+    
+    Args:
+        dataset_path: Chemin vers le fichier JSONL
+        nlp: Pipeline spaCy (seul le tokenizer est utilisé)
+        cache_dir: Dossier du cache
+        shard_size: Nombre de phrases par fichier `.spacy`
+        gazetteer: Villes supplémentaires (voir convert_to_spacy_format)
+    
+    Returns:
+        Dossier du corpus (contient les shards et `meta.json`)
+    """
+    if not SPACY_AVAILABLE:
+        raise ImportError("spacy is required. Install with: pip install spacy")
+    
+    gazetteer = list(gazetteer) if gazetteer is not None else None
+    corpus_path = spacy_corpus_path(dataset_path, nlp, cache_dir, gazetteer)
+    if (corpus_path / "meta.json").exists():
+        logger.info(f"Using cached spaCy corpus {corpus_path} for {dataset_path}")
+        return corpus_path
+    
+    training_data = convert_to_spacy_format(dataset_path, gazetteer=gazetteer)
+    
+    # Écriture dans un dossier temporaire puis renommage (pas de corpus partiel en cache)
+    corpus_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(tempfile.mkdtemp(prefix=".tmp-", dir=corpus_path.parent))
+    try:
+        misaligned = 0
+        shards = []
+        for shard_start in range(0, len(training_data), shard_size):
+            doc_bin = DocBin(store_user_data=False)
+            for text, annotations in training_data[shard_start:shard_start + shard_size]:
+                doc = nlp.make_doc(text)
+                spans = []
+                for start, end, label in annotations["entities"]:
+                    span = doc.char_span(start, end, label=label)
+                    if span is None:
+                        misaligned += 1
+                        continue
+                    spans.append(span)
+                doc.ents = spans
+                doc_bin.add(doc)
+            shard_name = f"shard-{len(shards):05d}.spacy"
+            doc_bin.to_disk(tmp_path / shard_name)
+            shards.append(shard_name)
+        
+        if misaligned:
+            logger.warning(f"{misaligned} entities not aligned with token boundaries were dropped")
+        
+        with open(tmp_path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "version": CORPUS_FORMAT_VERSION,
+                "source": str(dataset_path),
+                "tokenizer": tokenizer_fingerprint(nlp),
+                "num_docs": len(training_data),
+                "shards": shards,
+                "misaligned_entities": misaligned
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, corpus_path)
+    except OSError:
+        # Un autre processus a écrit le même corpus entre-temps
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not (corpus_path / "meta.json").exists():
+            raise
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    
+    logger.info(f"spaCy corpus written to {corpus_path} ({len(training_data)} docs)")
+    return corpus_path
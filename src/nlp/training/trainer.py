@@ -2,11 +2,12 @@
 Entraînement (fine-tuning) de modèles NLP avec spaCy.
 """
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional
+from typing import Iterator, List, Tuple, Dict, Optional
 import random
 
 try:
     import spacy
+    from spacy.tokens import Doc, DocBin
     from spacy.training import Example
     from spacy.util import minibatch, compounding
     SPACY_AVAILABLE = True
@@ -14,38 +15,114 @@ except ImportError:
     SPACY_AVAILABLE = False
     spacy = None
 
-from src.nlp.training.convert import convert_to_spacy_format
+from src.nlp.training.convert import convert_to_docbin, DEFAULT_SPACY_CORPUS_DIR
 from src.common.logging import setup_logging
 
 logger = setup_logging(module="nlp.training")
 
+# Données d'entraînement : tuples (text, annotations), dataset JSONL, ou corpus `.spacy` (fichier ou dossier de shards)
+TrainingData = List[Tuple[str, Dict]] | str | Path
+
+
+def load_spacy_corpus(corpus_path: str | Path, nlp, shuffle: bool = False) -> Iterator["Example"]:
+    """
+    Lit un corpus DocBin shard par shard et produit des Example.
+    
+    Les Doc de référence sont déjà tokenisés et annotés : le Doc prédit est
+    reconstruit à partir de leurs tokens, sans repasser par le tokenizer ni
+    par l'alignement des offsets. Un seul shard est en mémoire à la fois.
+    
+    Args:
+        corpus_path: Fichier `.spacy` ou dossier de shards (voir convert_to_docbin)
+        nlp: Pipeline spaCy (vocabulaire partagé)
+        shuffle: Mélanger l'ordre des shards et des Doc dans chaque shard
+    
+    Yields:
+        Example (prédit vierge, référence annotée)
+    """
+    corpus_path = Path(corpus_path)
+    shards = sorted(corpus_path.glob("*.spacy")) if corpus_path.is_dir() else [corpus_path]
+    if shuffle:
+        random.shuffle(shards)
+    for shard in shards:
+        references = list(DocBin().from_disk(shard).get_docs(nlp.vocab))
+        if shuffle:
+            random.shuffle(references)
+        for reference in references:
+            predicted = Doc(
+                nlp.vocab,
+                words=[token.text for token in reference],
+                spaces=[bool(token.whitespace_) for token in reference]
+            )
+            yield Example(predicted, reference)
+
+
+def _corpus_source(nlp, data: TrainingData, cache_dir: str | Path) -> Optional[Path]:
+    """Chemin du corpus `.spacy` des données (converti si c'est un JSONL), None pour des tuples en mémoire."""
+    if not isinstance(data, (str, Path)):
+        return None
+    data = Path(data)
+    if data.suffix == ".jsonl":
+        return convert_to_docbin(data, nlp, cache_dir=cache_dir)
+    return data
+
+
+def _load_examples(nlp, data: TrainingData, cache_dir: str | Path) -> List["Example"]:
+    """Charge toutes les données sous forme d'Example."""
+    corpus_path = _corpus_source(nlp, data, cache_dir)
+    if corpus_path is not None:
+        return list(load_spacy_corpus(corpus_path, nlp))
+    return [
+        Example.from_dict(nlp.make_doc(text), annotations)
+        for text, annotations in data
+    ]
+
 
 def train_spacy_model(
     base_model_name: str,
-    train_data: List[Tuple[str, Dict]],
+    train_data: TrainingData,
     output_dir: str | Path,
     n_iter: int = 20,
     dropout: float = 0.1,
-    valid_data: Optional[List[Tuple[str, Dict]]] = None,
-    labels: List[str] = None
+    valid_data: Optional[TrainingData] = None,
+    labels: List[str] = None,
+    stream: bool = False,
+    corpus_cache_dir: str | Path = DEFAULT_SPACY_CORPUS_DIR,
+    eval_frequency: int = 5,
+    patience: Optional[int] = None
 ) -> Path:
     """
     Entraîne (fine-tune) un modèle spaCy pour l'extraction d'origine/destination.
     
+    Avec des données de validation, le modèle est évalué toutes les
+    `eval_frequency` itérations (et à la dernière) ; seul le meilleur état
+    (F-score NER) est conservé puis sauvegardé, et l'entraînement s'arrête
+    après `patience` évaluations sans amélioration.
+    
     Args:
         base_model_name: Nom du modèle spaCy de base (ex: "fr_core_news_md")
-        train_data: Données d'entraînement au format spaCy
+        train_data: Données d'entraînement : tuples au format spaCy, dataset JSONL
+            (converti une fois en corpus `.spacy` mis en cache) ou corpus `.spacy`
         output_dir: Dossier où sauvegarder le modèle entraîné
         n_iter: Nombre d'itérations d'entraînement
         dropout: Taux de dropout
-        valid_data: Données de validation (optionnel)
+        valid_data: Données de validation (optionnel, mêmes formats que train_data)
         labels: Labels d'entités à entraîner (défaut: ["ORIGIN", "DESTINATION"])
+        stream: Lire le corpus d'entraînement shard par shard à chaque itération
+            au lieu de le garder en mémoire (données sur disque uniquement)
+        corpus_cache_dir: Dossier du cache des corpus `.spacy`
+        eval_frequency: Évaluer sur la validation toutes les N itérations
+        patience: Nombre d'évaluations sans amélioration avant l'arrêt (None: jamais d'arrêt anticipé)
     
     Returns:
         Chemin vers le modèle entraîné
     """
     if not SPACY_AVAILABLE:
         raise ImportError("spacy is required. Install with: pip install spacy")
+    if eval_frequency < 1:
+        raise ValueError(f"eval_frequency must be at least 1, got {eval_frequency}")
+    if patience is not None and patience < 1:
+        raise ValueError(f"patience must be at least 1, got {patience}")
     
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -67,13 +144,23 @@ def train_spacy_model(
             logger.info(f"Added label: {label}")
     
     # Prépare les exemples d'entraînement
-    examples = []
-    for text, annotations in train_data:
-        doc = nlp.make_doc(text)
-        example = Example.from_dict(doc, annotations)
-        examples.append(example)
+    train_corpus = _corpus_source(nlp, train_data, corpus_cache_dir) if stream else None
+    if train_corpus is not None:
+        examples = None
+        logger.info(f"Streaming training examples from {train_corpus}")
+    else:
+        examples = _load_examples(nlp, train_data, corpus_cache_dir)
+        logger.info(f"Prepared {len(examples)} training examples")
+    
+    # Exemples de validation, construits une seule fois
+    valid_examples = _load_examples(nlp, valid_data, corpus_cache_dir) if valid_data else None
+    if valid_examples is not None:
+        logger.info(f"Prepared {len(valid_examples)} validation examples")
     
-    logger.info(f"Prepared {len(examples)} training examples")
+    best_score = None
+    best_iteration = None
+    best_weights = None
+    evals_without_improvement = 0
     
     # Désactive les autres composants pendant l'entraînement
     other_pipes = [pipe for pipe in nlp.pipe_names if pipe != "ner"]
@@ -87,29 +174,50 @@ def train_spacy_model(
         nlp.begin_training()
         
         for itn in range(n_iter):
-            random.shuffle(examples)
+            if train_corpus is not None:
+                epoch_examples = load_spacy_corpus(train_corpus, nlp, shuffle=True)
+            else:
+                random.shuffle(examples)
+                epoch_examples = examples
             losses = {}
             
             # Mini-batches
-            batches = minibatch(examples, size=compounding(4.0, 32.0, 1.001))
+            batches = minibatch(epoch_examples, size=compounding(4.0, 32.0, 1.001))
             for batch in batches:
                 nlp.update(batch, drop=dropout, losses=losses)
             
             # Log des métriques
-            if valid_data and (itn + 1) % 5 == 0:
+            if valid_examples is not None and ((itn + 1) % eval_frequency == 0 or itn + 1 == n_iter):
                 # Évaluation sur validation
-                valid_examples = [
-                    Example.from_dict(nlp.make_doc(text), ann)
-                    for text, ann in valid_data
-                ]
                 scores = nlp.evaluate(valid_examples)
+                score = scores.get("ents_f") or 0.0
                 logger.info(f"Iteration {itn + 1}/{n_iter} - Loss: {losses.get('ner', 0):.4f} - "
                           f"NER P: {scores.get('ents_p', 0):.4f} - "
                           f"NER R: {scores.get('ents_r', 0):.4f} - "
-                          f"NER F: {scores.get('ents_f', 0):.4f}")
+                          f"NER F: {score:.4f}")
+                
+                # Garde en mémoire les poids du meilleur NER (un seul modèle écrit sur disque à la fin)
+                if best_score is None or score > best_score:
+                    best_score = score
+                    best_iteration = itn + 1
+                    best_weights = nlp.get_pipe("ner").to_bytes()
+                    evals_without_improvement = 0
+                else:
+                    evals_without_improvement += 1
+                    if patience is not None and evals_without_improvement >= patience:
+                        logger.info(
+                            f"Early stopping at iteration {itn + 1}: "
+                            f"no improvement for {evals_without_improvement} evaluations"
+                        )
+                        break
             else:
                 logger.info(f"Iteration {itn + 1}/{n_iter} - Loss: {losses.get('ner', 0):.4f}")
     
+    # Restaure le meilleur état évalué
+    if best_weights is not None:
+        nlp.get_pipe("ner").from_bytes(best_weights)
+        logger.info(f"Keeping best model from iteration {best_iteration} (NER F: {best_score:.4f})")
+    
     # Sauvegarde le modèle
     model_path = output_dir / "model"
     nlp.to_disk(model_path)
@@ -3,13 +3,18 @@ Entraînement (fine-tuning) de modèles Transformers pour NER.
 """
 from pathlib import Path
 from typing import List, Tuple, Dict, Optional
+import hashlib
 import json
+import os
+import shutil
+import tempfile
 
 try:
     from transformers import (
         AutoTokenizer, AutoModelForTokenClassification,
         TrainingArguments, Trainer, DataCollatorForTokenClassification
     )
+    from transformers.trainer_pt_utils import LengthGroupedSampler
     from datasets import Dataset
     import torch
     TRANSFORMERS_AVAILABLE = True
@@ -20,6 +25,7 @@ except ImportError:
     TrainingArguments = None
     Trainer = None
     DataCollatorForTokenClassification = None
+    LengthGroupedSampler = None
     Dataset = None
     torch = None
 
@@ -28,52 +34,233 @@ from src.common.logging import setup_logging
 logger = setup_logging(module="nlp.training.transformers")
 
 
+# Mapping des labels BIO
+LABEL_TO_ID = {"O": 0, "B-ORIGIN": 1, "I-ORIGIN": 2, "B-DESTINATION": 3, "I-DESTINATION": 4}
+
+DEFAULT_TOKENIZED_CACHE_DIR = Path("data/cache/transformers_ner")
+
+# Version du prétraitement (à incrémenter si la tokenisation ou l'alignement change)
+PREPROCESSING_VERSION = 2
+
+
 def convert_to_ner_format(spacy_data: List[Tuple[str, Dict]]) -> List[Dict]:
     """
     Convertit les données spaCy au format NER pour Transformers.
     
+    Les entités restent en offsets de caractères : l'alignement sur les
+    tokens est fait par `tokenize_and_align_labels`, avec les offsets du tokenizer.
+    
     Args:
         spacy_data: Liste de tuples (text, annotations) au format spaCy
     
     Returns:
-        Liste de dictionnaires au format Transformers NER
+        Liste de dictionnaires (text, entity_starts, entity_ends, entity_labels)
     """
     ner_data = []
     
     for text, annotations in spacy_data:
-        entities = annotations.get("entities", [])
-        
-        # Crée les labels BIO
-        tokens = text.split()
-        labels = ["O"] * len(tokens)
-        
-        for start, end, label in entities:
-            # Trouve les tokens correspondants
-            char_to_token = {}
-            char_pos = 0
-            for i, token in enumerate(tokens):
-                for j in range(len(token)):
-                    char_to_token[char_pos + j] = i
-                char_pos += len(token) + 1  # +1 pour l'espace
-            
-            # Marque les tokens
-            start_token = char_to_token.get(start, 0)
-            end_token = char_to_token.get(end, len(tokens) - 1)
-            
-            if start_token < len(labels):
-                labels[start_token] = f"B-{label}"
-                for i in range(start_token + 1, min(end_token + 1, len(labels))):
-                    labels[i] = f"I-{label}"
-        
+        entities = sorted(annotations.get("entities", []))
         ner_data.append({
-            "tokens": tokens,
-            "ner_tags": labels,
-            "text": text
+            "text": text,
+            "entity_starts": [start for start, _, _ in entities],
+            "entity_ends": [end for _, end, _ in entities],
+            "entity_labels": [label for _, _, label in entities]
         })
     
     return ner_data
 
 
+def align_labels(
+    offsets: List[Tuple[int, int]],
+    word_ids: List[Optional[int]],
+    entities: List[Tuple[int, int, str]],
+    label_to_id: Dict[str, int] = LABEL_TO_ID
+) -> List[int]:
+    """
+    Calcule les labels BIO des tokens d'une phrase à partir des offsets du tokenizer.
+    
+    Chaque mot (au sens du pré-tokenizer) couvre l'union des offsets de ses
+    tokens ; son premier token reçoit le label de l'entité qu'il chevauche
+    (B- pour le premier mot de l'entité, I- ensuite), les autres tokens et
+    les tokens spéciaux reçoivent -100 (ignorés par la loss).
+    
+    Args:
+        offsets: Offsets (start, end) de chaque token dans le texte
+        word_ids: Indice du mot de chaque token (None pour les tokens spéciaux)
+        entities: Entités (start, end, label) triées et sans chevauchement
+        label_to_id: Mapping label BIO → identifiant
+    
+    Returns:
+        Identifiants de labels, un par token
+    """
+    # Étendue de chaque mot dans le texte
+    word_spans = {}
+    for (start, end), word in zip(offsets, word_ids):
+        if word is None or start == end:
+            continue
+        span = word_spans.get(word)
+        word_spans[word] = (start, end) if span is None else (min(span[0], start), max(span[1], end))
+    
+    label_ids = []
+    previous_word = None
+    entity_index = 0
+    labeled_entity = None
+    for word in word_ids:
+        if word is None or word == previous_word or word not in word_spans:
+            label_ids.append(-100)
+            previous_word = word
+            continue
+        previous_word = word
+        word_start, word_end = word_spans[word]
+        
+        # Les mots et les entités sont dans l'ordre du texte : un seul parcours
+        while entity_index < len(entities) and entities[entity_index][1] <= word_start:
+            entity_index += 1
+        if entity_index < len(entities) and entities[entity_index][0] < word_end:
+            prefix = "I" if labeled_entity == entity_index else "B"
+            labeled_entity = entity_index
+            label_ids.append(label_to_id.get(f"{prefix}-{entities[entity_index][2]}", 0))
+        else:
+            label_ids.append(label_to_id["O"])
+    
+    return label_ids
+
+
+def tokenize_and_align_labels(batch: Dict[str, List], tokenizer, label_to_id: Dict[str, int] = LABEL_TO_ID) -> Dict[str, List]:
+    """
+    Tokenise un batch de phrases et aligne les labels (fonction pour `Dataset.map(batched=True)`).
+    
+    Les séquences ne sont pas paddées ici : le padding est fait au moment de
+    former chaque batch d'entraînement (DataCollatorForTokenClassification),
+    à la longueur de sa plus longue phrase. La colonne `length` sert au
+    regroupement par longueur (voir LengthGroupedTrainer).
+    
+    Args:
+        batch: Colonnes text, entity_starts, entity_ends, entity_labels
+        tokenizer: Tokenizer rapide (offsets requis)
+        label_to_id: Mapping label BIO → identifiant
+    
+    Returns:
+        Entrées tokenisées avec les colonnes labels et length
+    """
+    tokenized = tokenizer(
+        batch["text"],
+        truncation=True,
+        return_offsets_mapping=True
+    )
+    
+    labels = []
+    for i, offsets in enumerate(tokenized["offset_mapping"]):
+        entities = list(zip(batch["entity_starts"][i], batch["entity_ends"][i], batch["entity_labels"][i]))
+        labels.append(align_labels(offsets, tokenized.word_ids(batch_index=i), entities, label_to_id))
+    
+    tokenized.pop("offset_mapping")
+    tokenized["labels"] = labels
+    tokenized["length"] = [len(input_ids) for input_ids in tokenized["input_ids"]]
+    return tokenized
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """
+    Empreinte d'un tokenizer rapide (vocabulaire, normalisation, pré-tokenisation, longueur maximale).
+    
+    Args:
+        tokenizer: Tokenizer rapide Transformers
+    
+    Returns:
+        Empreinte hexadécimale
+    """
+    digest = hashlib.sha1()
+    digest.update(type(tokenizer).__name__.encode("utf-8"))
+    digest.update(str(tokenizer.model_max_length).encode("utf-8"))
+    # Les réglages de troncature/padding du backend changent à chaque appel : exclus de l'empreinte
+    backend = json.loads(tokenizer.backend_tokenizer.to_str())
+    backend.pop("truncation", None)
+    backend.pop("padding", None)
+    digest.update(json.dumps(backend, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def preprocess_ner_dataset(
+    spacy_data: List[Tuple[str, Dict]],
+    tokenizer,
+    cache_dir: Optional[str | Path] = DEFAULT_TOKENIZED_CACHE_DIR,
+    label_to_id: Dict[str, int] = LABEL_TO_ID
+) -> "Dataset":
+    """
+    Tokenise et aligne des données d'entraînement, avec cache Arrow sur disque.
+    
+    Le cache est indexé par l'empreinte des données, du tokenizer et du
+    mapping de labels : relancer un entraînement sur les mêmes données relit
+    directement le dataset tokenisé.
+    
+    Args:
+        spacy_data: Liste de tuples (text, annotations) au format spaCy
+        tokenizer: Tokenizer rapide
+        cache_dir: Dossier du cache (None pour ne rien écrire sur disque)
+        label_to_id: Mapping label BIO → identifiant
+    
+    Returns:
+        Dataset (input_ids, attention_mask, labels, length), non paddé
+    """
+    ner_data = convert_to_ner_format(spacy_data)
+    
+    cache_path = None
+    if cache_dir is not None:
+        digest = hashlib.sha1()
+        digest.update(str(PREPROCESSING_VERSION).encode("utf-8"))
+        digest.update(tokenizer_fingerprint(tokenizer).encode("utf-8"))
+        digest.update(json.dumps(label_to_id, sort_keys=True).encode("utf-8"))
+        digest.update(json.dumps(ner_data, ensure_ascii=False).encode("utf-8"))
+        cache_path = Path(cache_dir) / digest.hexdigest()
+        if (cache_path / "dataset_info.json").exists():
+            logger.info(f"Using cached tokenized dataset {cache_path}")
+            return Dataset.load_from_disk(str(cache_path))
+    
+    dataset = Dataset.from_list(ner_data).map(
+        tokenize_and_align_labels,
+        batched=True,
+        fn_kwargs={"tokenizer": tokenizer, "label_to_id": label_to_id},
+        remove_columns=["text", "entity_starts", "entity_ends", "entity_labels"]
+    )
+    if cache_path is None:
+        return dataset
+    
+    # Écriture dans un dossier temporaire puis renommage (pas de cache partiel)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(tempfile.mkdtemp(prefix=".tmp-", dir=cache_path.parent))
+    try:
+        dataset.save_to_disk(str(tmp_path))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Un autre processus a écrit la même entrée entre-temps
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not (cache_path / "dataset_info.json").exists():
+            raise
+    logger.info(f"Tokenized dataset cached in {cache_path}")
+    return Dataset.load_from_disk(str(cache_path))
+
+
+
+if TRANSFORMERS_AVAILABLE:
+    class LengthGroupedTrainer(Trainer):
+        """
+        Trainer dont les batches d'entraînement regroupent des phrases de longueurs voisines.
+        
+        Le Trainer retire les colonnes inutilisées par le modèle (dont `length`)
+        avant de construire son sampler, qui recalculerait alors chaque longueur
+        en relisant tout le dataset : les longueurs précalculées lui sont passées ici.
+        """
+        
+        def _get_train_sampler(self, *args, **kwargs):
+            if not self.args.group_by_length or "length" not in self.train_dataset.column_names:
+                return super()._get_train_sampler(*args, **kwargs)
+            return LengthGroupedSampler(
+                self.args.train_batch_size * self.args.gradient_accumulation_steps,
+                lengths=self.train_dataset["length"]
+            )
+
+
 def train_transformers_model(
     base_model_name: str,
     train_data: List[Tuple[str, Dict]],
@@ -81,7 +268,9 @@ def train_transformers_model(
     valid_data: Optional[List[Tuple[str, Dict]]] = None,
     n_epochs: int = 3,
     learning_rate: float = 2e-5,
-    batch_size: int = 16
+    batch_size: int = 16,
+    cache_dir: Optional[str | Path] = DEFAULT_TOKENIZED_CACHE_DIR,
+    group_by_length: bool = True
 ) -> Path:
     """
     Entraîne (fine-tune) un modèle Transformers pour l'extraction NER.
@@ -94,6 +283,9 @@ def train_transformers_model(
         n_epochs: Nombre d'époques d'entraînement
         learning_rate: Taux d'apprentissage
         batch_size: Taille des batches
+        cache_dir: Dossier du cache des datasets tokenisés (None pour désactiver)
+        group_by_length: Former les batches d'entraînement avec des phrases de
+            longueurs voisines (moins de padding)
     
     Returns:
         Chemin vers le modèle entraîné
@@ -117,8 +309,10 @@ def train_transformers_model(
     try:
         from transformers import CamembertConfig
         
-        # Charge le tokenizer
-        tokenizer = AutoTokenizer.from_pretrained(base_model, use_fast=False)  # use_fast=False pour éviter les problèmes
+        # Charge le tokenizer (rapide : les offsets servent à aligner les labels)
+        tokenizer = AutoTokenizer.from_pretrained(base_model, use_fast=True)
+        if not tokenizer.is_fast:
+            raise ValueError(f"A fast tokenizer is required for label alignment, {base_model} has none")
         
         # Crée la configuration avec 5 labels
         config = CamembertConfig.from_pretrained(base_model)
@@ -132,47 +326,9 @@ def train_transformers_model(
         logger.error(f"Failed to load model {base_model}: {e}")
         raise
     
-    # Convertit les données
-    train_ner = convert_to_ner_format(train_data)
-    valid_ner = convert_to_ner_format(valid_data) if valid_data else None
-    
-    # Crée les datasets
-    train_dataset = Dataset.from_list(train_ner)
-    valid_dataset = Dataset.from_list(valid_ner) if valid_ner else None
-    
-    # Tokenize
-    def tokenize_and_align_labels(examples):
-        tokenized_inputs = tokenizer(
-            examples["tokens"],
-            truncation=True,
-            padding=True,
-            is_split_into_words=True
-        )
-        
-        labels = []
-        for i, label in enumerate(examples["ner_tags"]):
-            word_ids = tokenized_inputs.word_ids(batch_index=i)
-            previous_word_idx = None
-            label_ids = []
-            for word_idx in word_ids:
-                if word_idx is None:
-                    label_ids.append(-100)
-                elif word_idx != previous_word_idx:
-                    label_ids.append(label_to_id.get(label[word_idx], 0))
-                else:
-                    label_ids.append(-100)
-                previous_word_idx = word_idx
-            labels.append(label_ids)
-        
-        tokenized_inputs["labels"] = labels
-        return tokenized_inputs
-    
-    # Label mapping
-    label_to_id = {"O": 0, "B-ORIGIN": 1, "I-ORIGIN": 2, "B-DESTINATION": 3, "I-DESTINATION": 4}
-    
-    train_dataset = train_dataset.map(tokenize_and_align_labels, batched=True)
-    if valid_dataset:
-        valid_dataset = valid_dataset.map(tokenize_and_align_labels, batched=True)
+    # Tokenise et aligne les labels (relu depuis le cache si déjà fait)
+    train_dataset = preprocess_ner_dataset(train_data, tokenizer, cache_dir)
+    valid_dataset = preprocess_ner_dataset(valid_data, tokenizer, cache_dir) if valid_data else None
     
     # Arguments d'entraînement
     training_args = TrainingArguments(
@@ -182,6 +338,7 @@ def train_transformers_model(
         per_device_eval_batch_size=batch_size,
         learning_rate=learning_rate,
         weight_decay=0.01,
+        group_by_length=group_by_length,
         logging_dir=str(output_dir / "logs"),
         logging_steps=10,
         save_strategy="epoch",
@@ -189,11 +346,11 @@ def train_transformers_model(
         eval_steps=100 if valid_dataset else None,  # Évalue tous les 100 steps
     )
     
-    # Data collator
-    data_collator = DataCollatorForTokenClassification(tokenizer)
+    # Data collator : padding dynamique, à la longueur du plus long exemple de chaque batch
+    data_collator = DataCollatorForTokenClassification(tokenizer, padding="longest")
     
-    # Trainer
-    trainer = Trainer(
+    # Trainer (batches de longueurs voisines à partir de la colonne length)
+    trainer = LengthGroupedTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
@@ -0,0 +1,2 @@
+"""Recherche d'itinéraire ferroviaire"""
+
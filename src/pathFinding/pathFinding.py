@@ -1,6 +1,6 @@
 import math
 import json
-from heapq import heappop, heappush
+from heapq import heapify, heappop, heappush
 
 # 1. Calcul de distance (Haversine)
 def haversine(pos1, pos2):
@@ -104,28 +104,68 @@ def load_data(path_gares, path_liaisons):
     return stations_by_uic, commune_to_uic, graph
 
 
+# 4. Dijkstra multi-sources (villes desservies par plusieurs gares)
+def find_shortest_path_between(graph, start_uics, end_uics):
+    """
+    Plus court chemin entre deux ensembles de gares (ex: toutes les gares de Paris).
 
+    Retourne (distance, chemin) ou (None, None) si aucun chemin n'existe.
+    """
+    end_uics = set(end_uics)
+    queue = [(0, uic) for uic in set(start_uics)]
+    heapify(queue)
+    previous = {uic: None for _, uic in queue}
+    min_dist = {uic: 0 for _, uic in queue}
+    visited = set()
+
+    while queue:
+        (cost, current) = heappop(queue)
+
+        if current in visited:
+            continue
+
+        visited.add(current)
+
+        if current in end_uics:
+            path = []
+            while current is not None:
+                path.append(current)
+                current = previous[current]
+            return cost, path[::-1]
+
+        for neighbor, weight in graph.get(current, []):
+            if neighbor in visited:
+                continue
+
+            new_cost = cost + weight
+            if new_cost < min_dist.get(neighbor, float('inf')):
+                min_dist[neighbor] = new_cost
+                previous[neighbor] = current
+                heappush(queue, (new_cost, neighbor))
 
+    return None, None
 
 
-stations, city_map, graphe = load_data('/home/louisetienne/Documents/THOR/data/train_station/dataset_gares.json', '/home/louisetienne/Documents/THOR/data/train_station/dataset_liaisons.json')
+if __name__ == "__main__":
+    from pathlib import Path
 
-code_dep = "60001"  # Abancourt
-code_arr = "35238"  # Exemple pour Paris
+    data_dir = Path(__file__).parent.parent.parent / "data" / "train_station"
+    stations, city_map, graphe = load_data(data_dir / "dataset_gares.json", data_dir / "dataset_liaisons.json")
 
-uic_depart = city_map.get(code_dep)
-uic_arrivee = city_map.get(code_arr)
+    code_dep = "60001"  # Abancourt
+    code_arr = "35238"  # Exemple pour Paris
 
-distance, chemin = find_shortest_path(graphe, stations, uic_depart, uic_arrivee)
+    uic_depart = city_map.get(code_dep)
+    uic_arrivee = city_map.get(code_arr)
 
-if uic_depart and uic_arrivee:
-    distance, chemin = find_shortest_path(graphe, stations, uic_depart, uic_arrivee)
-    
-    if chemin:
-        print(f"Trajet trouvé ({round(distance, 2)} km) :")
-        for uic in chemin:
-            print(f" -> {stations[uic]['nom_gare']} ({uic})")
+    if uic_depart and uic_arrivee:
+        distance, chemin = find_shortest_path(graphe, stations, uic_depart, uic_arrivee)
+
+        if chemin:
+            print(f"Trajet trouvé ({round(distance, 2)} km) :")
+            for uic in chemin:
+                print(f" -> {stations[uic]['nom_gare']} ({uic})")
+        else:
+            print("Désolé, aucun chemin de fer ne relie ces deux communes.")
     else:
-        print("Désolé, aucun chemin de fer ne relie ces deux communes.")
-else:
-    print("Un des codes commune n'a pas été trouvé dans la base de données des gares.")
\ No newline at end of file
+        print("Un des codes commune n'a pas été trouvé dans la base de données des gares.")
@@ -0,0 +1,192 @@
+"""
+Résolution des villes extraites par le NLP en gares, puis calcul d'itinéraire.
+"""
+import csv
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from src.common.text_norm import normalize_city_name
+from src.common.types import Route
+from src.common.logging import setup_logging
+from src.pathFinding.pathFinding import load_data, find_shortest_path_between
+
+logger = setup_logging(module="pathfinding")
+
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DEFAULT_GARES_PATH = DATA_DIR / "train_station" / "dataset_gares.json"
+DEFAULT_LIAISONS_PATH = DATA_DIR / "train_station" / "dataset_liaisons.json"
+DEFAULT_CITIES_PATH = DATA_DIR / "raw" / "full_cities.csv"
+
+EARTH_RADIUS_KM = 6371
+
+
+class StationIndex:
+    """
+    Index précalculé nom de ville normalisé → gares (UIC).
+
+    Construit une seule fois ; la résolution d'une ville est une simple
+    recherche dans un dictionnaire.
+    """
+
+    def __init__(self, name_to_uics: Dict[str, List[str]]):
+        """
+        Args:
+            name_to_uics: Clé normalisée (voir normalize_city_name) → liste d'UIC
+        """
+        self.name_to_uics = name_to_uics
+
+    def resolve(self, city: str) -> List[str]:
+        """
+        Retourne les gares desservant une ville.
+
+        Args:
+            city: Nom de ville (tel qu'extrait par le NLP)
+
+        Returns:
+            Liste d'UIC (vide si la ville est inconnue)
+        """
+        if not city:
+            return []
+        return self.name_to_uics.get(normalize_city_name(city), [])
+
+    def __len__(self) -> int:
+        return len(self.name_to_uics)
+
+    @classmethod
+    def build(
+        cls,
+        stations_by_uic: Dict[str, dict],
+        cities_path: Optional[str | Path] = DEFAULT_CITIES_PATH
+    ) -> "StationIndex":
+        """
+        Construit l'index à partir des gares et de la liste des communes.
+
+        Priorité des clés : nom de commune d'une gare (toutes les gares de la
+        commune, arrondissements fusionnés), puis nom de gare, puis pour les
+        communes sans gare (full_cities.csv) la gare la plus proche.
+
+        Args:
+            stations_by_uic: Gares indexées par UIC (voir load_data)
+            cities_path: Chemin vers full_cities.csv (optionnel)
+
+        Returns:
+            StationIndex
+        """
+        name_to_uics: Dict[str, List[str]] = {}
+
+        for uic, station in stations_by_uic.items():
+            key = normalize_city_name(station["nom_gare"])
+            if key:
+                name_to_uics.setdefault(key, []).append(uic)
+
+        by_commune: Dict[str, List[str]] = {}
+        for uic, station in stations_by_uic.items():
+            key = normalize_city_name(station["ville"]["nom_commune"])
+            if key:
+                by_commune.setdefault(key, []).append(uic)
+        name_to_uics.update(by_commune)
+
+        if cities_path and Path(cities_path).exists():
+            added = cls._add_nearest_stations(name_to_uics, stations_by_uic, cities_path)
+            logger.info(f"Mapped {added} communes without station to their nearest station")
+
+        logger.info(f"Station index built: {len(name_to_uics)} names, {len(stations_by_uic)} stations")
+        return cls(name_to_uics)
+
+    @staticmethod
+    def _add_nearest_stations(
+        name_to_uics: Dict[str, List[str]],
+        stations_by_uic: Dict[str, dict],
+        cities_path: str | Path,
+        chunk_size: int = 2048
+    ) -> int:
+        """Associe chaque commune absente de l'index à sa gare la plus proche (calcul vectorisé)."""
+        names, coords = [], []
+        with open(cities_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f, delimiter=';'):
+                key = normalize_city_name(row.get("nom_commune", ""))
+                if not key or key in name_to_uics:
+                    continue
+                try:
+                    coords.append((float(row["lat"]), float(row["lon"])))
+                except (TypeError, ValueError):
+                    continue
+                names.append(key)
+
+        if not names:
+            return 0
+
+        uics = list(stations_by_uic.keys())
+        station_coords = np.radians([
+            (s["position_geographique"]["lat"], s["position_geographique"]["lon"])
+            for s in stations_by_uic.values()
+        ])
+        city_coords = np.radians(coords)
+
+        added = 0
+        for start in range(0, len(names), chunk_size):
+            lat1 = city_coords[start:start + chunk_size, 0:1]
+            lon1 = city_coords[start:start + chunk_size, 1:2]
+            lat2 = station_coords[:, 0]
+            lon2 = station_coords[:, 1]
+            # Haversine (le facteur constant 2R n'influence pas l'argmin)
+            a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+            nearest = np.argmin(a, axis=1)
+            for key, station_idx in zip(names[start:start + chunk_size], nearest):
+                if key not in name_to_uics:
+                    name_to_uics[key] = [uics[station_idx]]
+                    added += 1
+
+        return added
+
+
+class RouteFinder:
+    """Calcule un itinéraire ferroviaire entre deux villes."""
+
+    def __init__(
+        self,
+        gares_path: str | Path = DEFAULT_GARES_PATH,
+        liaisons_path: str | Path = DEFAULT_LIAISONS_PATH,
+        cities_path: Optional[str | Path] = DEFAULT_CITIES_PATH
+    ):
+        """
+        Charge le graphe ferroviaire et construit l'index des gares.
+
+        Args:
+            gares_path: Chemin vers dataset_gares.json
+            liaisons_path: Chemin vers dataset_liaisons.json
+            cities_path: Chemin vers full_cities.csv (optionnel)
+        """
+        self.stations, _, self.graph = load_data(gares_path, liaisons_path)
+        self.index = StationIndex.build(self.stations, cities_path)
+
+    def find_route(self, origin: str, destination: str) -> Optional[Route]:
+        """
+        Calcule le plus court itinéraire entre deux villes.
+
+        Args:
+            origin: Ville de départ
+            destination: Ville d'arrivée
+
+        Returns:
+            Route avec la liste des gares, ou None si une ville est inconnue
+            ou qu'aucun chemin n'existe
+        """
+        origin_uics = self.index.resolve(origin)
+        destination_uics = self.index.resolve(destination)
+        if not origin_uics or not destination_uics:
+            logger.warning(f"Unknown city: {origin if not origin_uics else destination}")
+            return None
+
+        distance, path = find_shortest_path_between(self.graph, origin_uics, destination_uics)
+        if path is None:
+            logger.warning(f"No railway path between {origin} and {destination}")
+            return None
+
+        return Route(
+            origin=origin,
+            destination=destination,
+            steps=[self.stations[uic]["nom_gare"] for uic in path],
+            total_distance=distance,
+            metadata={"uics": path}
+        )
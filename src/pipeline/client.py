@@ -0,0 +1,124 @@
+"""
+Client léger pour le serveur de pipeline (voir src.pipeline.server).
+"""
+import http.client
+import json
+import socket
+from pathlib import Path
+from typing import Optional
+from src.pipeline.server import DEFAULT_HOST, DEFAULT_PORT, UPLOAD_SUFFIX_PATTERN
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """Connexion HTTP sur socket Unix."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class PipelineClient:
+    """Transmet les requêtes au serveur de pipeline au lieu de charger les modèles."""
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: Optional[str | Path] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            host: Adresse du serveur TCP
+            port: Port du serveur TCP
+            socket_path: Chemin du socket Unix (remplace host/port si fourni)
+            timeout: Timeout des requêtes en secondes (None = illimité)
+        """
+        self.host = host
+        self.port = port
+        self.socket_path = str(socket_path) if socket_path else None
+        self.timeout = timeout
+
+    def _connection(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        if self.socket_path:
+            return _UnixHTTPConnection(self.socket_path, timeout=timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _request(self, method: str, path: str, body: bytes = None, headers: dict = None,
+                 timeout: Optional[float] = None) -> dict:
+        connection = self._connection(timeout if timeout is not None else self.timeout)
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            payload = json.loads(response.read().decode("utf-8"))
+        finally:
+            connection.close()
+
+        if response.status == 404 and path == "/process":
+            raise FileNotFoundError(payload.get("error", "Audio file not found"))
+        if response.status >= 400:
+            raise RuntimeError(f"Pipeline server error ({response.status}): {payload.get('error')}")
+        return payload
+
+    def is_running(self, timeout: float = 0.5) -> bool:
+        """Vérifie si un serveur répond sur /health."""
+        try:
+            return self.health(timeout=timeout).get("status") == "ok"
+        except (OSError, http.client.HTTPException, ValueError):
+            return False
+
+    def health(self, timeout: Optional[float] = None) -> dict:
+        """Retourne l'état du serveur."""
+        return self._request("GET", "/health", timeout=timeout)
+
+    def server_models(self, timeout: float = 0.5) -> Optional[dict]:
+        """
+        Retourne la configuration servie par le serveur (modèles STT/NLP, itinéraire).
+
+        Returns:
+            Dictionnaire renvoyé par /health (vide pour un serveur qui ne la
+            publie pas), ou None si aucun serveur ne répond
+        """
+        try:
+            health = self.health(timeout=timeout)
+        except (OSError, http.client.HTTPException, ValueError):
+            return None
+        if health.get("status") != "ok":
+            return None
+        return health.get("models") or {}
+
+    def stats(self) -> dict:
+        """Retourne les statistiques du serveur (file d'attente, batches, latences)."""
+        return self._request("GET", "/stats")
+
+    def process(self, audio_path: str | Path, upload: bool = False) -> dict:
+        """
+        Traite un fichier audio sur le serveur.
+
+        Args:
+            audio_path: Chemin vers le fichier audio
+            upload: Envoyer le contenu du fichier plutôt que son chemin
+                (serveur sans accès au même système de fichiers)
+
+        Returns:
+            Résultat au format de Pipeline.process
+        """
+        audio_path = Path(audio_path)
+
+        if upload:
+            # Le serveur refuse les extensions hors UPLOAD_SUFFIX_PATTERN
+            suffix = audio_path.suffix if UPLOAD_SUFFIX_PATTERN.fullmatch(audio_path.suffix) else ".wav"
+            return self._request("POST", "/process", body=audio_path.read_bytes(), headers={
+                "Content-Type": "application/octet-stream",
+                "X-Audio-Suffix": suffix,
+                "X-Audio-Name": str(audio_path),
+            })
+
+        body = json.dumps({"audio_path": str(audio_path.resolve())}).encode("utf-8")
+        return self._request("POST", "/process", body=body, headers={"Content-Type": "application/json"})
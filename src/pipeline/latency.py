@@ -0,0 +1,205 @@
+"""
+Instrumentation de latence par étape du pipeline.
+"""
+import json
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence
+from src.common.logging import setup_logging
+from src.common.stats import RunningStats
+
+logger = setup_logging(module="pipeline.latency")
+
+LATENCY_QUANTILES = (50, 90, 95, 99)
+
+
+class StageTimer:
+    """Chronomètre les étapes d'un traitement avec une horloge monotone."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Mesure la durée d'une étape (cumulée si l'étape est répétée).
+
+        Args:
+            name: Nom de l'étape
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self) -> float:
+        """Retourne le temps écoulé depuis la création du chronomètre (secondes)."""
+        return time.perf_counter() - self._start
+
+    def as_dict(self) -> Dict[str, float]:
+        """Retourne les durées par étape et la durée totale (secondes)."""
+        return {**self.timings, "total": self.total()}
+
+
+class LatencyAggregator:
+    """
+    Agrégateur de latences par étape, partagé par tout le processus.
+
+    Maintient par étape des statistiques en flux (moyenne en ligne et sketch
+    de quantiles, voir src.common.stats) : mémoire constante quel que soit le
+    nombre de requêtes, et fusion possible entre processus (picklable).
+    """
+
+    def __init__(self, quantiles: Sequence[float] = LATENCY_QUANTILES):
+        """
+        Args:
+            quantiles: Percentiles reportés par étape (0-100)
+        """
+        self.quantiles = tuple(quantiles)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, RunningStats] = {}
+        self._requests = 0
+        self._failed = 0
+        self._started_at = time.monotonic()
+
+    def record(self, timings: Dict[str, float], failed: bool = False):
+        """
+        Enregistre les durées d'un traitement.
+
+        Un traitement en échec est compté (taux d'erreur) et ses durées, jusqu'à
+        l'étape qui a échoué, entrent dans les statistiques comme les autres.
+
+        Args:
+            timings: Durées par étape en secondes (clé "total" incluse)
+            failed: Le traitement a échoué
+        """
+        with self._lock:
+            self._requests += 1
+            self._failed += int(failed)
+            for stage, duration in timings.items():
+                if stage not in self._stats:
+                    self._stats[stage] = RunningStats()
+                self._stats[stage].add(duration)
+
+    def merge(self, other: "LatencyAggregator"):
+        """
+        Fusionne les mesures d'un autre agrégateur (ex: celui d'un worker).
+
+        Args:
+            other: Agrégateur à fusionner
+        """
+        with self._lock:
+            self._requests += other._requests
+            self._failed += other._failed
+            for stage, stats in other._stats.items():
+                if stage not in self._stats:
+                    self._stats[stage] = RunningStats()
+                self._stats[stage].merge(stats)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Réinitialise toutes les mesures."""
+        with self._lock:
+            self._stats.clear()
+            self._requests = 0
+            self._failed = 0
+            self._started_at = time.monotonic()
+
+    def summary(self) -> Dict[str, object]:
+        """
+        Calcule les statistiques agrégées.
+
+        Returns:
+            Dictionnaire avec le nombre de requêtes (dont échecs), le taux
+            d'erreur, le débit (requêtes/s depuis le démarrage) et, par étape, count/mean/p50/p90/p95/p99 en secondes
+            ainsi que la capacité de l'étape (traitements/s si elle était seule).
+        """
+        with self._lock:
+            uptime = time.monotonic() - self._started_at
+            requests = self._requests
+            failed = self._failed
+            stages = {}
+            for stage, stats in self._stats.items():
+                stages[stage] = {
+                    "count": stats.count,
+                    "mean": stats.mean,
+                    **{f"p{p:g}": stats.percentile(p) for p in self.quantiles},
+                    "capacity_per_s": 1.0 / stats.mean if stats.mean > 0 else 0.0,
+                }
+
+        return {
+            "requests": requests,
+            "failed": failed,
+            "error_rate": failed / requests if requests else 0.0,
+            "uptime": uptime,
+            "throughput": requests / uptime if uptime > 0 else 0.0,
+            "stages": stages,
+        }
+
+    def dump(self, output_path: Optional[str | Path] = None) -> Dict[str, object]:
+        """
+        Exporte le résumé courant (fichier JSON si un chemin est fourni, sinon log).
+
+        Args:
+            output_path: Chemin du fichier JSON de sortie (optionnel)
+
+        Returns:
+            Résumé des latences
+        """
+        summary = self.summary()
+        if output_path:
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+            logger.info(f"Latency summary written to {output_path}")
+        else:
+            logger.info(f"Latency summary: {json.dumps(summary, ensure_ascii=False)}")
+        return summary
+
+
+_aggregator = LatencyAggregator()
+
+
+def get_latency_aggregator() -> LatencyAggregator:
+    """Retourne l'agrégateur de latences global du processus."""
+    return _aggregator
+
+
+def dump_on_signal(
+    output_path: Optional[str | Path] = None,
+    signum: Optional[int] = None,
+    aggregator: Optional[LatencyAggregator] = None
+):
+    """
+    Installe un handler qui exporte les latences à la réception d'un signal.
+
+    Exemple: `kill -USR1 <pid>` écrit le résumé dans `output_path`.
+    À appeler depuis le thread principal.
+
+    Args:
+        output_path: Chemin du fichier JSON de sortie (optionnel, sinon log)
+        signum: Signal à intercepter (défaut: SIGUSR1)
+        aggregator: Agrégateur à exporter (défaut: agrégateur global)
+    """
+    if signum is None:
+        if not hasattr(signal, "SIGUSR1"):
+            logger.warning("SIGUSR1 not available on this platform, latency dump disabled")
+            return
+        signum = signal.SIGUSR1
+
+    aggregator = aggregator or _aggregator
+    signal.signal(signum, lambda *_: aggregator.dump(output_path))
@@ -1,12 +1,19 @@
 """
 Orchestrateur du pipeline complet : Audio → STT → NLP → Extraction.
 """
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
 from src.stt.interfaces import STTModel
 from src.nlp.interfaces import NLPModel
-from src.common.types import STTResult, NLPExtraction
+from src.common.types import STTResult, NLPExtraction, Route
 from src.common.logging import setup_logging
+from src.common.audio import AUDIO_AVAILABLE, get_audio_info
+from src.pipeline.latency import StageTimer, LatencyAggregator, get_latency_aggregator
+from src.pathFinding.routing import RouteFinder
 
 logger = setup_logging(module="pipeline")
 
@@ -15,29 +22,98 @@ class Pipeline:
     """
     Pipeline complet pour traiter une commande de voyage depuis un audio.
     
-    Flux: Audio → STT → NLP → Origine/Destination
+    Flux: Audio → STT → NLP → Origine/Destination (→ Itinéraire si un RouteFinder est fourni)
     """
     
-    def __init__(self, stt_model: STTModel, nlp_model: NLPModel):
+    def __init__(
+        self,
+        stt_model: STTModel,
+        nlp_model: NLPModel,
+        latency_aggregator: Optional[LatencyAggregator] = None,
+        config: Optional[dict] = None,
+        route_finder: Optional[RouteFinder] = None
+    ):
         """
         Initialise le pipeline.
         
         Args:
             stt_model: Modèle STT pour la transcription
             nlp_model: Modèle NLP pour l'extraction
+            latency_aggregator: Agrégateur de latences (défaut: agrégateur global du processus)
+            config: Configuration du pipeline (section `pipeline` du YAML)
+            route_finder: Résolution villes → gares et calcul d'itinéraire (étape optionnelle)
         """
         self.stt_model = stt_model
         self.nlp_model = nlp_model
+        self.config = config or {}
+        self.route_finder = route_finder
+        self.latency_aggregator = latency_aggregator or get_latency_aggregator()
         self._initialized = False
     
     def initialize(self):
-        """Initialise tous les modèles."""
+        """
+        Initialise tous les modèles.
+        
+        Les modèles STT et NLP sont chargés en parallèle, puis préchauffés
+        (section `warmup` de la config) pour que la première vraie requête
+        ne paie pas les allocations paresseuses. Les durées de chargement et
+        de préchauffage sont disponibles dans `self.init_stats` (secondes).
+        """
         if not self._initialized:
             logger.info("Initializing pipeline models...")
-            self.stt_model.initialize()
-            self.nlp_model.initialize()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                stt_future = executor.submit(self._timed, self.stt_model.initialize)
+                nlp_future = executor.submit(self._timed, self.nlp_model.initialize)
+                self.init_stats = {
+                    "stt_load": stt_future.result(),
+                    "nlp_load": nlp_future.result(),
+                }
+            
+            warmup_config = self.config.get("warmup", {})
+            if warmup_config.get("enabled", True):
+                self.init_stats.update(self._warmup(warmup_config))
+            
             self._initialized = True
-            logger.info("Pipeline initialized")
+            logger.info("Pipeline initialized (" + ", ".join(
+                f"{name}: {duration:.2f}s" for name, duration in self.init_stats.items()
+            ) + ")")
+    
+    @staticmethod
+    def _timed(func) -> float:
+        """Exécute une fonction et retourne sa durée (secondes)."""
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    
+    def _warmup(self, warmup_config: dict) -> dict:
+        """
+        Préchauffe les modèles : un court clip synthétique pour le STT
+        et une phrase type pour le NLP. Un échec est journalisé sans être bloquant.
+        """
+        durations = {}
+        sample_rate = 16000
+        num_samples = int(warmup_config.get("audio_duration", 1.0) * sample_rate)
+        if warmup_config.get("audio", "noise") == "silence":
+            audio = np.zeros(num_samples, dtype=np.float32)
+        else:
+            # Bruit faible : certains modèles court-circuitent le décodage sur un silence parfait
+            audio = (np.random.default_rng(0).standard_normal(num_samples) * 0.01).astype(np.float32)
+        
+        start = time.perf_counter()
+        try:
+            self.stt_model.transcribe_array(audio, sample_rate)
+            durations["stt_warmup"] = time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"STT warm-up failed: {e}")
+        
+        start = time.perf_counter()
+        try:
+            self.nlp_model.extract(warmup_config.get("text", "Je voudrais aller de Paris à Lyon"))
+            durations["nlp_warmup"] = time.perf_counter() - start
+        except Exception as e:
+            logger.warning(f"NLP warm-up failed: {e}")
+        
+        return durations
     
     def process(self, audio_path: str | Path) -> dict:
         """
@@ -47,30 +123,277 @@ class Pipeline:
             audio_path: Chemin vers le fichier audio
         
         Returns:
-            Dictionnaire avec transcription, origine, destination, is_valid
+            Dictionnaire avec transcription, origine, destination, is_valid,
+            itinéraire (clé "route", si l'étape est activée)
+            et durées par étape (clé "timings", en secondes)
         """
         if not self._initialized:
             self.initialize()
         
+        timer = StageTimer()
+        
+        try:
+            with timer.stage("file_check"):
+                audio_path = self._check_file(audio_path)
+            
+            logger.info(f"Processing audio: {audio_path}")
+            
+            # Étape 0: Lecture de l'en-tête audio (durée) ; le décodage est fait par le modèle STT
+            with timer.stage("audio_probe"):
+                audio_duration = self._load_audio_duration(audio_path)
+            
+            # Étape 1: Transcription STT
+            logger.info("Step 1: Transcribing audio...")
+            with timer.stage("stt"):
+                stt_result = self.stt_model.transcribe(audio_path)
+            
+            return self._process_transcript(audio_path, audio_duration, stt_result, timer)
+        except Exception:
+            # Les requêtes en échec comptent aussi dans les latences (et le taux d'erreur)
+            self.latency_aggregator.record(timer.as_dict(), failed=True)
+            raise
+    
+    @staticmethod
+    def _check_file(audio_path: str | Path) -> Path:
+        """Vérifie que le fichier audio existe."""
         audio_path = Path(audio_path)
         if not audio_path.exists():
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        return audio_path
+    
+    def _process_transcript(
+        self,
+        audio_path: Path,
+        audio_duration: Optional[float],
+        stt_result: STTResult,
+        timer: StageTimer,
+        nlp_result: Optional[NLPExtraction] = None
+    ) -> dict:
+        """
+        Étapes qui suivent la transcription : extraction NLP, itinéraire et assemblage du résultat.
         
-        logger.info(f"Processing audio: {audio_path}")
-        
-        # Étape 1: Transcription STT
-        logger.info("Step 1: Transcribing audio...")
-        stt_result = self.stt_model.transcribe(audio_path)
+        Si `nlp_result` est fourni (extraction faite par lot), l'étape NLP n'est pas refaite.
+        """
         transcript = stt_result.text
         
         logger.info(f"Transcription: {transcript}")
         
         # Étape 2: Extraction NLP
-        logger.info("Step 2: Extracting origin/destination...")
-        nlp_result = self.nlp_model.extract(transcript)
+        if nlp_result is None:
+            logger.info("Step 2: Extracting origin/destination...")
+            with timer.stage("nlp"):
+                nlp_result = self.nlp_model.extract(transcript)
         
         logger.info(f"Extraction: {nlp_result.origin} → {nlp_result.destination}")
         
+        # Étape 3 (optionnelle): Villes → gares → itinéraire
+        route = self._find_route(nlp_result, timer)
+        
+        with timer.stage("assembly"):
+            result = self._build_result(audio_path, audio_duration, stt_result, nlp_result)
+            if self.route_finder is not None:
+                result["route"] = asdict(route) if route else None
+        
+        result["timings"] = timer.as_dict()
+        self.latency_aggregator.record(result["timings"])
+        
+        return result
+    
+    def process_batch(self, audio_paths: List[str | Path], record_failures: bool = True) -> List[dict]:
+        """
+        Traite plusieurs fichiers audio.
+        
+        La transcription est faite en un seul appel à `transcribe_batch` et
+        l'extraction en un seul appel à `extract_batch` ; la durée des étapes
+        "stt" et "nlp" de chaque résultat est la part du lot attribuée au fichier.
+        
+        Args:
+            audio_paths: Chemins vers les fichiers audio
+            record_failures: Enregistrer les requêtes du lot comme échecs si le lot
+                échoue (False si l'appelant les rejoue une par une)
+        
+        Returns:
+            Liste de résultats (même format que `process`), dans l'ordre des entrées
+        """
+        if len(audio_paths) <= 1:
+            return [self.process(audio_path) for audio_path in audio_paths]
+        
+        if not self._initialized:
+            self.initialize()
+        
+        timers = [StageTimer() for _ in audio_paths]
+        recorded = 0
+        try:
+            paths = []
+            durations = []
+            for audio_path, timer in zip(audio_paths, timers):
+                with timer.stage("file_check"):
+                    paths.append(self._check_file(audio_path))
+                with timer.stage("audio_probe"):
+                    durations.append(self._load_audio_duration(paths[-1]))
+            
+            logger.info(f"Step 1: Transcribing {len(paths)} audio files (batch)...")
+            start = time.perf_counter()
+            stt_results = self.stt_model.transcribe_batch(paths, batch_size=len(paths))
+            stt_share = (time.perf_counter() - start) / len(paths)
+            
+            logger.info(f"Step 2: Extracting origin/destination from {len(paths)} transcripts (batch)...")
+            start = time.perf_counter()
+            nlp_results = self.nlp_model.extract_batch([stt_result.text for stt_result in stt_results], batch_size=len(paths))
+            nlp_share = (time.perf_counter() - start) / len(paths)
+            
+            results = []
+            for audio_path, audio_duration, stt_result, nlp_result, timer in zip(paths, durations, stt_results, nlp_results, timers):
+                timer.timings["stt"] = stt_share
+                timer.timings["nlp"] = nlp_share
+                results.append(self._process_transcript(audio_path, audio_duration, stt_result, timer, nlp_result))
+                recorded += 1
+            return results
+        except Exception:
+            # Les requêtes du lot non encore enregistrées comptent comme échecs
+            if record_failures:
+                for timer in timers[recorded:]:
+                    self.latency_aggregator.record(timer.as_dict(), failed=True)
+            raise
+    
+    def process_stream(
+        self,
+        chunks: Iterable[bytes | np.ndarray],
+        sample_rate: int = 16000
+    ) -> Iterator[dict]:
+        """
+        Traite un flux audio découpé en blocs PCM (ex: téléphonie IVR).
+        
+        Produit des événements au fil du flux :
+        - `{"type": "partial", "transcript": ...}` pour chaque hypothèse STT partielle
+        - `{"type": "early", ...}` au plus une fois, dès que l'origine et la destination
+          sont extraites avec une confiance suffisante d'une partie stable de la transcription
+        - `{"type": "final", ...}` à la fin du flux
+        
+        Les événements "early" et "final" ont le même format que `process` ;
+        l'événement "early" porte en plus le temps écoulé depuis le début du
+        flux (clé "elapsed", en secondes). Comme pour `process`, les durées
+        du flux (ou de sa partie traitée s'il échoue) sont enregistrées dans
+        `latency_aggregator`.
+        
+        Args:
+            chunks: Blocs audio (PCM 16 bits mono ou signal float32)
+            sample_rate: Fréquence d'échantillonnage des blocs (Hz)
+        
+        Yields:
+            Dictionnaires d'événements
+        """
+        if not self._initialized:
+            self.initialize()
+        
+        min_confidence = self.config.get("streaming", {}).get("min_confidence", 0.5)
+        timer = StageTimer()
+        
+        try:
+            stream = self.stt_model.create_stream(sample_rate)
+            
+            previous_partial = ""
+            extracted_text = ""
+            early_sent = False
+            
+            for chunk in chunks:
+                with timer.stage("stt"):
+                    partial = stream.accept_chunk(chunk)
+                if partial is None:
+                    continue
+                
+                yield {"type": "partial", "transcript": partial}
+                
+                # Seuls les mots confirmés par deux hypothèses successives sont analysés
+                stable_text = self._stable_prefix(previous_partial, partial)
+                previous_partial = partial
+                if early_sent or not stable_text or stable_text == extracted_text:
+                    continue
+                
+                extracted_text = stable_text
+                with timer.stage("nlp"):
+                    nlp_result = self.nlp_model.extract(stable_text)
+                
+                if self._is_confident(nlp_result, min_confidence):
+                    early_sent = True
+                    logger.info(f"Early extraction: {nlp_result.origin} → {nlp_result.destination}")
+                    partial_stt = STTResult(text=stable_text, metadata={"streaming": True, "partial": True})
+                    result = self._build_result(None, None, partial_stt, nlp_result)
+                    result["timings"] = timer.as_dict()
+                    # Temps écoulé depuis le début du flux (hors durées par étape)
+                    result["elapsed"] = result["timings"]["total"]
+                    yield {"type": "early", **result}
+            
+            with timer.stage("stt"):
+                stt_result = stream.finalize()
+            
+            with timer.stage("nlp"):
+                nlp_result = self.nlp_model.extract(stt_result.text)
+            
+            route = self._find_route(nlp_result, timer)
+            
+            with timer.stage("assembly"):
+                result = self._build_result(None, None, stt_result, nlp_result)
+                if self.route_finder is not None:
+                    result["route"] = asdict(route) if route else None
+            
+            result["timings"] = timer.as_dict()
+        except Exception:
+            self.latency_aggregator.record(timer.as_dict(), failed=True)
+            raise
+        
+        self.latency_aggregator.record(result["timings"])
+        yield {"type": "final", **result}
+    
+    def _find_route(self, nlp_result: NLPExtraction, timer: StageTimer) -> Optional[Route]:
+        """Calcule l'itinéraire si l'étape est activée et que les deux villes sont connues."""
+        if self.route_finder is None or not (nlp_result.origin and nlp_result.destination):
+            return None
+        
+        logger.info("Step 3: Resolving stations and computing route...")
+        with timer.stage("routing"):
+            route = self.route_finder.find_route(nlp_result.origin, nlp_result.destination)
+        
+        if route:
+            logger.info(f"Route: {' → '.join(route.steps)} ({route.total_distance:.1f} km)")
+        return route
+    
+    @staticmethod
+    def _stable_prefix(previous: str, current: str) -> str:
+        """Retourne les mots de tête communs à deux hypothèses successives."""
+        stable = []
+        for previous_word, current_word in zip(previous.split(), current.split()):
+            if previous_word != current_word:
+                break
+            stable.append(current_word)
+        return " ".join(stable)
+    
+    @staticmethod
+    def _is_confident(nlp_result: NLPExtraction, min_confidence: float) -> bool:
+        """Vérifie qu'une extraction contient origine et destination avec une confiance suffisante."""
+        if not (nlp_result.is_valid and nlp_result.origin and nlp_result.destination):
+            return False
+        return nlp_result.confidence is None or nlp_result.confidence >= min_confidence
+    
+    @staticmethod
+    def _load_audio_duration(audio_path: Path) -> Optional[float]:
+        """Lit la durée de l'audio (None si soundfile est indisponible ou en cas d'erreur)."""
+        if not AUDIO_AVAILABLE:
+            return None
+        try:
+            return get_audio_info(audio_path)["duration"]
+        except Exception as e:
+            logger.warning(f"Failed to get audio info for {audio_path}: {e}")
+            return None
+    
+    @staticmethod
+    def _build_result(
+        audio_path: Optional[Path],
+        audio_duration: Optional[float],
+        stt_result: STTResult,
+        nlp_result: NLPExtraction
+    ) -> dict:
+        """Assemble le dictionnaire de résultat à partir des sorties STT et NLP."""
         # Génère un message d'erreur si une ville manque
         error_message = None
         if nlp_result.is_valid:
@@ -82,8 +405,9 @@ class Pipeline:
                 error_message = "⚠️ Attention : La ville d'arrivée est manquante. Veuillez préciser votre destination."
         
         return {
-            "audio_path": str(audio_path),
-            "transcript": transcript,
+            "audio_path": str(audio_path) if audio_path else None,
+            "audio_duration": audio_duration,
+            "transcript": stt_result.text,
             "origin": nlp_result.origin,
             "destination": nlp_result.destination,
             "is_valid": nlp_result.is_valid,
@@ -91,7 +91,24 @@ def generate_pipeline_report(result: Dict[str, Any], output_path: str | Path, st
 
 ---
 
-## 📊 Analyse
+"""
+    
+    # Itinéraire si l'étape de pathfinding est activée
+    if "route" in result:
+        route = result.get("route")
+        report += "## 🚆 Itinéraire\n\n"
+        if route:
+            distance = route.get("total_distance")
+            distance_str = f"{distance:.1f} km" if distance is not None else "N/A"
+            report += f"- **Distance**: {distance_str}\n"
+            report += f"- **Nombre de gares**: {len(route.get('steps', []))}\n\n"
+            for step in route.get("steps", []):
+                report += f"1. {step}\n"
+        else:
+            report += "❌ Aucun itinéraire trouvé (ville inconnue ou gares non reliées)\n"
+        report += "\n---\n\n"
+    
+    report += """## 📊 Analyse
 
 """
     
@@ -118,7 +135,11 @@ def generate_pipeline_report(result: Dict[str, Any], output_path: str | Path, st
 ### Pipeline utilisé
 1. **STT** : Transcription audio → texte
 2. **NLP** : Extraction origine/destination depuis le texte
-
+"""
+    if "route" in result:
+        report += "3. **Pathfinding** : Villes → gares → itinéraire\n"
+    
+    report += """
 ### Entités détectées
 """
     
@@ -129,6 +150,20 @@ def generate_pipeline_report(result: Dict[str, Any], output_path: str | Path, st
     else:
         report += "- Aucune entité détectée\n"
     
+    # Latence par étape
+    timings = result.get("timings", {})
+    if timings:
+        report += """
+---
+
+## ⏱️ Latence par étape
+
+| Étape | Durée (ms) |
+|-------|------------|
+"""
+        for stage, duration in timings.items():
+            report += f"| {stage} | {duration * 1000:.1f} |\n"
+    
     report += f"""
 
 ---
@@ -0,0 +1,278 @@
+"""
+Serveur local qui garde les modèles du pipeline chargés en mémoire.
+
+Expose une API HTTP (TCP sur localhost ou socket Unix) :
+- GET  /health  : état du serveur et modèles servis
+- GET  /stats   : statistiques (file d'attente, batches, latences par étape)
+- POST /process : traite un audio (JSON {"audio_path": ...} ou octets bruts du fichier)
+"""
+import json
+import os
+import queue
+import re
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional
+from src.pipeline.orchestrator import Pipeline
+from src.common.logging import setup_logging
+
+logger = setup_logging(module="pipeline.server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Extensions acceptées pour un audio envoyé en octets bruts (en-tête X-Audio-Suffix)
+UPLOAD_SUFFIX_PATTERN = re.compile(r"\.[A-Za-z0-9]{1,8}")
+
+
+class PipelineServer:
+    """
+    File de requêtes servie par un ou plusieurs pipelines initialisés.
+
+    Chaque pipeline a son propre thread de traitement qui regroupe les
+    requêtes en attente en micro-batches (jusqu'à `max_batch_size` requêtes
+    ou `max_wait_ms` d'attente après la première).
+    """
+
+    def __init__(
+        self,
+        pipelines: List[Pipeline],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        models: Optional[dict] = None
+    ):
+        """
+        Args:
+            pipelines: Pipelines à servir (un thread de traitement chacun)
+            max_batch_size: Taille maximale d'un micro-batch
+            max_wait_ms: Attente maximale (ms) pour compléter un micro-batch
+            models: Configuration servie, renvoyée par /health pour que les clients
+                la comparent à la leur (ex: {"stt_model": "whisper", "nlp_model": "spacy", "route": False})
+        """
+        self.pipelines = pipelines
+        self.models = models or {}
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._batches = 0
+        self._started_at = time.monotonic()
+
+    def start(self):
+        """Initialise les pipelines et démarre les threads de traitement."""
+        for pipeline in self.pipelines:
+            pipeline.initialize()
+
+        for i, pipeline in enumerate(self.pipelines):
+            thread = threading.Thread(target=self._worker, args=(pipeline,), name=f"pipeline-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Pipeline server ready ({len(self.pipelines)} pipeline(s))")
+
+    def submit(self, audio_path: str | Path) -> Future:
+        """
+        Ajoute une requête à la file.
+
+        Args:
+            audio_path: Chemin vers le fichier audio
+
+        Returns:
+            Future contenant le résultat de Pipeline.process
+        """
+        future = Future()
+        self._queue.put((str(audio_path), future))
+        return future
+
+    def _next_batch(self) -> List[tuple]:
+        """Attend une requête puis complète le batch avec celles qui arrivent avant l'échéance."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self, pipeline: Pipeline):
+        """Boucle de traitement d'un pipeline."""
+        while True:
+            batch = self._next_batch()
+            paths = [path for path, _ in batch]
+
+            outcomes = None
+            if len(paths) > 1:
+                try:
+                    outcomes = pipeline.process_batch(paths, record_failures=False)
+                except Exception:
+                    # Un échec isolé ne doit pas faire échouer tout le batch : requêtes rejouées une par une
+                    outcomes = None
+            if outcomes is None:
+                outcomes = []
+                for path in paths:
+                    try:
+                        outcomes.append(pipeline.process(path))
+                    except Exception as e:
+                        outcomes.append(e)
+
+            failed = 0
+            for (_, future), outcome in zip(batch, outcomes):
+                if isinstance(outcome, Exception):
+                    failed += 1
+                    future.set_exception(outcome)
+                else:
+                    future.set_result(outcome)
+
+            with self._lock:
+                self._batches += 1
+                self._processed += len(batch) - failed
+                self._failed += failed
+
+    def stats(self) -> dict:
+        """Retourne les statistiques du serveur et les latences par étape."""
+        with self._lock:
+            processed, failed, batches = self._processed, self._failed, self._batches
+
+        return {
+            "uptime": time.monotonic() - self._started_at,
+            "pipelines": len(self.pipelines),
+            "models": self.models,
+            "queue_size": self._queue.qsize(),
+            "processed": processed,
+            "failed": failed,
+            "batches": batches,
+            "avg_batch_size": (processed + failed) / batches if batches else 0.0,
+            "init": [pipeline.init_stats for pipeline in self.pipelines],
+            "latency": self.pipelines[0].latency_aggregator.summary() if self.pipelines else {},
+        }
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Handler HTTP : traduit les requêtes en soumissions au PipelineServer."""
+
+    server_version = "THORPipeline/1.0"
+
+    @property
+    def pipeline_server(self) -> PipelineServer:
+        return self.server.pipeline_server
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "pipelines": len(self.pipeline_server.pipelines),
+                "models": self.pipeline_server.models,
+            })
+        elif self.path == "/stats":
+            self._send_json(200, self.pipeline_server.stats())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/process":
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        upload_path = None
+
+        try:
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                audio_path = json.loads(body)["audio_path"]
+            else:
+                # Octets bruts : écrits dans un fichier temporaire le temps du traitement
+                suffix = self.headers.get("X-Audio-Suffix") or ".wav"
+                if not UPLOAD_SUFFIX_PATTERN.fullmatch(suffix):
+                    raise ValueError(f"invalid X-Audio-Suffix {suffix!r}")
+                fd, upload_path = tempfile.mkstemp(suffix=suffix, prefix="thor_upload_")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(body)
+                audio_path = upload_path
+
+            result = self.pipeline_server.submit(audio_path).result()
+            if upload_path:
+                result["audio_path"] = self.headers.get("X-Audio-Name", result["audio_path"])
+            self._send_json(200, result)
+        except FileNotFoundError as e:
+            self._send_json(404, {"error": str(e)})
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+        except Exception as e:
+            logger.error(f"Failed to process request: {e}")
+            self._send_json(500, {"error": str(e)})
+        finally:
+            if upload_path:
+                Path(upload_path).unlink(missing_ok=True)
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def address_string(self) -> str:
+        # Les sockets Unix n'ont pas d'adresse client (tuple) exploitable
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serveur HTTP multi-thread sur socket Unix."""
+
+    daemon_threads = True
+
+
+def serve(
+    pipeline_server: PipelineServer,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str | Path] = None
+):
+    """
+    Démarre le serveur HTTP (bloquant jusqu'à Ctrl+C).
+
+    Args:
+        pipeline_server: File de requêtes à exposer
+        host: Adresse d'écoute TCP
+        port: Port TCP
+        socket_path: Chemin d'un socket Unix (remplace host/port si fourni)
+    """
+    pipeline_server.start()
+
+    if socket_path:
+        socket_path = Path(socket_path)
+        socket_path.unlink(missing_ok=True)
+        httpd = _ThreadingUnixHTTPServer(str(socket_path), _RequestHandler)
+        address = f"unix://{socket_path}"
+    else:
+        httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+        address = f"http://{host}:{port}"
+
+    httpd.pipeline_server = pipeline_server
+    logger.info(f"Listening on {address}")
+
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down pipeline server")
+    finally:
+        httpd.server_close()
+        if socket_path:
+            socket_path.unlink(missing_ok=True)
@@ -0,0 +1,155 @@
+"""
+Distance d'édition (Levenshtein) bit-parallèle pour le calcul du WER et du CER.
+
+Implémente l'algorithme de Myers (1999), dans la formulation de Hyyrö (2001)
+pour la distance globale : chaque colonne de la matrice de programmation
+dynamique est codée dans les bits d'un entier, ce qui ramène le calcul à
+O(n) opérations sur des entiers de m bits (entiers Python de taille arbitraire).
+
+Fonctionne sur toute séquence d'éléments hachables : chaînes (caractères)
+ou listes de mots / d'identifiants de mots.
+
+`align` calcule en plus l'alignement complet (opérations d'édition), utilisé
+pour le WER et l'analyse des erreurs par mot.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Codes des opérations d'édition
+SUBSTITUTION = "S"
+DELETION = "D"
+INSERTION = "I"
+
+
+def edit_distance(reference: Sequence[Hashable], hypothesis: Sequence[Hashable]) -> int:
+    """
+    Calcule la distance de Levenshtein (substitutions, suppressions, insertions de coût 1).
+
+    Args:
+        reference: Séquence de référence (chaîne ou liste de mots)
+        hypothesis: Séquence à comparer
+
+    Returns:
+        Nombre minimal d'opérations d'édition
+    """
+    # Le motif codé en bits est la plus courte des deux séquences (distance symétrique)
+    if len(reference) < len(hypothesis):
+        pattern, text = reference, hypothesis
+    else:
+        pattern, text = hypothesis, reference
+
+    m = len(pattern)
+    if m == 0:
+        return len(text)
+
+    # Masque de positions de chaque symbole dans le motif
+    peq: Dict[Hashable, int] = {}
+    for i, symbol in enumerate(pattern):
+        peq[symbol] = peq.get(symbol, 0) | (1 << i)
+
+    mask = (1 << m) - 1
+    last_bit = 1 << (m - 1)
+    pv = mask  # différences verticales +1
+    mv = 0     # différences verticales -1
+    score = m
+
+    for symbol in text:
+        eq = peq.get(symbol, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+
+        if ph & last_bit:
+            score += 1
+        elif mh & last_bit:
+            score -= 1
+
+        # Distance globale : la première ligne vaut j, d'où le 1 injecté à droite
+        ph = (ph << 1) | 1
+        mh = mh << 1
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv & mask
+
+    return score
+
+
+@dataclass
+class Alignment:
+    """Résultat de l'alignement d'une hypothèse sur une référence."""
+    hits: int = 0
+    substitutions: int = 0
+    deletions: int = 0
+    insertions: int = 0
+    # Opérations d'erreur dans l'ordre de la référence : (code, élément de référence, élément hypothèse)
+    ops: List[Tuple[str, Optional[Hashable], Optional[Hashable]]] = field(default_factory=list)
+
+    @property
+    def errors(self) -> int:
+        """Nombre total d'opérations d'édition (= distance de Levenshtein)."""
+        return self.substitutions + self.deletions + self.insertions
+
+    @property
+    def reference_length(self) -> int:
+        """Longueur de la référence."""
+        return self.hits + self.substitutions + self.deletions
+
+    @property
+    def error_rate(self) -> float:
+        """Taux d'erreur (erreurs / longueur de la référence)."""
+        if self.reference_length == 0:
+            return 1.0 if self.insertions else 0.0
+        return self.errors / self.reference_length
+
+
+def align(reference: Sequence[Hashable], hypothesis: Sequence[Hashable]) -> Alignment:
+    """
+    Aligne deux séquences et retourne les comptes et les opérations d'édition.
+
+    Programmation dynamique en O(n·m) avec retour arrière ; à égalité de coût,
+    la substitution est préférée à la suppression, puis à l'insertion.
+
+    Args:
+        reference: Séquence de référence (ex: mots)
+        hypothesis: Séquence à aligner
+
+    Returns:
+        Alignment (hits, substitutions, suppressions, insertions et opérations)
+    """
+    n, m = len(reference), len(hypothesis)
+
+    # costs[i][j] = distance entre reference[:i] et hypothesis[:j]
+    costs = [list(range(m + 1))]
+    for i in range(1, n + 1):
+        ref_symbol = reference[i - 1]
+        previous = costs[-1]
+        row = [i]
+        for j in range(1, m + 1):
+            row.append(min(
+                previous[j - 1] + (ref_symbol != hypothesis[j - 1]),
+                previous[j] + 1,
+                row[j - 1] + 1
+            ))
+        costs.append(row)
+
+    alignment = Alignment()
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and costs[i][j] == costs[i - 1][j - 1] + (reference[i - 1] != hypothesis[j - 1]):
+            if reference[i - 1] == hypothesis[j - 1]:
+                alignment.hits += 1
+            else:
+                alignment.substitutions += 1
+                alignment.ops.append((SUBSTITUTION, reference[i - 1], hypothesis[j - 1]))
+            i, j = i - 1, j - 1
+        elif i > 0 and costs[i][j] == costs[i - 1][j] + 1:
+            alignment.deletions += 1
+            alignment.ops.append((DELETION, reference[i - 1], None))
+            i -= 1
+        else:
+            alignment.insertions += 1
+            alignment.ops.append((INSERTION, None, hypothesis[j - 1]))
+            j -= 1
+
+    alignment.ops.reverse()
+    return alignment
@@ -1,59 +1,118 @@
 """
 Analyse des erreurs de transcription.
 """
+import heapq
 from collections import Counter
 from typing import List, Dict, Any
 from src.common.io import read_jsonl, write_csv
+from src.stt.eval.edit_distance import SUBSTITUTION, DELETION, INSERTION
+from src.stt.eval.metrics import align_words
 from pathlib import Path
 
 
+def _sample_ops(item: Dict[str, Any]) -> List[List[Any]]:
+    """Opérations d'alignement d'une prédiction (recalculées si le fichier n'en contient pas)."""
+    ops = item.get("ops")
+    if ops is None:
+        alignment = align_words(item.get("reference", ""), item.get("prediction", ""))
+        ops = alignment.ops
+    return ops
+
+
 def analyze_errors(
     predictions_path: str | Path,
     output_dir: str | Path,
-    top_n: int = 20
+    top_n: int = 20,
+    top_words: int = 50
 ):
     """
     Analyse les erreurs les plus fréquentes.
     
+    Lit `predictions.jsonl` en flux (une seule passe) : seuls les `top_n` pires
+    échantillons (tas borné) et les compteurs d'erreurs par mot sont gardés en
+    mémoire. Les opérations d'alignement enregistrées par l'évaluation
+    (clé "ops") sont réutilisées.
+    
     Args:
         predictions_path: Chemin vers predictions.jsonl
         output_dir: Dossier de sortie
         top_n: Nombre d'erreurs à afficher
+        top_words: Nombre d'entrées conservées dans chaque table de confusion
+    
+    Returns:
+        Dictionnaire avec les statistiques globales et les erreurs par mot les plus fréquentes
     """
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    errors = []
-    high_wer_samples = []
+    worst = []  # tas min de (wer, rang, échantillon) : la racine est le moins mauvais gardé
+    substitutions = Counter()
+    deletions = Counter()
+    insertions = Counter()
+    total_samples = 0
+    high_wer_samples = 0
+    wer_sum = 0.0
+    cer_sum = 0.0
     
-    for item in read_jsonl(predictions_path):
+    for index, item in enumerate(read_jsonl(predictions_path)):
         wer = item.get("wer", 0.0)
         cer = item.get("cer", 0.0)
+        total_samples += 1
+        wer_sum += wer
+        cer_sum += cer
         
-        errors.append({
+        if wer > 0.5:  # Erreurs importantes
+            high_wer_samples += 1
+        
+        # Top N des pires échantillons ; à WER égal, les premiers du fichier sont gardés
+        entry = (wer, -index, {
             "id": item.get("id", ""),
             "wer": wer,
             "cer": cer,
             "reference": item.get("reference", ""),
             "prediction": item.get("prediction", "")
         })
+        if len(worst) < top_n:
+            heapq.heappush(worst, entry)
+        elif top_n > 0 and entry[:2] > worst[0][:2]:
+            heapq.heapreplace(worst, entry)
         
-        if wer > 0.5:  # Erreurs importantes
-            high_wer_samples.append(item)
+        # Tables de confusion par mot
+        for code, ref_word, hyp_word in _sample_ops(item):
+            if code == SUBSTITUTION:
+                substitutions[(ref_word, hyp_word)] += 1
+            elif code == DELETION:
+                deletions[ref_word] += 1
+            elif code == INSERTION:
+                insertions[hyp_word] += 1
     
-    # Trie par WER décroissant
-    errors.sort(key=lambda x: x["wer"], reverse=True)
+    # Sauvegarde top erreurs (WER décroissant)
+    errors = [sample for _, _, sample in sorted(worst, key=lambda entry: entry[:2], reverse=True)]
+    write_csv(output_dir / "errors_top.csv", errors)
     
-    # Sauvegarde top erreurs
-    write_csv(output_dir / "errors_top.csv", errors[:top_n])
+    top_substitutions = [
+        {"reference": ref_word, "prediction": hyp_word, "count": count}
+        for (ref_word, hyp_word), count in substitutions.most_common(top_words)
+    ]
+    top_deletions = [{"word": word, "count": count} for word, count in deletions.most_common(top_words)]
+    top_insertions = [{"word": word, "count": count} for word, count in insertions.most_common(top_words)]
+    
+    write_csv(output_dir / "errors_substitutions.csv", top_substitutions)
+    write_csv(output_dir / "errors_deletions.csv", top_deletions)
+    write_csv(output_dir / "errors_insertions.csv", top_insertions)
     
     # Analyse des patterns d'erreur
     analysis = {
-        "total_samples": len(errors),
-        "high_error_samples": len(high_wer_samples),
-        "avg_wer": sum(e["wer"] for e in errors) / len(errors) if errors else 0.0,
-        "avg_cer": sum(e["cer"] for e in errors) / len(errors) if errors else 0.0,
+        "total_samples": total_samples,
+        "high_error_samples": high_wer_samples,
+        "avg_wer": wer_sum / total_samples if total_samples else 0.0,
+        "avg_cer": cer_sum / total_samples if total_samples else 0.0,
+        "total_substitutions": sum(substitutions.values()),
+        "total_deletions": sum(deletions.values()),
+        "total_insertions": sum(insertions.values()),
+        "top_substitutions": top_substitutions,
+        "top_deletions": top_deletions,
+        "top_insertions": top_insertions,
     }
     
     return analysis
-
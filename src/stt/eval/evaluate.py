@@ -2,25 +2,179 @@
 Évaluation d'un modèle STT sur un dataset.
 """
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from tqdm import tqdm
 from src.stt.interfaces import STTModel
-from src.stt.eval.metrics import evaluate_stt_result, aggregate_metrics
+from src.stt.eval.metrics import evaluate_stt_result, aggregate_metrics, align_words, failed_sample_metrics
 from src.stt.eval.report import save_report
-from src.common.io import read_jsonl, write_jsonl, write_csv
+from src.common.io import write_jsonl, write_csv
+from src.common.dataset_cache import ColumnarDataset, DEFAULT_DATASET_CACHE_DIR, load_dataset
 from src.common.types import AudioSample, STTResult
 from src.common.logging import setup_logging
 from src.common.audio import get_audio_info
+from src.common.audio_cache import AudioCache
+from src.common.journal import EvalJournal, JOURNAL_FILENAME, sample_keys, run_fingerprint
+from src.common.parallel import get_mp_context, limit_cpu_threads, default_threads_per_worker, bounded_map
 
 logger = setup_logging(module="stt.eval")
 
 
+def _audio_duration(audio_path: str | Path, audio_cache: Optional[AudioCache]) -> float:
+    """Durée de l'audio (signal du cache si fourni, sinon métadonnées du fichier)."""
+    try:
+        if audio_cache is not None:
+            return audio_cache.duration(audio_path)
+        return get_audio_info(audio_path)["duration"]
+    except Exception as e:
+        logger.warning(f"Failed to get audio info for {audio_path}: {e}")
+        return 0.0
+
+
+def _score_sample(
+    item: Dict[str, Any],
+    result: STTResult,
+    audio_duration: float
+) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """
+    Évalue la transcription d'un échantillon du dataset.
+    
+    Args:
+        item: Ligne du dataset (audio_path, transcript, id)
+        result: Transcription de l'échantillon
+        audio_duration: Durée de l'audio en secondes
+    
+    Returns:
+        Tuple (métriques, prédiction)
+    """
+    audio_path = item["audio_path"]
+    reference = item.get("transcript", "")
+    
+    # Évaluation (un seul alignement des mots, dont les opérations sont conservées)
+    alignment = align_words(reference, result.text)
+    metrics = evaluate_stt_result(result, reference, audio_duration, alignment)
+    
+    # Sauvegarde prédiction
+    prediction = {
+        "id": item.get("id", ""),
+        "audio_path": str(audio_path),
+        "reference": reference,
+        "prediction": result.text,
+        **metrics,
+        "ops": [list(op) for op in alignment.ops]
+    }
+    
+    return metrics, prediction
+
+
+def _failed_sample(item: Dict[str, Any], error: Exception) -> Tuple[Dict[str, float], Dict[str, Any]]:
+    """Résultat d'un échantillon dont la transcription a échoué."""
+    logger.error(f"Failed to transcribe {item['audio_path']}: {error}")
+    metrics = failed_sample_metrics(item.get("transcript", ""))
+    prediction = {
+        "id": item.get("id", ""),
+        "audio_path": str(item["audio_path"]),
+        "reference": item.get("transcript", ""),
+        "prediction": "",
+        "error": str(error)
+    }
+    return metrics, prediction
+
+
+def _evaluate_batch(
+    model: STTModel,
+    items: List[Dict[str, Any]],
+    batch_size: int,
+    audio_cache: Optional[AudioCache] = None
+) -> List[Tuple[Dict[str, float], Dict[str, Any]]]:
+    """
+    Transcrit (via `transcribe_batch`) et évalue un lot d'échantillons.
+    
+    Corps de boucle partagé par l'évaluation séquentielle et parallèle.
+    Si le lot échoue, chaque échantillon est retranscrit individuellement
+    pour isoler l'erreur.
+    
+    Avec un cache audio, les modèles `native_array_input` reçoivent directement
+    le signal décodé (dont la durée est alors déduite) ; pour les autres modèles,
+    la durée vient des métadonnées du fichier, sans décodage.
+    
+    Args:
+        model: Modèle STT initialisé
+        items: Lignes du dataset (audio_path, transcript, id)
+        batch_size: Taille de lot passée au modèle
+        audio_cache: Cache d'audio décodé (optionnel)
+    
+    Returns:
+        Liste de tuples (métriques, prédiction), dans l'ordre des entrées
+    """
+    use_arrays = audio_cache is not None and model.native_array_input
+    durations = [_audio_duration(item["audio_path"], audio_cache if use_arrays else None) for item in items]
+    
+    try:
+        if use_arrays:
+            inputs = [audio_cache.load(item["audio_path"]) for item in items]
+        else:
+            inputs = [item["audio_path"] for item in items]
+        results = model.transcribe_batch(inputs, batch_size=batch_size)
+        return [_score_sample(item, result, duration) for item, result, duration in zip(items, results, durations)]
+    except Exception as e:
+        if len(items) == 1:
+            return [_failed_sample(items[0], e)]
+        logger.warning(f"Batch transcription failed ({e}), retrying samples one by one")
+    
+    outcomes = []
+    for item, duration in zip(items, durations):
+        try:
+            outcomes.append(_score_sample(item, model.transcribe(item["audio_path"]), duration))
+        except Exception as e:
+            outcomes.append(_failed_sample(item, e))
+    return outcomes
+
+
+# Colonnes du dataset utilisées par l'évaluation
+ITEM_COLUMNS = ("id", "audio_path", "transcript")
+
+
+def _batch_items(dataset: ColumnarDataset, indices: List[int]) -> List[Dict[str, Any]]:
+    """Lignes d'un lot, réduites aux colonnes utilisées (les autres ne sont pas décodées)."""
+    columns = [(name, dataset.get(name)) for name in ITEM_COLUMNS]
+    return [
+        {name: column[index] for name, column in columns if column is not None and column[index] is not None}
+        for index in indices
+    ]
+
+
+# Modèle et cache audio propres à chaque processus worker (voir _init_worker)
+_worker_model: Optional[STTModel] = None
+_worker_audio_cache: Optional[AudioCache] = None
+
+
+def _init_worker(model_class: type, model_config: dict, num_threads: int, audio_cache_dir: Optional[str | Path]):
+    """Instancie et initialise un modèle dans le processus worker."""
+    global _worker_model, _worker_audio_cache
+    limit_cpu_threads(num_threads)
+    _worker_model = model_class(model_config)
+    _worker_model.initialize()
+    if audio_cache_dir is not None:
+        _worker_audio_cache = AudioCache(audio_cache_dir)
+
+
+def _evaluate_batch_in_worker(items: List[Dict[str, Any]], batch_size: int) -> List[Tuple[Dict[str, float], Dict[str, Any]]]:
+    """Évalue un lot d'échantillons avec le modèle du processus worker."""
+    return _evaluate_batch(_worker_model, items, batch_size, _worker_audio_cache)
+
+
 def evaluate_model(
     model: STTModel,
     dataset_path: str | Path,
     output_dir: str | Path,
-    save_predictions: bool = True
+    save_predictions: bool = True,
+    workers: int = 1,
+    resume: bool = False,
+    batch_size: Optional[int] = None,
+    audio_cache_dir: Optional[str | Path] = None,
+    dataset_cache_dir: Optional[str | Path] = DEFAULT_DATASET_CACHE_DIR
 ) -> Dict[str, Any]:
     """
     Évalue un modèle STT sur un dataset.
@@ -28,11 +182,36 @@ def evaluate_model(
     Le dataset peut être un fichier JSONL ou un dossier contenant des fichiers JSONL.
     Si c'est un dossier, tous les fichiers JSONL seront traités.
     
+    Avec `workers > 1`, les échantillons sont répartis sur un pool de processus
+    avec un modèle par worker (recréé via `model.__class__(model.config)`).
+    Les prédictions restent dans l'ordre du dataset et les métriques sont
+    identiques à une évaluation séquentielle.
+    
+    Les échantillons sont transcrits par lots via `model.transcribe_batch`
+    (taille `batch_size`, défaut: `batch_size` de la config du modèle ou 1).
+    
+    Avec `audio_cache_dir`, chaque audio est décodé une seule fois (16 kHz mono
+    float32, voir AudioCache) : les évaluations suivantes relisent le signal
+    en mémoire mappée sans décodage ni rééchantillonnage.
+    
+    Le dataset est lu via le cache colonnaire (`dataset_cache_dir`) : seules
+    les colonnes id, audio_path et transcript des lots en cours sont décodées
+    (avec `workers > 1`, au plus deux lots par worker soumis à l'avance).
+    
+    Chaque échantillon est ajouté au journal `predictions.journal.jsonl` dès
+    son évaluation. Avec `resume=True`, les échantillons déjà présents dans le
+    journal sont ignorés et les métriques sont recalculées à partir du journal.
+    
     Args:
         model: Modèle STT à évaluer
         dataset_path: Chemin vers le fichier JSONL ou dossier du dataset
         output_dir: Dossier de sortie pour les résultats
         save_predictions: Sauvegarder les prédictions
+        workers: Nombre de processus d'évaluation
+        resume: Reprendre une évaluation interrompue à partir du journal
+        batch_size: Nombre de fichiers transcrits par appel au modèle
+        audio_cache_dir: Dossier du cache d'audio décodé (désactivé si None)
+        dataset_cache_dir: Dossier du cache colonnaire du dataset (None : JSONL relu sans cache)
     
     Returns:
         Dictionnaire avec les métriques agrégées
@@ -41,74 +220,73 @@ def evaluate_model(
     output_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"Evaluating model {model.name} on {dataset_path}")
+    batch_size = max(1, batch_size or model.config.get("batch_size", 1))
     
-    # Initialise le modèle
-    model.initialize()
+    # Charge le dataset (cache colonnaire : pas de reparsing JSON d'une exécution à l'autre)
+    dataset = load_dataset(dataset_path, dataset_cache_dir)
+    ids = dataset.get("id")
+    keys = sample_keys(ids.to_list() if ids is not None else [None] * len(dataset))
     
-    # Charge le dataset
-    samples = []
-    metrics_list = []
-    predictions = []
-    
-    for item in tqdm(read_jsonl(dataset_path), desc="Evaluating"):
-        audio_path = item["audio_path"]
-        reference = item.get("transcript", "")
-        sample_id = item.get("id", "")
+    with EvalJournal(output_dir / JOURNAL_FILENAME, resume=resume, fingerprint=run_fingerprint(model, dataset_path)) as journal:
+        pending = [(key, index) for index, key in enumerate(keys) if journal.get(key) is None]
+        if len(pending) < len(keys):
+            logger.info(f"Skipping {len(keys) - len(pending)} samples already in journal")
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        # Lignes reconstruites lot par lot, au fil de l'évaluation
+        batch_items = (_batch_items(dataset, [index for _, index in batch]) for batch in batches)
         
-        # Récupère les infos audio
-        try:
-            audio_info = get_audio_info(audio_path)
-            audio_duration = audio_info["duration"]
-        except Exception as e:
-            logger.warning(f"Failed to get audio info for {audio_path}: {e}")
-            audio_duration = 0.0
+        executor = None
+        if workers > 1 and pending:
+            logger.info(f"Using {workers} worker processes")
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_mp_context(),
+                initializer=_init_worker,
+                initargs=(type(model), model.config, default_threads_per_worker(workers), audio_cache_dir)
+            )
+            # Au plus deux lots par worker en attente : les lignes restent décodées au fil de l'évaluation
+            results = bounded_map(executor, _evaluate_batch_in_worker, batch_items, 2 * workers, batch_size)
+        else:
+            # Initialise le modèle
+            model.initialize()
+            audio_cache = AudioCache(audio_cache_dir) if audio_cache_dir is not None else None
+            results = (_evaluate_batch(model, items, batch_size, audio_cache) for items in batch_items)
         
-        # Transcription
         try:
-            result = model.transcribe(audio_path)
-            
-            # Évaluation
-            metrics = evaluate_stt_result(result, reference, audio_duration)
-            metrics_list.append(metrics)
-            
-            # Sauvegarde prédiction
-            predictions.append({
-                "id": sample_id,
-                "audio_path": str(audio_path),
-                "reference": reference,
-                "prediction": result.text,
-                **metrics
-            })
-            
-        except Exception as e:
-            logger.error(f"Failed to transcribe {audio_path}: {e}")
-            metrics_list.append({
-                "wer": 1.0,
-                "cer": 1.0,
-                "latency": 0.0,
-                "rtf": 0.0
-            })
-            predictions.append({
-                "id": sample_id,
-                "audio_path": str(audio_path),
-                "reference": reference,
-                "prediction": "",
-                "error": str(e)
-            })
+            # Chaque lot est journalisé dès qu'il est disponible
+            with tqdm(total=len(pending), desc="Evaluating") as progress:
+                for batch, outcomes in zip(batches, results):
+                    for (key, _), (metrics, prediction) in zip(batch, outcomes):
+                        journal.append(key, metrics, prediction)
+                    progress.update(len(batch))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        
+        # Reconstruit les résultats dans l'ordre du dataset à partir du journal
+        outcomes = [journal.get(key) for key in keys]
+    
+    predictions = [prediction for _, prediction in outcomes]
     
     # Agrège les métriques
-    aggregated = aggregate_metrics(metrics_list)
+    aggregated = aggregate_metrics(metrics for metrics, _ in outcomes)
     
     # Sauvegarde
     if save_predictions:
         write_jsonl(output_dir / "predictions.jsonl", predictions)
-        write_csv(output_dir / "predictions.csv", predictions)
+        # Les opérations d'alignement ne sont conservées que dans le JSONL
+        write_csv(output_dir / "predictions.csv", [
+            {key: value for key, value in prediction.items() if key != "ops"} for prediction in predictions
+        ])
     
     # Sauvegarde métriques
     with open(output_dir / "metrics.json", "w", encoding="utf-8") as f:
         json.dump(aggregated, f, indent=2, ensure_ascii=False)
     
-    logger.info(f"Evaluation complete. WER: {aggregated.get('wer_mean', 'N/A'):.4f}")
+    logger.info(
+        f"Evaluation complete. WER: {aggregated.get('wer_mean', 0.0):.4f} "
+        f"(corpus: {aggregated.get('wer_corpus', 0.0):.4f})"
+    )
     
     # Génère le rapport markdown
     try:
@@ -2,18 +2,21 @@
 Métriques pour l'évaluation STT.
 """
 import time
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
 from src.common.types import STTResult, AudioSample
-try:
-    import jiwer  # Word Error Rate
-except ImportError:
-    jiwer = None
+from src.common.stats import MetricsAggregator
+from src.stt.eval.edit_distance import Alignment, align, edit_distance
+
+# Comptes par échantillon : sommés au niveau du corpus plutôt que moyennés
+COUNT_KEYS = ("substitutions", "deletions", "insertions", "ref_words", "char_errors", "ref_chars")
 
 
 def calculate_wer(reference: str, hypothesis: str) -> float:
     """
     Calcule le Word Error Rate (WER).
     
+    WER = distance d'édition entre les suites de mots / nombre de mots de la référence.
+    
     Args:
         reference: Texte de référence
         hypothesis: Texte transcrit
@@ -21,30 +24,25 @@ def calculate_wer(reference: str, hypothesis: str) -> float:
     Returns:
         WER (0.0 = parfait, 1.0+ = erreurs)
     """
-    if not reference.strip():
-        return 1.0 if hypothesis.strip() else 0.0
+    ref_words = reference.split()
+    hyp_words = hypothesis.split()
     
-    if jiwer is None:
-        # Implémentation simple si jiwer n'est pas disponible
-        ref_words = reference.split()
-        hyp_words = hypothesis.split()
-        # Distance de Levenshtein simplifiée au niveau des mots
-        if len(ref_words) == 0:
-            return 1.0 if hyp_words else 0.0
-        # Approximation simple
-        matches = sum(1 for w in hyp_words if w in ref_words)
-        return 1.0 - (matches / max(len(ref_words), len(hyp_words)))
+    if not ref_words:
+        return 1.0 if hyp_words else 0.0
     
-    return jiwer.wer(reference, hypothesis)
+    return edit_distance(ref_words, hyp_words) / len(ref_words)
 
 
-def calculate_cer(reference: str, hypothesis: str) -> float:
+def calculate_cer(reference: str, hypothesis: str, char_errors: Optional[int] = None) -> float:
     """
     Calcule le Character Error Rate (CER).
     
+    CER = distance d'édition entre les caractères / nombre de caractères de la référence.
+    
     Args:
         reference: Texte de référence
         hypothesis: Texte transcrit
+        char_errors: Distance d'édition entre les caractères, si déjà calculée
     
     Returns:
         CER (0.0 = parfait, 1.0+ = erreurs)
@@ -52,29 +50,9 @@ def calculate_cer(reference: str, hypothesis: str) -> float:
     if not reference:
         return 1.0 if hypothesis else 0.0
     
-    if jiwer is None:
-        # Implémentation simple si jiwer n'est pas disponible
-        # Distance de Levenshtein au niveau des caractères
-        def levenshtein(s1, s2):
-            if len(s1) < len(s2):
-                return levenshtein(s2, s1)
-            if len(s2) == 0:
-                return len(s1)
-            previous_row = range(len(s2) + 1)
-            for i, c1 in enumerate(s1):
-                current_row = [i + 1]
-                for j, c2 in enumerate(s2):
-                    insertions = previous_row[j + 1] + 1
-                    deletions = current_row[j] + 1
-                    substitutions = previous_row[j] + (c1 != c2)
-                    current_row.append(min(insertions, deletions, substitutions))
-                previous_row = current_row
-            return previous_row[-1]
-        
-        distance = levenshtein(reference, hypothesis)
-        return distance / max(len(reference), len(hypothesis), 1)
-    
-    return jiwer.cer(reference, hypothesis)
+    if char_errors is None:
+        char_errors = edit_distance(reference, hypothesis)
+    return char_errors / len(reference)
 
 
 def calculate_realtime_factor(audio_duration: float, processing_time: float) -> float:
@@ -98,22 +76,37 @@ def calculate_realtime_factor(audio_duration: float, processing_time: float) ->
 def evaluate_stt_result(
     result: STTResult,
     reference: str,
-    audio_duration: float
+    audio_duration: float,
+    alignment: Optional[Alignment] = None
 ) -> Dict[str, float]:
     """
     Évalue un résultat STT complet.
     
+    Le WER et les comptes d'erreurs par mot proviennent d'un seul alignement
+    (voir `align_words`), réutilisable par l'appelant pour conserver les opérations.
+    
     Args:
         result: Résultat de la transcription
         reference: Texte de référence (ground truth)
         audio_duration: Durée de l'audio en secondes
+        alignment: Alignement des mots déjà calculé (optionnel)
     
     Returns:
         Dictionnaire avec toutes les métriques
     """
+    if alignment is None:
+        alignment = align_words(reference, result.text)
+    
+    char_errors = edit_distance(reference, result.text)
     metrics = {
-        "wer": calculate_wer(reference, result.text),
-        "cer": calculate_cer(reference, result.text),
+        "wer": alignment.error_rate,
+        "cer": calculate_cer(reference, result.text, char_errors),
+        "substitutions": alignment.substitutions,
+        "deletions": alignment.deletions,
+        "insertions": alignment.insertions,
+        "ref_words": alignment.reference_length,
+        "char_errors": char_errors,
+        "ref_chars": len(reference),
     }
     
     if result.processing_time is not None:
@@ -126,27 +119,89 @@ def evaluate_stt_result(
     return metrics
 
 
-def aggregate_metrics(metrics_list: List[Dict[str, float]]) -> Dict[str, float]:
+def align_words(reference: str, hypothesis: str) -> Alignment:
+    """
+    Aligne les mots de la transcription sur ceux de la référence.
+    
+    Args:
+        reference: Texte de référence
+        hypothesis: Texte transcrit
+    
+    Returns:
+        Alignment (comptes et opérations d'édition sur les mots)
+    """
+    return align(reference.split(), hypothesis.split())
+
+
+def failed_sample_metrics(reference: str) -> Dict[str, float]:
+    """
+    Métriques d'un échantillon dont la transcription a échoué
+    (équivalent à une transcription vide : tous les mots sont supprimés).
+    
+    Args:
+        reference: Texte de référence
+    
+    Returns:
+        Dictionnaire de métriques
+    """
+    ref_words = len(reference.split())
+    return {
+        "wer": 1.0,
+        "cer": 1.0,
+        "substitutions": 0,
+        "deletions": ref_words,
+        "insertions": 0,
+        "ref_words": ref_words,
+        "char_errors": len(reference),
+        "ref_chars": len(reference),
+        "latency": 0.0,
+        "rtf": 0.0
+    }
+
+
+def corpus_error_rates(totals: Dict[str, float]) -> Dict[str, float]:
+    """
+    Calcule le WER et le CER au niveau du corpus à partir des comptes sommés
+    (total des erreurs / total de la référence), plutôt que la moyenne des taux.
+    
+    Args:
+        totals: Comptes sommés (`total_<clé>` pour chaque clé de COUNT_KEYS)
+    
+    Returns:
+        Dictionnaire avec wer_corpus et cer_corpus
+    """
+    word_errors = sum(totals.get(f"total_{key}", 0) for key in ("substitutions", "deletions", "insertions"))
+    ref_words = totals.get("total_ref_words", 0)
+    ref_chars = totals.get("total_ref_chars", 0)
+    
+    return {
+        "wer_corpus": word_errors / ref_words if ref_words else 0.0,
+        "cer_corpus": totals.get("total_char_errors", 0) / ref_chars if ref_chars else 0.0,
+    }
+
+
+def create_aggregator() -> MetricsAggregator:
+    """Crée un agrégateur en flux pour les métriques STT (voir aggregate_metrics)."""
+    return MetricsAggregator(count_keys=COUNT_KEYS)
+
+
+def aggregate_metrics(metrics: Iterable[Dict[str, float]] | MetricsAggregator) -> Dict[str, float]:
     """
     Agrège les métriques sur plusieurs échantillons.
     
     Args:
-        metrics_list: Liste de dictionnaires de métriques
+        metrics: Métriques par échantillon, ou agrégateur déjà alimenté
+            (ex: fusion des agrégateurs de plusieurs workers)
     
     Returns:
-        Métriques agrégées (moyennes)
+        Métriques agrégées : moyenne, écart-type et p50/p90/p95/p99 par métrique,
+        comptes totaux et taux au niveau du corpus
     """
-    if not metrics_list:
-        return {}
+    if not isinstance(metrics, MetricsAggregator):
+        metrics = create_aggregator().update(metrics)
     
-    aggregated = {}
-    for key in metrics_list[0].keys():
-        values = [m[key] for m in metrics_list if key in m]
-        if values:
-            aggregated[f"{key}_mean"] = sum(values) / len(values)
-            aggregated[f"{key}_std"] = (
-                sum((x - aggregated[f"{key}_mean"]) ** 2 for x in values) / len(values)
-            ) ** 0.5
+    aggregated = metrics.result()
+    if aggregated:
+        aggregated.update(corpus_error_rates(aggregated))
     
     return aggregated
-
@@ -67,16 +67,21 @@ def generate_markdown_report(
 ### Word Error Rate (WER)
 - **Moyenne**: {detailed_metrics.get('wer_mean', 0):.4f}
 - **Écart-type**: {detailed_metrics.get('wer_std', 0):.4f}
+- **Corpus** (erreurs totales / mots de référence): {detailed_metrics.get('wer_corpus', 0):.4f}
+- **Substitutions / Suppressions / Insertions**: {detailed_metrics.get('total_substitutions', 0)} / {detailed_metrics.get('total_deletions', 0)} / {detailed_metrics.get('total_insertions', 0)}
 
 ### Character Error Rate (CER)
 - **Moyenne**: {detailed_metrics.get('cer_mean', 0):.4f}
 - **Écart-type**: {detailed_metrics.get('cer_std', 0):.4f}
+- **Corpus**: {detailed_metrics.get('cer_corpus', 0):.4f}
 
 ### Performance
 - **Latency moyenne**: {detailed_metrics.get('latency_mean', 0):.4f} secondes
 - **Écart-type**: {detailed_metrics.get('latency_std', 0):.4f} secondes
+- **Latency p50 / p90 / p95 / p99**: {detailed_metrics.get('latency_p50', 0):.4f} / {detailed_metrics.get('latency_p90', 0):.4f} / {detailed_metrics.get('latency_p95', 0):.4f} / {detailed_metrics.get('latency_p99', 0):.4f} secondes
 - **Real-Time Factor (RTF) moyen**: {detailed_metrics.get('rtf_mean', 0):.4f}
 - **Écart-type RTF**: {detailed_metrics.get('rtf_std', 0):.4f}
+- **RTF p95 / p99**: {detailed_metrics.get('rtf_p95', 0):.4f} / {detailed_metrics.get('rtf_p99', 0):.4f}
 
 ### Confiance (si disponible)
 - **Moyenne**: {detailed_metrics.get('confidence_mean', 'N/A')}
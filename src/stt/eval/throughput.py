@@ -0,0 +1,272 @@
+"""
+Benchmark de débit d'un modèle STT sous différents niveaux de concurrence.
+
+Pour chaque niveau (1, 2, 4 … N requêtes simultanées) et chaque mode
+(threads partageant un modèle, ou processus avec un modèle chacun), transcrit
+un même jeu d'audios et mesure le débit, le RTF agrégé, les percentiles de
+latence par requête et l'utilisation CPU. Permet de repérer le point de
+saturation d'un modèle sur une machine.
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from src.stt.interfaces import STTModel
+from src.common.audio import get_audio_info
+from src.common.io import write_csv
+from src.common.logging import setup_logging
+from src.common.parallel import get_mp_context, limit_cpu_threads, default_threads_per_worker
+from src.common.stats import RunningStats
+
+logger = setup_logging(module="stt.throughput")
+
+MODES = ("thread", "process")
+
+# Gain de débit minimal (relatif) pour considérer qu'un niveau n'est pas saturé
+SATURATION_GAIN = 0.10
+
+
+def default_concurrency_levels(max_level: Optional[int] = None) -> List[int]:
+    """
+    Niveaux de concurrence par défaut : puissances de 2 jusqu'au nombre de cœurs.
+    
+    Args:
+        max_level: Niveau maximal (défaut: nombre de cœurs)
+    
+    Returns:
+        Liste croissante de niveaux
+    """
+    max_level = max_level or os.cpu_count() or 1
+    levels = []
+    level = 1
+    while level < max_level:
+        levels.append(level)
+        level *= 2
+    levels.append(max_level)
+    return levels
+
+
+def _timed_transcribe(model: STTModel, audio_path: str) -> Tuple[float, float, float, Optional[str]]:
+    """
+    Transcrit un fichier et mesure l'intervalle (horloge monotone) et le temps CPU du processus.
+    
+    Returns:
+        Tuple (début, fin, temps CPU, erreur éventuelle)
+    """
+    cpu_start = time.process_time()
+    start = time.monotonic()
+    error = None
+    try:
+        model.transcribe(audio_path)
+    except Exception as e:
+        error = str(e)
+    return start, time.monotonic(), time.process_time() - cpu_start, error
+
+
+# Modèle et barrière de préchauffage propres à chaque processus worker (voir _init_worker)
+_worker_model: Optional[STTModel] = None
+_worker_barrier = None
+
+
+def _init_worker(model_class: type, model_config: dict, num_threads: int, barrier):
+    """Instancie et initialise un modèle dans le processus worker."""
+    global _worker_model, _worker_barrier
+    limit_cpu_threads(num_threads)
+    _worker_model = model_class(model_config)
+    _worker_model.initialize()
+    _worker_barrier = barrier
+
+
+def _warm_up_worker(audio_path: str):
+    """
+    Préchauffe le modèle du worker puis attend les autres workers.
+    
+    La barrière bloque chaque tâche jusqu'à ce que tous les workers en
+    exécutent une : chaque worker reçoit exactement une tâche de préchauffage.
+    """
+    try:
+        _worker_model.transcribe(audio_path)
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+    _worker_barrier.wait()
+
+
+def _timed_transcribe_in_worker(audio_path: str) -> Tuple[float, float, float, Optional[str]]:
+    """Transcrit un fichier avec le modèle du processus worker."""
+    return _timed_transcribe(_worker_model, audio_path)
+
+
+def _run_level(
+    model: STTModel,
+    audio_paths: List[str],
+    mode: str,
+    concurrency: int
+) -> Tuple[List[Tuple[float, float, float, Optional[str]]], Optional[float]]:
+    """
+    Exécute toutes les requêtes à un niveau de concurrence donné.
+    
+    En mode process, tous les workers sont chargés et préchauffés avant la
+    première requête mesurée : le temps de chargement des modèles n'entre pas
+    dans la mesure.
+    
+    Returns:
+        Tuple (mesures par requête, temps CPU total du processus en mode thread)
+    """
+    if mode == "thread":
+        # Un seul modèle partagé par les threads (serveur multi-thread)
+        cpu_start = time.process_time()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(lambda path: _timed_transcribe(model, path), audio_paths))
+        return timings, time.process_time() - cpu_start
+    
+    mp_context = get_mp_context()
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(type(model), model.config, default_threads_per_worker(concurrency), mp_context.Barrier(concurrency))
+    ) as executor:
+        # Une tâche de préchauffage par worker, attendue avant de démarrer la mesure
+        warmups = [executor.submit(_warm_up_worker, audio_paths[0]) for _ in range(concurrency)]
+        for warmup in warmups:
+            warmup.result()
+        timings = list(executor.map(_timed_transcribe_in_worker, audio_paths))
+    # Chaque worker traite une requête à la fois : le temps CPU mesuré par requête est exact
+    return timings, None
+
+
+def _summarize_level(
+    mode: str,
+    concurrency: int,
+    timings: List[Tuple[float, float, float, Optional[str]]],
+    process_cpu_time: Optional[float],
+    audio_durations: List[float]
+) -> Dict[str, Any]:
+    """Calcule les métriques d'un niveau de concurrence."""
+    wall_time = max(end for _, end, _, _ in timings) - min(start for start, _, _, _ in timings)
+    cpu_time = process_cpu_time if process_cpu_time is not None else sum(cpu for _, _, cpu, _ in timings)
+    latencies = RunningStats()
+    for start, end, _, _ in timings:
+        latencies.add(end - start)
+    
+    total_audio = sum(audio_durations)
+    cpu_count = os.cpu_count() or 1
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": len(timings),
+        "errors": sum(1 for *_, error in timings if error),
+        "wall_time": wall_time,
+        "utterances_per_s": len(timings) / wall_time if wall_time > 0 else 0.0,
+        # Durées audio inconnues : débit audio et RTF non reportés (None)
+        "audio_seconds_per_s": (total_audio / wall_time if wall_time > 0 else 0.0) if total_audio > 0 else None,
+        "rtf": wall_time / total_audio if total_audio > 0 else None,
+        **{f"latency_{key}": value for key, value in latencies.summary().items() if key != "count"},
+        "cpu_time": cpu_time,
+        "cores_used": cpu_time / wall_time if wall_time > 0 else 0.0,
+        "cpu_utilization": cpu_time / (wall_time * cpu_count) if wall_time > 0 else 0.0,
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]], min_gain: float = SATURATION_GAIN) -> Optional[int]:
+    """
+    Retourne le premier niveau de concurrence au-delà duquel le débit ne progresse plus.
+    
+    Args:
+        levels: Résultats d'un même mode, par concurrence croissante
+        min_gain: Gain relatif de débit en dessous duquel le niveau suivant est jugé inutile
+    
+    Returns:
+        Concurrence de saturation (None si le débit progresse encore au dernier niveau)
+    """
+    for previous, current in zip(levels, levels[1:]):
+        if current["utterances_per_s"] < previous["utterances_per_s"] * (1 + min_gain):
+            return previous["concurrency"]
+    return None
+
+
+def run_throughput_benchmark(
+    model: STTModel,
+    audio_paths: Sequence[str | Path],
+    concurrency_levels: Sequence[int],
+    modes: Sequence[str] = MODES,
+    rounds: int = 1,
+    output_dir: Optional[str | Path] = None
+) -> Dict[str, Any]:
+    """
+    Mesure le débit d'un modèle STT à plusieurs niveaux de concurrence.
+    
+    En mode "thread", un modèle partagé est initialisé et préchauffé une fois ;
+    en mode "process", chaque worker charge et préchauffe son propre modèle
+    (hors mesure). Le temps d'un niveau va du début de la première requête à
+    la fin de la dernière.
+    
+    Args:
+        model: Modèle STT (en mode process, recréé via `model.__class__(model.config)`)
+        audio_paths: Jeu d'audios transcrit à chaque niveau
+        concurrency_levels: Nombres de requêtes simultanées à tester
+        modes: Modes d'exécution ("thread", "process")
+        rounds: Nombre de passages sur le jeu d'audios par niveau
+        output_dir: Dossier de sortie pour throughput.json / throughput.csv (optionnel)
+    
+    Returns:
+        Dictionnaire avec les résultats par niveau et la concurrence de saturation par mode
+    """
+    audio_paths = [str(path) for path in audio_paths]
+    if not audio_paths:
+        raise ValueError("No audio files to benchmark")
+    unknown_modes = set(modes) - set(MODES)
+    if unknown_modes:
+        raise ValueError(f"Unknown mode(s): {', '.join(sorted(unknown_modes))}")
+    
+    durations = []
+    for path in audio_paths:
+        try:
+            durations.append(get_audio_info(path)["duration"])
+        except Exception as e:
+            logger.warning(f"Failed to get audio info for {path}: {e} (RTF will not be reported)")
+            durations = []
+            break
+    workload = audio_paths * rounds
+    workload_durations = durations * rounds
+    
+    if "thread" in modes:
+        model.initialize()
+        _timed_transcribe(model, audio_paths[0])
+    
+    results = []
+    for mode in modes:
+        for concurrency in concurrency_levels:
+            logger.info(f"Benchmarking {model.name}: mode={mode}, concurrency={concurrency}, requests={len(workload)}")
+            timings, process_cpu_time = _run_level(model, workload, mode, concurrency)
+            level = _summarize_level(mode, concurrency, timings, process_cpu_time, workload_durations)
+            rtf = f"{level['rtf']:.3f}" if level["rtf"] is not None else "n/a"
+            logger.info(
+                f"  {level['utterances_per_s']:.2f} utt/s, RTF {rtf}, "
+                f"p95 {level['latency_p95']:.3f}s, CPU {level['cpu_utilization'] * 100:.0f}%"
+            )
+            results.append(level)
+    
+    summary = {
+        "model": model.name,
+        "requests_per_level": len(workload),
+        "audio_duration": sum(workload_durations) if workload_durations else None,
+        "cpu_count": os.cpu_count(),
+        "levels": results,
+        "saturation": {
+            mode: find_saturation([level for level in results if level["mode"] == mode])
+            for mode in modes
+        },
+    }
+    
+    if output_dir:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_dir / "throughput.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        write_csv(output_dir / "throughput.csv", results)
+        logger.info(f"Throughput results saved to {output_dir}")
+    
+    return summary
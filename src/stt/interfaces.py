@@ -1,14 +1,23 @@
 """
 Interfaces pour les modèles STT.
 """
+import tempfile
 from abc import ABC, abstractmethod
 from pathlib import Path
+from typing import List
+import numpy as np
+from src.common.audio import write_wav
 from src.common.types import STTResult
+from src.stt.streaming import STTStream, BufferedSTTStream
 
 
 class STTModel(ABC):
     """Interface pour tous les modèles STT."""
     
+    # True si le modèle transcrit directement un signal décodé (transcribe_array natif) :
+    # l'évaluation lui passe alors l'audio du cache au lieu du chemin du fichier
+    native_array_input: bool = False
+    
     def __init__(self, config: dict = None):
         """
         Initialise le modèle.
@@ -32,6 +41,67 @@ class STTModel(ABC):
         """
         pass
     
+    def transcribe_array(self, audio: np.ndarray, sample_rate: int = 16000) -> STTResult:
+        """
+        Transcrit un signal audio déjà décodé.
+        
+        Par défaut, écrit un WAV temporaire et appelle `transcribe`. Les modèles
+        qui décodent l'audio en mémoire surchargent cette méthode (et mettent
+        `native_array_input` à True).
+        
+        Args:
+            audio: Signal mono float32
+            sample_rate: Fréquence d'échantillonnage (Hz)
+        
+        Returns:
+            STTResult avec le texte transcrit
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_path = write_wav(Path(tmp_dir) / "audio.wav", audio, sample_rate)
+            return self.transcribe(wav_path)
+    
+    def transcribe_batch(self, audio_inputs: List[str | Path | np.ndarray], batch_size: int = 8) -> List[STTResult]:
+        """
+        Transcrit plusieurs fichiers audio ou signaux décodés (16 kHz).
+        
+        Par défaut, appelle `transcribe` (ou `transcribe_array`) sur chaque entrée.
+        Les modèles capables d'inférence par lots (ex: log-mel paddés + décodage
+        batché) surchargent cette méthode ; `processing_time` de chaque résultat
+        est alors la part du temps du lot attribuée à l'échantillon.
+        
+        Args:
+            audio_inputs: Chemins vers les fichiers audio ou signaux mono float32
+            batch_size: Nombre maximal d'entrées par passe du modèle
+        
+        Returns:
+            Liste de STTResult, dans l'ordre des entrées
+        """
+        return [
+            self.transcribe_array(audio_input) if isinstance(audio_input, np.ndarray)
+            else self.transcribe(audio_input)
+            for audio_input in audio_inputs
+        ]
+    
+    def create_stream(self, sample_rate: int = 16000) -> STTStream:
+        """
+        Ouvre une session de transcription en streaming.
+        
+        Par défaut, retranscrit l'audio accumulé à intervalle régulier
+        (`streaming_partial_interval` dans la config, en secondes).
+        Les modèles avec décodage incrémental natif peuvent surcharger cette méthode.
+        
+        Args:
+            sample_rate: Fréquence d'échantillonnage des blocs audio (Hz)
+        
+        Returns:
+            Session STTStream
+        """
+        return BufferedSTTStream(
+            self,
+            sample_rate=sample_rate,
+            partial_interval=self.config.get("streaming_partial_interval", 1.0)
+        )
+    
     def initialize(self):
         """Initialise le modèle (chargement, etc.)."""
         if not self._initialized:
@@ -0,0 +1,114 @@
+"""
+Transcription en streaming : flux audio découpé en blocs PCM.
+"""
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+import numpy as np
+from src.common.audio import pcm16_to_float32
+from src.common.types import STTResult
+
+
+class STTStream(ABC):
+    """
+    Session de transcription incrémentale.
+
+    Reçoit l'audio bloc par bloc et produit des hypothèses partielles,
+    puis un résultat final à la fin du flux.
+    """
+
+    def __init__(self, sample_rate: int = 16000):
+        """
+        Args:
+            sample_rate: Fréquence d'échantillonnage des blocs (Hz)
+        """
+        self.sample_rate = sample_rate
+
+    @abstractmethod
+    def accept_chunk(self, chunk: bytes | np.ndarray) -> Optional[str]:
+        """
+        Ajoute un bloc audio au flux.
+
+        Args:
+            chunk: Bloc PCM 16 bits (bytes) ou signal float32 mono
+
+        Returns:
+            Nouvelle hypothèse partielle, ou None si elle n'a pas été recalculée
+        """
+        pass
+
+    @abstractmethod
+    def finalize(self) -> STTResult:
+        """
+        Termine le flux et retourne la transcription finale.
+
+        Returns:
+            STTResult avec le texte complet
+        """
+        pass
+
+    @staticmethod
+    def _to_float32(chunk: bytes | np.ndarray) -> np.ndarray:
+        """Convertit un bloc audio en signal float32 mono."""
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            return pcm16_to_float32(bytes(chunk))
+        return np.asarray(chunk, dtype=np.float32).reshape(-1)
+
+
+class BufferedSTTStream(STTStream):
+    """
+    Streaming générique pour les modèles sans décodage incrémental natif.
+
+    Accumule l'audio et retranscrit le tampon complet dès que
+    `partial_interval` secondes de nouvel audio sont disponibles.
+    """
+
+    def __init__(self, model, sample_rate: int = 16000, partial_interval: float = 1.0):
+        """
+        Args:
+            model: Modèle STT utilisé pour les transcriptions (STTModel)
+            sample_rate: Fréquence d'échantillonnage des blocs (Hz)
+            partial_interval: Quantité de nouvel audio (secondes) entre deux hypothèses
+        """
+        super().__init__(sample_rate)
+        self.model = model
+        self.partial_interval = partial_interval
+        self._chunks = []
+        self._num_samples = 0
+        self._decoded_samples = 0
+        self._last_text = ""
+
+    def accept_chunk(self, chunk: bytes | np.ndarray) -> Optional[str]:
+        audio = self._to_float32(chunk)
+        if audio.size:
+            self._chunks.append(audio)
+            self._num_samples += audio.size
+
+        if self._num_samples - self._decoded_samples < self.partial_interval * self.sample_rate:
+            return None
+
+        self._last_text = self._transcribe_buffer().text
+        return self._last_text
+
+    def finalize(self) -> STTResult:
+        if self._num_samples == 0:
+            return STTResult(text="", processing_time=0.0, metadata={"streaming": True})
+
+        if self._decoded_samples == self._num_samples:
+            # Tampon déjà transcrit intégralement par la dernière hypothèse
+            return STTResult(text=self._last_text, metadata={"streaming": True})
+
+        return self._transcribe_buffer()
+
+    def _transcribe_buffer(self) -> STTResult:
+        """Transcrit l'audio accumulé depuis le début du flux."""
+        audio = np.concatenate(self._chunks)
+        self._chunks = [audio]
+        self._decoded_samples = audio.size
+
+        start = time.perf_counter()
+        result = self.model.transcribe_array(audio, self.sample_rate)
+        if result.processing_time is None:
+            result.processing_time = time.perf_counter() - start
+        result.metadata = {**result.metadata, "streaming": True}
+        return result